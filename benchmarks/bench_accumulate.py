@@ -0,0 +1,72 @@
+"""
+Regression benchmark of the accumulation of chunk results in `IMF.download_planned`, the path of `download_data`: the
+chunks are planned by the `ChunkPlanner`, requested and parsed by `iter_planned`, and concatenated once. It checks that
+the run time per series stays flat, i.e. grows linearly with the number of series, and compares it with the previous
+accumulation that concatenated every response onto the frames accumulated so far.
+
+Usage:
+    python benchmarks/bench_accumulate.py [--repeat 3] [--tolerance 2.0]
+
+The script exits with status 1 if the time per series of the largest case exceeds `tolerance` times that of the
+smallest case.
+"""
+
+import argparse
+import sys
+import time as tm
+
+import pandas as pd
+
+from imfdatapy.imf import IFS
+from imfdatapy.imf_planner import ChunkPlanner
+from bench_parse import gen_response, best_time
+
+
+def legacy_accumulate(ifs, urls, responses):
+    """
+    The accumulation of `IMF.download_data` before it was made linear, kept for comparison.
+    """
+    temp = pd.DataFrame()
+    for url in urls:
+        json = responses[url]
+        series = json['CompactData']['DataSet']['Series']
+        for n in range(len(series)):
+            temp_df = ifs.parse_compact_data({'CompactData': {'DataSet': {'Series': [series[n]]}}})
+            temp = pd.concat([temp, temp_df], axis=0)
+    return temp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs per case; the best time is reported")
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="maximum ratio of the time per series between the largest and the smallest case")
+    args = parser.parse_args()
+
+    ifs = IFS(outdir="out", is_log_to_screen=False, is_cache=False, planner=ChunkPlanner())
+    series_per_chunk, n_obs = 5, 40
+    print(f"{'chunks':>7} {'series':>7} {'rows':>8} {'legacy (s)':>11} {'new (s)':>9} {'new us/series':>14}")
+    per_series = []
+    for n_chunks in [50, 100, 200, 400]:
+        # one chunk per group of a country and its indicators
+        groups = [([f"C{n}"], [f"IND_{n}_{k}" for k in range(series_per_chunk)]) for n in range(n_chunks)]
+        urls = [ifs.gen_data_url(countries[0], indicators, ifs.get_start_time(countries, indicators, {}))
+                for countries, indicators in groups]
+        responses = {url: gen_response(series_per_chunk, n_obs) for url in urls}
+        ifs.repeat_request = responses.get
+        new_sec, new_df = best_time(lambda: ifs.download_planned(groups, {}), args.repeat)
+        legacy_sec, _ = best_time(lambda: legacy_accumulate(ifs, urls, responses), 1)
+        n_series = n_chunks * series_per_chunk
+        per_series.append(new_sec / n_series)
+        print(f"{n_chunks:>7} {n_series:>7} {new_df.shape[0]:>8} {legacy_sec:>11.3f} {new_sec:>9.3f} "
+              f"{per_series[-1] * 1e6:>14.1f}")
+
+    growth = per_series[-1] / per_series[0]
+    print(f"time per series grew {growth:.2f}x from the smallest to the largest case (tolerance {args.tolerance}x)")
+    if growth > args.tolerance:
+        print("FAILED: accumulation is not linear in the number of series")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
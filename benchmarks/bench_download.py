@@ -0,0 +1,224 @@
+"""
+End-to-end benchmark of `download_data` for IFS, DOT, BOP, GFSR and HPDD queries at small, medium and bulk sizes,
+against a local `MockSDMXServer` that serves generated fixtures in the format of recorded responses, or recorded
+fixtures from `--fixturedir`. Each case runs in a fresh process and reports the wall time of its stages, the peak
+resident memory of the process and the number of CompactData requests per second:
+
+    structure  downloading the series names, dimensions and meta data (`prepare_download`)
+    request    waiting for CompactData responses, including retries (`repeat_request`), summed over threads
+    sleep      waiting before retries (`retry_stats`)
+    parse      converting the responses to dataframes (`parse_compact_data`)
+    merge      merging with the meta data, deduplicating and sorting (`normalize_data`)
+    output     writing the output file (`output_data`)
+    total      the whole `download_data` call
+
+The results are compared with the baselines in 'benchmarks/baselines/bench_download.json', and saved there with
+`--save` to record new baselines.
+
+Usage:
+    python benchmarks/bench_download.py [--series IFS DOT] [--sizes small medium] [--latency 0.0] [--max-workers 1]
+                                        [--repeat 1] [--tolerance 1.5] [--save]
+
+The script exits with status 1 if the total time of a case exceeds `tolerance` times its baseline.
+"""
+
+import argparse
+import json as js
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time as tm
+
+from imfdatapy.imf import *
+from imfdatapy.imf_mock import MockSDMXServer, gen_fixtures, load_fixtures
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "bench_download.json")
+
+# number of countries, indicators and years of each size
+SIZES = {"small": (2, 2, 10), "medium": (10, 10, 20), "bulk": (40, 25, 40)}
+
+STAGES = ["structure", "request", "sleep", "parse", "merge", "output", "total"]
+
+# times below this number of seconds are not compared with the baselines
+NOISE_SEC = 0.05
+
+
+def gen_codes(prefix, n, text):
+    return [(f"{prefix}{k:03d}", f"{text} {k}") for k in range(n)]
+
+
+# series class, period, extra dimensions before and after the indicator dimension, and extra arguments of each series
+SCENARIOS = {
+    "IFS": (IFS, "Q", [], [], {}),
+    "DOT": (DOT, "Q", [], [("COUNTERPART_AREA", "CL_COUNTERPART_AREA_DOT", gen_codes("P", 3, "Counterpart"))], {}),
+    "BOP": (BOP, "Q", [], [], {}),
+    "GFSR": (GFSR, "A", [("REF_SECTOR", "CL_SECTOR_GFSR", [("S13", "General government"),
+                                                           ("S1311", "Central government")]),
+                         ("UNIT_MEASURE", "CL_UNIT_GFSR", [("XDC", "Domestic currency")])], [], {"unit": "XDC"}),
+    "HPDD": (HPDD, "A", [], [], {}),
+}
+
+
+def gen_scenario_fixtures(series, size):
+    """
+    It generates the fixtures of a scenario, with benchmark indicators found by the search term 'benchmark'.
+    """
+    n_countries, n_indicators, n_years = SIZES[size]
+    _, period, before, after, _ = SCENARIOS[series]
+    indicator_concept = "CLASSIFICATION" if series == "GFSR" else "INDICATOR"
+    dimensions = [("REF_AREA", f"CL_AREA_{series}", gen_codes("C", n_countries, "Country")), *before,
+                  (indicator_concept, f"CL_INDICATOR_{series}", gen_codes("IND", n_indicators, "Benchmark indicator")),
+                  *after]
+    return gen_fixtures(series, dimensions, freqs=(period,), start_year=2022 - n_years, n_years=n_years)
+
+
+class StageTimer:
+    """
+    It accumulates the time spent in methods of an `IMF` object, by wrapping them on the instance.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, sec):
+        with self._lock:
+            self.times[stage] = self.times.get(stage, 0.0) + sec
+
+    def wrap(self, obj, method, stage, is_timed=None):
+        func = getattr(obj, method)
+
+        def wrapped(*args, **kwargs):
+            if is_timed is not None and not is_timed(*args, **kwargs):
+                return func(*args, **kwargs)
+            start = tm.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, tm.perf_counter() - start)
+
+        setattr(obj, method, wrapped)
+
+
+def peak_rss_mb():
+    """
+    It returns the peak resident memory of the process in MB, or `None` where it is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+
+
+def run_case(series, size, latency=0.0, max_workers=1, fixturedir=None):
+    """
+    It runs one download against a mock server and measures its stages.
+
+    Returns:
+      A dictionary with the stage times in seconds, the numbers of rows and requests, the requests per second and
+      the peak resident memory in MB.
+    """
+    cls, period, _, _, kwargs = SCENARIOS[series]
+    fixtures = load_fixtures(fixturedir) if fixturedir is not None else gen_scenario_fixtures(series, size)
+    n_countries, _, n_years = SIZES[size]
+    countries = [f"C{k:03d}" for k in range(n_countries)]
+    tmpdir = tempfile.mkdtemp()
+    rate_limiter = RateLimiter(max_requests=10 ** 6, window_sec=1)
+    with MockSDMXServer(fixtures, latency_sec=latency) as server:
+        imf = cls(search_terms=["benchmark"], countries=countries, period=period, start_date=str(2022 - n_years),
+                  outdir=tmpdir, logdir=tmpdir, is_log_to_screen=False, url=server.url, max_workers=max_workers,
+                  transport=Transport(pool_size=max(10, max_workers), rate_limiter=rate_limiter),
+                  registry=StructureRegistry(), planner=ChunkPlanner(), **kwargs)
+        timer = StageTimer()
+        timer.wrap(imf, "prepare_download", "structure")
+        timer.wrap(imf, "repeat_request", "request", is_timed=lambda url: "CompactData/" in url)
+        timer.wrap(imf, "parse_compact_data", "parse")
+        timer.wrap(imf, "normalize_data", "merge")
+        timer.wrap(imf, "output_data", "output")
+        start = tm.perf_counter()
+        df = imf.download_data()
+        total = tm.perf_counter() - start
+        n_requests = server.stats()["endpoints"].get("CompactData", 0)
+
+    times = {stage: round(timer.times.get(stage, 0.0), 4) for stage in STAGES}
+    times["sleep"] = round(imf.retry_stats.to_dict()["sleep_sec"], 4)
+    times["total"] = round(total, 4)
+    download_sec = total - times["structure"] - times["merge"] - times["output"]
+    return {"times": times, "rows": 0 if df is None else int(df.shape[0]), "requests": n_requests,
+            "requests_per_sec": round(n_requests / download_sec, 1) if download_sec > 0 else None,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def run_subprocess(series, size, args):
+    """
+    It runs a case in a fresh process, so that its peak memory is not that of earlier cases.
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), "--run", series, size, "--latency", str(args.latency),
+           "--max-workers", str(args.max_workers)]
+    if args.fixturedir is not None:
+        cmd.extend(["--fixturedir", args.fixturedir])
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return js.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response by the server")
+    parser.add_argument("--max-workers", type=int, default=1, help="number of threads that download chunks")
+    parser.add_argument("--fixturedir", default=None, help="directory of recorded fixtures of a single series")
+    parser.add_argument("--repeat", type=int, default=1, help="number of runs per case; the fastest is reported")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="maximum ratio of the total time of a case to its baseline")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baselines")
+    parser.add_argument("--run", nargs=2, metavar=("SERIES", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(js.dumps(run_case(*args.run, latency=args.latency, max_workers=args.max_workers,
+                                fixturedir=args.fixturedir)))
+        return
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baselines = js.load(f)
+
+    print(f"{'case':<12} {'rows':>8} {'reqs':>5} "
+          + " ".join(f"{stage:>9}" for stage in STAGES) + f" {'req/s':>7} {'RSS MB':>7} {'vs base':>8}")
+    results, regressions = {}, []
+    for series in args.series:
+        for size in args.sizes:
+            case = f"{series}/{size}"
+            result = min((run_subprocess(series, size, args) for _ in range(max(1, args.repeat))),
+                         key=lambda r: r["times"]["total"])
+            results[case] = result
+            base = baselines.get(case)
+            ratio = None
+            if base is not None and base["times"]["total"] >= NOISE_SEC:
+                ratio = result["times"]["total"] / base["times"]["total"]
+                if ratio > args.tolerance:
+                    regressions.append(case)
+            rss = result["peak_rss_mb"]
+            print(f"{case:<12} {result['rows']:>8} {result['requests']:>5} "
+                  + " ".join(f"{result['times'][stage]:>9.3f}" for stage in STAGES)
+                  + f" {result['requests_per_sec'] or 0:>7.1f} {rss or 0:>7.0f} "
+                  + (f"{ratio:>7.2f}x" if ratio is not None else f"{'-':>8}"))
+
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            js.dump({**baselines, **results}, f, indent=2, sort_keys=True)
+        print(f"saved baselines to {BASELINE_FILE}")
+    if len(regressions) > 0:
+        print(f"FAILED: total time exceeds {args.tolerance}x the baseline for {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
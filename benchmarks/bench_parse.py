@@ -0,0 +1,98 @@
+"""
+Benchmark of the CompactData json-to-dataframe parser, `IMF.parse_compact_data`, against the previous parser that built
+and concatenated one dataframe per series.
+
+Usage:
+    python benchmarks/bench_parse.py [--repeat 5]
+"""
+
+import argparse
+import time as tm
+
+import pandas as pd
+
+from imfdatapy.imf import IFS
+
+
+def gen_response(n_series, n_obs, freq="Q"):
+    """
+    It generates a CompactData response with `n_series` series of `n_obs` observations each.
+    """
+    series = []
+    for n in range(n_series):
+        obs = []
+        for i in range(n_obs):
+            period = f"{1950 + i // 4}-Q{i % 4 + 1}" if freq == "Q" else f"{1800 + i}"
+            o = {"@TIME_PERIOD": period, "@OBS_VALUE": f"{n + i * 0.25:.2f}"}
+            if i % 7 == 0:
+                o["@OBS_STATUS"] = "E"
+            obs.append(o)
+        series.append({"@FREQ": freq, "@REF_AREA": f"C{n % 50}", "@INDICATOR": f"IND_{n}", "@UNIT_MULT": "6",
+                       "@TIME_FORMAT": "P3M" if freq == "Q" else "P1Y", "Obs": obs})
+    return {"CompactData": {"DataSet": {"Series": series}}}
+
+
+def legacy_parse(json):
+    """
+    The parser of `IMF.download_data` before it was vectorized, kept for comparison.
+    """
+    temp = pd.DataFrame()
+    series = json['CompactData']['DataSet']['Series']
+    if isinstance(series, dict):
+        temp_df = pd.DataFrame()
+        if isinstance(series.get("Obs"), list):
+            temp_df = pd.concat([temp_df, pd.json_normalize(series.get("Obs"))])
+        for k in series.keys():
+            if k != "Obs":
+                temp_df[k] = series.get(k)
+        if temp_df.shape[0] > 0:
+            temp_df = temp_df.rename(
+                columns={'@OBS_VALUE': 'Value', '@INDICATOR': 'ID', '@INDICATOR_CODE': 'ID', '@REF_AREA': 'Country'})
+            temp_df['Period'] = pd.to_datetime([row.replace('-', '') for row in temp_df['@TIME_PERIOD']])
+            temp_df.drop('@TIME_PERIOD', axis=1, inplace=True)
+            temp = pd.concat([temp, temp_df], axis=0)
+    elif isinstance(series, list):
+        for n in range(0, len(series)):
+            temp_df = pd.DataFrame.from_dict(series[n].get('Obs')).rename(
+                columns={'@OBS_VALUE': 'Value', '@OBS_STATUS': 'Status'})
+            for k in series[n].keys():
+                if k != "Obs":
+                    temp_df[k] = series[n].get(k)
+            if temp_df.shape[0] > 0:
+                temp_df = temp_df.rename(
+                    columns={'@OBS_VALUE': 'Value', '@INDICATOR': 'ID', '@REF_SECTOR': 'ID', '@REF_AREA': 'Country'})
+                temp_df['Period'] = pd.to_datetime([row.replace('-', '') for row in temp_df['@TIME_PERIOD']])
+                temp_df.drop('@TIME_PERIOD', axis=1, inplace=True)
+                temp = pd.concat([temp, temp_df], axis=0)
+    return temp
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = tm.perf_counter()
+        result = func()
+        times.append(tm.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs per case; the best time is reported")
+    args = parser.parse_args()
+
+    ifs = IFS(outdir="out", is_log_to_screen=False, is_cache=False)
+    cases = [(10, 1200, "Q"), (100, 120, "Q"), (1000, 12, "A"), (200, 200, "A")]
+    print(f"{'series':>7} {'obs':>7} {'freq':>4} {'legacy (s)':>11} {'new (s)':>9} {'speedup':>8} {'same':>5}")
+    for n_series, n_obs, freq in cases:
+        json = gen_response(n_series, n_obs, freq)
+        legacy_sec, legacy_df = best_time(lambda: legacy_parse(json), args.repeat)
+        new_sec, new_df = best_time(lambda: ifs.parse_compact_data(json), args.repeat)
+        legacy_df = legacy_df.reset_index(drop=True)[list(new_df.columns)]
+        is_same = legacy_df.equals(new_df)
+        print(f"{n_series:>7} {n_series * n_obs:>7} {freq:>4} {legacy_sec:>11.4f} {new_sec:>9.4f} "
+              f"{legacy_sec / new_sec:>7.1f}x {str(is_same):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -60,6 +60,9 @@ setuptools.setup(
     install_requires=[
         'requests >= 2.28.1',
         'pandas >= 1.0.0'],
+    extras_require={
+        'parquet': ['pyarrow >= 8.0.0'],
+        'async': ['httpx >= 0.23.0']},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: Apache Software License",
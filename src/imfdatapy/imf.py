@@ -5,18 +5,34 @@ Creation Date: Jun 15, 2022
 
 """
 
+import logging
 import time as tm
 from abc import ABC, abstractmethod
 
 from os import mkdir
 from os import path
-import itertools
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
 import requests
 
 MAX_FILENAME_LEN = 260
 
+# pandas period frequencies of the IMF frequency codes
+PERIOD_FREQ = {'A': 'Y', 'Q': 'Q', 'M': 'M', 'W': 'W', 'D': 'D', 'B': 'B'}
+
+# file extensions of the supported output formats
+OUTPUT_FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+# number of requests per worker thread submitted ahead of the response being processed, see `request_many`
+REQUEST_AHEAD = 2
+
+# base url of the SDMX_JSON service of the IMF data server
+IMF_URL = 'http://dataservices.imf.org/REST/SDMX_JSON.svc/'
+
 try:
     from .imf_log import *
 except:
@@ -25,12 +41,39 @@ except:
     except:
         print(f"WARN: Failed to create log file.")
 
+try:
+    from .imf_transport import Transport
+    from .imf_rate_limit import RateLimiter, set_rate_limit
+    from .imf_cache import ResponseCache
+    from .imf_structure import StructureRegistry, LazyDimDict
+    from .imf_store import DataStore
+    from .imf_planner import ChunkPlanner, TOO_LARGE_STATUS
+    from .imf_journal import JobJournal
+    from .imf_retry import RetryPolicy, RetryStats, RETRYABLE_FAILURES
+    from .imf_search import CodelistIndex
+    from .imf_metrics import Metrics
+except ImportError:
+    from imf_transport import Transport
+    from imf_rate_limit import RateLimiter, set_rate_limit
+    from imf_cache import ResponseCache
+    from imf_structure import StructureRegistry, LazyDimDict
+    from imf_store import DataStore
+    from imf_planner import ChunkPlanner, TOO_LARGE_STATUS
+    from imf_journal import JobJournal
+    from imf_retry import RetryPolicy, RetryStats, RETRYABLE_FAILURES
+    from imf_search import CodelistIndex
+    from imf_metrics import Metrics
+
 
 # abstract class
 class Series(ABC):
 
     def __init__(self, series='IFS', search_terms=None, countries=None, period='Q', start_date=None, end_date=None,
-                 outdir="out", logdir="log", is_log_to_screen=True):
+                 outdir="out", logdir="log", is_log_to_screen=True, transport=None,
+                 max_workers=1, is_cache=True, cachedir=None, registry=None, is_compact_dtypes=False,
+                 output_format="csv", compression=None, is_incremental=False, lookback_periods=4,
+                 storedir=None, planner=None, jobdir=None, retry_policy=None, is_literal_search=False,
+                 url=None, is_log_to_file=True):
         """
         This function initializes the IMF class, which is used to download data from the IMF's Data API.
 
@@ -44,6 +87,46 @@ class Series(ABC):
           outdir: the directory where the data will be saved
           logdir: the directory where the log files will be saved
           is_log_to_screen: True to have log statements printed to console or standard output.
+          transport: a `Transport` object used for all requests to the IMF data server. Pass the same object to
+                     several instances to share their pooled connections. Defaults to None to create a new one, which
+                     is closed by `close`.
+          max_workers: number of threads that download data chunks concurrently, still subject to the shared rate
+                       limit. Defaults to 1 to download the chunks one at a time.
+          is_cache: True to cache responses of structure requests (`Dataflow`, `DataStructure`, `CodeList` and
+                    `GenericMetadata`) on disk. Ignored if `transport` is given.
+          cachedir: the directory where the responses will be cached. Defaults to None for a 'cache' directory in
+                    `outdir`.
+          registry: a `StructureRegistry` object that keeps parsed structure metadata in memory. Defaults to None to
+                    use the process-wide registry shared by all `IMF` objects.
+          is_compact_dtypes: True to return float64 values, integer unit multipliers, categorical codes and a period
+                             dtype instead of strings. Defaults to False.
+          output_format: format of the output files, one of 'csv', 'parquet' or 'feather'. Parquet and Feather keep
+                         the column types when the files are read back but need the optional package `pyarrow`;
+                         without it, the files are written as csv. Defaults to 'csv'.
+          compression: compression of Parquet or Feather files, e.g. 'snappy', 'zstd' or 'lz4'. Defaults to None for
+                       the default compression of the format. Ignored for csv files.
+          is_incremental: True to refresh the data saved by an earlier run with the same inputs, downloading only the
+                          periods after the last stored period of each indicator and country. Defaults to False.
+          lookback_periods: number of periods before the last stored period that are downloaded again in an
+                            incremental refresh to pick up revisions. Defaults to 4.
+          storedir: the directory of a `DataStore` that keeps downloaded observations partitioned by series,
+                    frequency and country. Requests are then served from the store, and only the indicators, countries
+                    and years missing in it are downloaded. Defaults to None to download everything.
+          planner: a `ChunkPlanner` object that batches countries and indicators into CompactData requests and
+                   remembers the chunk sizes that worked for each series. Defaults to None to use the process-wide
+                   planner shared by all `IMF` objects.
+          jobdir: the directory of the journals of `download_data` jobs, see `JobJournal`. Each chunk is saved as
+                  soon as it is downloaded, and running the same query again after an interruption downloads only
+                  the chunks that have not been completed or have failed. Ignored, with a warning, by downloads from
+                  `storedir`, which resume by themselves. Defaults to None to not journal downloads.
+          retry_policy: a `RetryPolicy` object that decides when failed requests are sent again and the deadline of
+                        a download. Defaults to None for the default policy. Retries are counted in `retry_stats`.
+          is_literal_search: True to match the search terms as literal substrings, False to match terms with
+                             regular expression characters as regular expressions. Defaults to False.
+          url: the base url of the SDMX_JSON service, e.g. the url of a local `MockSDMXServer`. Defaults to None for
+               `IMF_URL`, the IMF data server.
+          is_log_to_file: True to write log statements to a log file in `logdir`. All objects with the same `logdir`
+                          share one log file. Defaults to True.
         """
         input_str = ""
         if series is not None:
@@ -63,10 +146,10 @@ class Series(ABC):
         if is_log_to_screen is not None:
             input_str += f", {is_log_to_screen = }"
 
-        logfile = LogFile(logdir=logdir, is_log_to_screen=is_log_to_screen)
+        logfile = LogFile(logdir=logdir, is_log_to_screen=is_log_to_screen, is_log_to_file=is_log_to_file)
         self.logger = logfile.start_log()
         if is_log_to_screen:
-            self.logger.info(f"Inputs: {input_str}")
+            self.logger.info("Inputs: %s", input_str)
 
 
         self.series = series
@@ -77,20 +160,58 @@ class Series(ABC):
         self.period = period
         self.start_time = start_date[:4] if isinstance(start_date, str) else start_date
         self.end_time = end_date[:4] if isinstance(end_date, str) else end_date
-        self.url = 'http://dataservices.imf.org/REST/SDMX_JSON.svc/'
+        self.url = IMF_URL if url is None else url.rstrip('/') + '/'
+        self.max_workers = max(1, max_workers)
+        self._is_own_transport = transport is None
+        if transport is None:
+            cache = None
+            if is_cache:
+                if cachedir is None:
+                    cachedir = path.join(outdir, "cache")
+                cache = ResponseCache(cachedir=cachedir)
+            transport = Transport(pool_size=max(10, self.max_workers), cache=cache)
+        self.transport = transport
+        self.registry = registry if registry is not None else StructureRegistry.shared()
+        self.planner = planner if planner is not None else ChunkPlanner.shared()
+        self.is_compact_dtypes = is_compact_dtypes
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {list(OUTPUT_FORMATS)}")
+        if output_format != "csv" and not self.is_pyarrow_available():
+            self.logger.warning("Package pyarrow is required for %s files. Output csv files instead.", output_format)
+            output_format = "csv"
+        self.output_format = output_format
+        self.file_ext = OUTPUT_FORMATS[output_format]
+        self.compression = compression
+        self.is_incremental = is_incremental
+        self.lookback_periods = max(0, lookback_periods)
+        self.store = None
+        if storedir is not None:
+            self.store = DataStore(storedir, file_format=self.output_format, compression=self.compression)
+        self.jobdir = jobdir
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.metrics = Metrics(series=series, parent=Metrics.shared())
+        self.is_literal_search = is_literal_search
+        self._deadline = None
+        self._categories = None
+        self.journal = None
+        # an object that sends the requests instead of `transport` while its `is_bridged()` is True, e.g. `AsyncIMF`,
+        # with the methods `send_request(url)` and `send_requests(urls)` in place of `repeat_request` and `request_many`
+        self.request_hook = None
+        self._chunk_errors = {}
         self.meta_df = pd.DataFrame()
         self.series_df = pd.DataFrame()
         self.data_df = pd.DataFrame()
-        self.dim_dict = {}
+        self.dim_dict = LazyDimDict()
+        self.dimension_list = []
         self.des_list = []
         self.id_list = []
 
         self._indicator_dim_position = 2
 
         # Control for rate limits, `https://datahelp.imf.org/knowledgebase/articles/630877-data-services`
-        self._max_requests = 3
-        self._sleep_sec = 1  # 10 requests in 5s per user (IP) & 50 requests per second per app
-        self._max_indicators = 5
+        # 10 requests in 5s per user (IP) & 50 requests per second per app are enforced by the shared `RateLimiter`,
+        # see `set_rate_limit`. Failed requests are retried according to `retry_policy`.
 
         # Doesn't create new directory in colab
         self.outdir = f"{outdir}{os.sep}" if outdir[-1] != os.sep else outdir
@@ -129,111 +250,115 @@ class Series(ABC):
 class IMF(Series):
 
     def __init__(self, series='IFS', search_terms=None, countries=None, period='Q',
-                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True):
-        super().__init__(series, search_terms, countries, period, start_date, end_date, outdir, logdir, is_log_to_screen)
+                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True, **kwargs):
+        super().__init__(series, search_terms, countries, period, start_date, end_date, outdir, logdir, is_log_to_screen,
+                         **kwargs)
 
     def output_series(self, series=None):
         """
-        This function outputs all or some IMF series dataframe to a csv file, and logs its file path.
+        This function outputs all or some IMF series dataframe to a file in the output format, and logs its file path.
 
         Args:
-          series: Series code as a string. If `series` is `None`, then the function outputs all series to a csv file.
+          series: Series code as a string. If `series` is `None`, then the function outputs all series to a file.
                   If `series` is not `None`, then the function outputs only the series that contain the string `series`
-                  to a csv file.
+                  to a file.
         """
 
-        # output to csv file
+        # output to file
         if series is None:
-            outfile_path = f"{self.outdir}series_imf.csv"
+            outfile_path = f"{self.outdir}series_imf{self.file_ext}"
         else:
-            outfile_path = f"{self.outdir}series_{series.lower()}.csv"
+            outfile_path = f"{self.outdir}series_{series.lower()}{self.file_ext}"
         if (self.series_df.shape[0] > 0) and (self.series_df.shape[1] > 0):
-            self.series_df.to_csv(outfile_path, index=False)
+            self.write_df(self.series_df, outfile_path)
             if series is None:
-                self.logger.info(f"Output all IMF series in a {self.series_df.shape} table to .{os.sep}{outfile_path}")
+                self.logger.info("Output all IMF series in a %s table to .%s%s", self.series_df.shape, os.sep,
+                                 outfile_path)
             else:
-                self.logger.info(
-                    f"Output series containing '{series}' in a {self.series_df.shape} table to .{os.sep}{outfile_path}")
+                self.logger.info("Output series containing '%s' in a %s table to .%s%s", series, self.series_df.shape,
+                                 os.sep, outfile_path)
         else:
-            self.logger.warning(f"No series data to be output")
+            self.logger.warning("No series data to be output")
 
     def output_dim(self, dim_name=None):
         """
-        This function outputs all or some dimension tables to a .csv file in 'out'
+        This function outputs all or some dimension tables to a file in the output format in 'out'
 
         Args:
           dim_name: Dimension name as a string
         """
-        # output to csv file
+        # output to file
         if dim_name is None:
             for key in self.dim_dict.keys():
-                outfile_path = f"{self.outdir}dim_{key.lower()}.csv"
+                outfile_path = f"{self.outdir}dim_{key.lower()}{self.file_ext}"
                 if (self.dim_dict[key].shape[0] > 0) and (self.dim_dict[key].shape[1] > 0):
-                    self.dim_dict[key].to_csv(outfile_path, index=False)
-                    self.logger.info(f"Output dimension {key} in a {self.dim_dict[key].shape} table to {outfile_path}")
-                    self.logger.debug((f"key, self.dim_dict[key] {key, self.dim_dict[key]}"))
+                    self.write_df(self.dim_dict[key], outfile_path)
+                    self.logger.info("Output dimension %s in a %s table to %s", key, self.dim_dict[key].shape,
+                                     outfile_path)
+                    self.logger.debug("Dimension %s details:\n%s", key, self.dim_dict[key])
 
                 else:
-                    self.logger.warning(f"No dimension {key} data to be output.")
+                    self.logger.warning("No dimension %s data to be output.", key)
         else:
             key = dim_name
-            outfile_path = f"{self.outdir}dim_{key.lower()}.csv"
+            outfile_path = f"{self.outdir}dim_{key.lower()}{self.file_ext}"
             if (self.dim_dict[key].shape[0] > 0) and (self.dim_dict[key].shape[1] > 0):
-                self.dim_dict[key].to_csv(outfile_path, index=False)
-                self.logger.info(
-                    f"Output dimension {key} in a {self.dim_dict[key].shape} table to .{os.sep}{outfile_path}")
+                self.write_df(self.dim_dict[key], outfile_path)
+                self.logger.info("Output dimension %s in a %s table to .%s%s", key, self.dim_dict[key].shape, os.sep,
+                                 outfile_path)
             else:
-                self.logger.warning(f"No dimension {key} data to be output.")
+                self.logger.warning("No dimension %s data to be output.", key)
 
     def output_meta(self, indicator=None):
         """
-        Method to output all or some indicators in a tables to a .csv file in 'out'
+        Method to output all or some indicators in a tables to a file in the output format in 'out'
 
         Args:
           indicator: Indicator code as a string
         """
 
-        # output to csv file
+        # output to file
         if indicator is None:
-            outfile_path = f"{self.outdir}meta_{self.series.lower()}.csv"
+            outfile_path = f"{self.outdir}meta_{self.series.lower()}{self.file_ext}"
         else:
-            csv_filename, st_str = self.gen_data_filename(is_meta=True)
-            outfile_path = f"{self.outdir}{csv_filename}"
+            filename, st_str = self.gen_data_filename(is_meta=True)
+            outfile_path = f"{self.outdir}{filename}"
         if (self.meta_df.shape[0] > 0) and (self.meta_df.shape[1] > 0):
-            self.meta_df.to_csv(outfile_path, index=False)
+            self.write_df(self.meta_df, outfile_path)
             if indicator is None:
-                self.logger.info(
-                    f"Output meta data of {self.series} in a {self.meta_df.shape} table to .{os.sep}{outfile_path}")
+                self.logger.info("Output meta data of %s in a %s table to .%s%s", self.series, self.meta_df.shape,
+                                 os.sep, outfile_path)
             else:
-                self.logger.info(
-                    f"Output meta data of {self.series} with search search_terms {self.search_terms} in a {self.meta_df.shape} table to .{os.sep}{outfile_path}")
+                self.logger.info("Output meta data of %s with search search_terms %s in a %s table to .%s%s",
+                                 self.series, self.search_terms, self.meta_df.shape, os.sep, outfile_path)
         else:
-            self.logger.warning(f"No meta data to be output.")
+            self.logger.warning("No meta data to be output.")
 
     def output_data(self, is_gen_filename=False):
         """
-        This function outputs the data to a csv file.
+        This function outputs the data to a file in the output format.
 
         Args:
-          is_gen_filename: generate the csv file name from user inputs if `True`, defaults to `False`
+          is_gen_filename: generate the file name from user inputs if `True`, defaults to `False`
         """
-        # output to csv file
+        # output to file
         if not is_gen_filename:
-            outfile_path = f"{self.outdir}data_{self.series.lower()}.csv"
+            outfile_path = f"{self.outdir}data_{self.series.lower()}{self.file_ext}"
         else:
-            csvfilename, st_str = self.gen_data_filename()
-            outfile_path = f"{self.outdir}{csvfilename}"
+            filename, st_str = self.gen_data_filename()
+            outfile_path = f"{self.outdir}{filename}"
 
         if (self.data_df.shape[0] > 0) and (self.data_df.shape[1] > 0):
-            self.data_df.to_csv(outfile_path, index=False)
+            with self.metrics.time("output_sec"):
+                self.write_df(self.data_df, outfile_path)
             if not is_gen_filename:
-                self.logger.info(
-                    f"Output data of {self.series} in a {self.data_df.shape} table to .{os.sep}{outfile_path}")
+                self.logger.info("Output data of %s in a %s table to .%s%s", self.series, self.data_df.shape, os.sep,
+                                 outfile_path)
             else:
-                self.logger.info(
-                    f"Output data of {self.series} containing '{st_str}' in a {self.data_df.shape} table to .{os.sep}{outfile_path}")
+                self.logger.info("Output data of %s containing '%s' in a %s table to .%s%s", self.series, st_str,
+                                 self.data_df.shape, os.sep, outfile_path)
         else:
-            self.logger.warning(f"No data to be output.")
+            self.logger.warning("No data to be output.")
 
     def gen_data_filename(self, is_meta=False):
         """
@@ -267,11 +392,58 @@ class IMF(Series):
             time = f'_{self.start_time}_'
 
         if not is_meta:
-            csv_filename = f"data_{st_str}_{ctry_str}_{self.period}{time}"[:MAX_FILENAME_LEN]
+            filename = f"data_{st_str}_{ctry_str}_{self.period}{time}"[:MAX_FILENAME_LEN]
         else:
-            csv_filename = f"meta_{st_str}_{ctry_str}_{self.period}{time}"[:MAX_FILENAME_LEN]
-        csv_filename = f"{csv_filename}.csv"
-        return csv_filename, st_str
+            filename = f"meta_{st_str}_{ctry_str}_{self.period}{time}"[:MAX_FILENAME_LEN]
+        filename = f"{filename}{self.file_ext}"
+        return filename, st_str
+
+    @staticmethod
+    def is_pyarrow_available():
+        """
+        It checks whether the optional package `pyarrow`, needed for Parquet and Feather files, is installed.
+
+        Returns:
+          True if `pyarrow` can be imported.
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            return False
+        return True
+
+    def write_df(self, df, outfile_path):
+        """
+        It writes a dataframe to a file in the output format of the object, without its index.
+
+        Args:
+          df: Pandas dataframe to be written
+          outfile_path: path of the output file
+        """
+        if self.output_format == "parquet":
+            kwargs = {} if self.compression is None else {"compression": self.compression}
+            df.to_parquet(outfile_path, index=False, **kwargs)
+        elif self.output_format == "feather":
+            kwargs = {} if self.compression is None else {"compression": self.compression}
+            df.reset_index(drop=True).to_feather(outfile_path, **kwargs)
+        else:
+            df.to_csv(outfile_path, index=False)
+
+    def read_df(self, infile):
+        """
+        It reads a file written by `write_df` into a dataframe. Parquet and Feather files keep their column types.
+
+        Args:
+          infile: path of the input file
+
+        Returns:
+          A Pandas dataframe.
+        """
+        if self.output_format == "parquet":
+            return pd.read_parquet(infile)
+        elif self.output_format == "feather":
+            return pd.read_feather(infile)
+        return pd.read_csv(infile)
 
     # overriding abstract methods
     def get_series_names(self):
@@ -286,152 +458,158 @@ class IMF(Series):
         # searches through series:
         key = 'Dataflow'  # Method with series information
         search_terms = self.series  # search terms to find in series names
-        # define the URL we want to use, make a request to the IMF data server
-        json = self.repeat_request(url=f'{self.url}{key}')
-        # check if the request was successful
-        if json is not None:
+        def _parse_series(json):
             # found series names
             series_list = json['Structure']['Dataflows']['Dataflow']
             # normalize the JSON data
-            self.series_df = pd.json_normalize(series_list)
-            self.series_df = self.series_df.sort_values("KeyFamilyRef.KeyFamilyID")
-            self.series_df = self.clean_column_names(self.series_df)
+            series_df = pd.json_normalize(series_list)
+            series_df = series_df.sort_values("KeyFamilyRef.KeyFamilyID")
+            return self.clean_column_names(series_df)
+
+        # define the URL we want to use, make a request to the IMF data server
+        series_df = self.request_structure(url=f'{self.url}{key}', parse=_parse_series, series=None)
+        # check if the request was successful
+        if series_df is not None:
+            self.series_df = series_df
             # output the data to a CSV file
             self.output_series()
             is_output = True
         else:
-            infile = f"{self.outdir}series_{self.series.lower()}.csv"
-            self.series_df = pd.read_csv(infile)
-            self.logger.info(f"Read series names from historical data {infile}")
+            infile = f"{self.outdir}series_{self.series.lower()}{self.file_ext}"
+            self.series_df = self.read_df(infile)
+            self.logger.info("Read series names from historical data %s", infile)
             is_output = False
 
         # Filter the dataframe to only include the series names we want
-        self.series_df["search_found"] = False
-        string_columns = self.series_df.select_dtypes(include=object).columns
-        for col, search_term in itertools.product(string_columns, [search_terms]):
-            self.logger.debug(f"{col = }, {search_term = }")
-            self.series_df["search_found"] = self.series_df["search_found"] | self.series_df[
-                col].str.lower().str.contains(
-                search_term.lower())
-            self.logger.debug(self.series_df["search_found"].describe())
-        self.series_df = self.series_df[self.series_df["search_found"]]
-        self.series_df = self.series_df.drop(['search_found'], axis=1)
+        search_found = self.search_codelist(self.series_df, [search_terms],
+                                            url=f'{self.url}{key}' if is_output else None)
+        self.series_df = self.series_df[search_found]
         if self.series_df.shape[0] == 0:
-            self.logger.error(
-                f"Input search terms '{search_terms}' do not exist. See column 'KEYFAMILYREF.KEYFAMILYID' in '{self.outdir}series_imf.csv' for valid values.")
+            self.logger.error("Input search terms '%s' do not exist. See column 'KEYFAMILYREF.KEYFAMILYID' in "
+                              "'%sseries_imf%s' for valid values.", search_terms, self.outdir, self.file_ext)
             return None
         if is_output:
             # output the data to a CSV file
             self.output_series(series=self.series)
 
-        self.logger.debug(self.series_df.head())
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Series names:\n%s", self.series_df.head())
         return self.series_df
 
     def get_dimensions(self):
         """
-        It downloads the dimensions of the series, and then downloads the details of each dimension
+        It downloads the dimensions of the series. The details of each dimension are only downloaded the first time
+        they are looked up in `dim_dict`.
         """
 
         # finds the dimensions in the series. We need the indicators.
         key = f'DataStructure/{self.series}'  # DataStructure Method / series
-        json = self.repeat_request(url=f'{self.url}{key}')
-        if json is not None:
-            self.dimension_list = json['Structure']['KeyFamilies']['KeyFamily']['Components']['Dimension']
+        dimension_list = self.request_structure(
+            url=f'{self.url}{key}',
+            parse=lambda json: json['Structure']['KeyFamilies']['KeyFamily']['Components']['Dimension'])
+        if dimension_list is not None:
+            self.dimension_list = dimension_list
             self.dim_df = pd.json_normalize(self.dimension_list)
 
             # finds the indicators by the search words:
             for n, dimension in enumerate(self.dimension_list):
                 self.des_list.extend([n + 1])
                 self.id_list.extend([dimension['@codelist']])
-                self.logger.debug(f"Dimension {n + 1}: {dimension['@codelist']}")
+                self.logger.debug("Dimension %d: %s", n + 1, dimension['@codelist'])
             self.dim_meta_df = pd.DataFrame(list(zip(self.des_list, self.id_list)), columns=['Dimension', 'ID'])
             self.dim_meta_df = self.dim_meta_df.sort_values("Dimension")
 
             for n in range(0, len(self.dimension_list)):
-                is_output = True
-                try:
-                    dim_name = self.dimension_list[n]['@codelist']
-                    if 'INDICATOR' in dim_name:
-                        self._indicator_dim_position = n
-                    key = f"CodeList/{dim_name}"
-                    if dim_name[:7] in ["CL_FREQ"]:
-                        def _get_metadata(series='IFS'):
-                            """
-                            The function `_get_metadata` takes a single argument, `series`, which is a string that defaults to
-                            `'IFS'`. The function then uses the `repeat_request` function to make a request to the
-                            `GenericMetadata` endpoint of the API, and if the request is successful, it returns the
-                            `AttributeValueSet` of the `MetadataSet` of the `GenericMetadata` of the response
-
-                            Args:
-                              series: The data series you want to download. Defaults to `IFS`
-
-                            Returns:
-                              A list of dictionaries containing metadata.
-                            """
-                            key = f'GenericMetadata/{series}'
-                            json = self.repeat_request(url=f'{self.url}{key}')
-                            if json is not None:
-                                metadata = json['GenericMetadata']['MetadataSet']['AttributeValueSet']
-                            else:
-                                metadata = None
-                            return metadata
-
-                        def _extract_metadata(metadata, indicator='FREQ'):
-                            """
-                            Given an economic indicator name, the function takes in a list of dictionaries, and returns a dataframe with two columns, one for
-                            the valid values and one for the value description of the indicator.
-
-                            Args:
-                              metadata: the metadata dictinoary from the API call
-                              indicator: The indicator we want to get data for. Defaults to 'FREQ'.
-
-                            Returns:
-                              A dataframe with the value and description of the frequency of the data.
-                            """
-                            if metadata is None:
-                                return pd.DataFrame()
-
-                            des_list, value_list = [], []
-                            for i in range(len(metadata)):
-                                ind = metadata[i]['ReportedAttribute'][1]['@conceptID']
-                                if ind == indicator:
-                                    output = metadata[i]['ReportedAttribute'][1]['ReportedAttribute']
-                                    self.logger.debug(output[0]['Value']['#text'], ": ", output[2]['Value']['#text'])
-                                    des_list.extend([output[0]['Value']['#text']])
-                                    value_list.extend([output[2]['Value']['#text']])
-
-                            df = pd.DataFrame.from_dict({"Value": value_list, "Description": des_list})
-                            return df
-
-                        _metadata = _get_metadata(series=self.series)
-                        if dim_name[-4:].lower() != self.series.lower():
-                            dim_name = "_".join([dim_name, self.series])
-                        if _metadata is not None:
-                            code_df = _extract_metadata(metadata=_metadata, indicator='FREQ')
-                            code_df = self.clean_column_names(code_df)
-                            self.dim_dict[dim_name] = code_df
-                            self.logger.debug(f"Dimension {dim_name} details: \n{code_df}")
-                            self.output_dim(dim_name)
-                        else:
-                            self.logger.warning(f"Failed to download dimension, CL_FREQ.")
-                            self.read_dim_df(dim_name=dim_name)
-                    else:
-                        json = self.repeat_request(url=f'{self.url}{key}')
-                        if json is not None:
-                            code_list = json['Structure']['CodeLists']['CodeList']['Code']
-                            code_df = pd.json_normalize(code_list)
-                            code_df = self.clean_column_names(code_df)
-                            self.dim_dict[dim_name] = code_df
-                            self.logger.debug(f"Dimension {dim_name} details: \n{code_df}")
-                            self.output_dim(dim_name)
-                        else:
-                            self.logger.warning(f"Failed to download dimension {dim_name}.")
-                            self.read_dim_df(dim_name=dim_name)
-
-                except:
-                    pass
+                codelist = self.dimension_list[n]['@codelist']
+                if 'INDICATOR' in codelist:
+                    self._indicator_dim_position = n
+                dim_name = codelist
+                if dim_name[:7] in ["CL_FREQ"] and dim_name[-4:].lower() != self.series.lower():
+                    dim_name = "_".join([dim_name, self.series])
+                self.dim_dict.add_loader(dim_name, functools.partial(self.load_dim, codelist, dim_name))
         else:
-            self.logger.warning(f"Failed to download dimensions.")
+            self.logger.warning("Failed to download dimensions.")
+
+    def load_dim(self, codelist, dim_name=None):
+        """
+        It downloads the details of a dimension into `dim_dict` and outputs them to a csv file. The details of
+        the frequency dimension are taken from the generic metadata of the series.
+
+        Args:
+          codelist: name of the codelist of the dimension, e.g. 'CL_AREA_IFS'
+          dim_name: key of the dimension in `dim_dict`. Defaults to `codelist`.
+
+        Returns:
+          A Pandas dataframe with the details of the dimension, or `None` if they cannot be found.
+        """
+        dim_name = codelist if dim_name is None else dim_name
+        try:
+            if codelist[:7] in ["CL_FREQ"]:
+                def _get_metadata(series='IFS'):
+                    """
+                    The function `_get_metadata` takes a single argument, `series`, which is a string that defaults to
+                    `'IFS'`. The function then uses the `request_structure` function to make a request to the
+                    `GenericMetadata` endpoint of the API, and if the request is successful, it extracts the
+                    frequencies from the `AttributeValueSet` of the `MetadataSet` of the `GenericMetadata` of the
+                    response
+
+                    Args:
+                      series: The data series you want to download. Defaults to `IFS`
+
+                    Returns:
+                      A dataframe with the value and description of the frequency of the data.
+                    """
+                    key = f'GenericMetadata/{series}'
+                    return self.request_structure(
+                        url=f'{self.url}{key}',
+                        parse=lambda json: _extract_metadata(
+                            metadata=json['GenericMetadata']['MetadataSet']['AttributeValueSet'],
+                            indicator='FREQ'))
+
+                def _extract_metadata(metadata, indicator='FREQ'):
+                    """
+                    Given an economic indicator name, the function takes in a list of dictionaries, and returns a dataframe with two columns, one for
+                    the valid values and one for the value description of the indicator.
+
+                    Args:
+                      metadata: the metadata dictinoary from the API call
+                      indicator: The indicator we want to get data for. Defaults to 'FREQ'.
+
+                    Returns:
+                      A dataframe with the value and description of the frequency of the data.
+                    """
+                    if metadata is None:
+                        return pd.DataFrame()
+
+                    des_list, value_list = [], []
+                    for i in range(len(metadata)):
+                        ind = metadata[i]['ReportedAttribute'][1]['@conceptID']
+                        if ind == indicator:
+                            output = metadata[i]['ReportedAttribute'][1]['ReportedAttribute']
+                            self.logger.debug("%s: %s", output[0]['Value']['#text'], output[2]['Value']['#text'])
+                            des_list.extend([output[0]['Value']['#text']])
+                            value_list.extend([output[2]['Value']['#text']])
+
+                    df = pd.DataFrame.from_dict({"Value": value_list, "Description": des_list})
+                    return df
+
+                code_df = _get_metadata(series=self.series)
+                warning = f"Failed to download dimension, CL_FREQ."
+            else:
+                code_df = self.get_codelist(codelist)
+                warning = f"Failed to download dimension {dim_name}."
+
+            if code_df is not None:
+                code_df = self.clean_column_names(code_df)
+                self.dim_dict[dim_name] = code_df
+                self.logger.debug("Dimension %s details:\n%s", dim_name, code_df)
+                self.output_dim(dim_name)
+            else:
+                self.logger.warning(warning)
+                self.read_dim_df(dim_name=dim_name)
+        except:
+            pass
+        return self.dim_dict.get_loaded(dim_name)
 
     def download_meta(self):
         """
@@ -441,6 +619,7 @@ class IMF(Series):
           The meta data of the time series.
         """
 
+        codelist_df = None
         if len(self.dimension_list) == 0:
             self.read_meta_df()
         else:
@@ -452,52 +631,40 @@ class IMF(Series):
             dim_meta_df = pd.DataFrame(list(zip(self.des_list, self.id_list)), columns=['Dimension', 'ID'])
             dim_meta_df = dim_meta_df.sort_values("Dimension")
             dim_meta_df = self.clean_column_names(dim_meta_df)
-            self.logger.debug(dim_meta_df.head())
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Dimensions:\n%s", dim_meta_df.head())
 
-            # download  meta data
-            key = f"CodeList/{self.dimension_list[self._indicator_dim_position]['@codelist']}"
-            json = self.repeat_request(url=f'{self.url}{key}')
-            if json is not None:
-                code_list = json['Structure']['CodeLists']['CodeList']['Code']
-                self.meta_df = pd.json_normalize(code_list)
-                self.meta_df = self.clean_column_names(self.meta_df)
+            # download  meta data, reusing the indicator codelist from the dimensions
+            codelist_df = self.get_indicator_codelist()
+            if codelist_df is not None:
+                self.meta_df = codelist_df.copy()
                 self.output_meta()
             else:
                 self.read_meta_df()
 
         # finds the indicators by the search words
         if self.search_terms is not None:
-            key = f"CodeList/{self.dimension_list[self._indicator_dim_position]['@codelist']}"
-            json = self.repeat_request(url=f'{self.url}{key}')
-            if json is not None:
-                code_list = json['Structure']['CodeLists']['CodeList']['Code']
-                self.meta_df = pd.json_normalize(code_list)
-
-                self.meta_df["search_found"] = False
-                string_columns = self.meta_df.select_dtypes(include=object).columns
-                for col, search_term in itertools.product(string_columns, self.search_terms):
-                    self.logger.debug(f"{col = }, {search_term = }")
-                    self.meta_df["search_found"] = self.meta_df["search_found"] | \
-                                                   self.meta_df[col].str.lower().str.contains(search_term.lower())
-                    self.logger.debug(self.meta_df["search_found"].describe())
-                    self.logger.debug(self.meta_df[self.meta_df["search_found"]])
-                self.meta_df = self.meta_df[self.meta_df["search_found"]]
-                self.meta_df = self.meta_df.drop(['search_found'], axis=1)
+            if codelist_df is not None:
+                codelist = self.dimension_list[self._indicator_dim_position]['@codelist']
+                search_found = self.search_codelist(codelist_df, self.search_terms,
+                                                    url=f'{self.url}CodeList/{codelist}')
+                self.meta_df = codelist_df[search_found]
 
             else:
-                self.logger.warning(f"Failed to download meta data.")
+                self.logger.warning("Failed to download meta data.")
                 self.read_meta_df()
 
         if self.meta_df.shape[0] == 0:
-            self.logger.error(
-                f"User input search terms {self.search_terms} not found in {self.series}. Please see columns 'VALUE' or 'DESCRIPTION.TEXT' in {self.outdir}meta_{self.series}.csv for valid values.")
+            self.logger.error("User input search terms %s not found in %s. Please see columns 'VALUE' or "
+                              "'DESCRIPTION.TEXT' in %smeta_%s%s for valid values.", self.search_terms, self.series,
+                              self.outdir, self.series, self.file_ext)
             return None
 
         if "ID" not in self.meta_df.columns:
             self.meta_df.columns = ["ID", *list(self.meta_df.columns)[1:]]
         if "Description" not in self.meta_df.columns:
             self.meta_df.columns = [*list(self.meta_df.columns)[:-1], "Description"]
-        self.logger.debug(f"{self.meta_df.shape = }")
+        self.logger.debug("self.meta_df.shape = %s", self.meta_df.shape)
         self.meta_df = self.clean_column_names(self.meta_df)
 
         # deduplicate
@@ -507,13 +674,57 @@ class IMF(Series):
 
         return self.meta_df
 
+    def search_codelist(self, df, search_terms, url=None):
+        """
+        It finds the rows of a codelist whose text columns contain any of the search terms, ignoring case, with a
+        `CodelistIndex`. The index of a codelist downloaded from a url is kept in `registry` and reused by all `IMF`
+        objects until the structure metadata is refreshed.
+
+        Args:
+          df: Pandas dataframe of the codelist
+          search_terms: list of search terms, see `is_literal_search`
+          url: the url the codelist was downloaded from. Defaults to None to build an index that is not kept.
+
+        Returns:
+          A numpy boolean array with one element per row of `df`.
+        """
+        index = self.registry.get_index(url) if url is not None else None
+        if index is None or not index.matches(df):
+            index = CodelistIndex(df)
+            if url is not None:
+                self.registry.put_index(url, index)
+        search_found = index.search(search_terms, is_literal=self.is_literal_search)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Found %d of %d rows for search_terms = %r", search_found.sum(), len(search_found),
+                              search_terms)
+        return search_found
+
+    def get_indicator_codelist(self):
+        """
+        It gets the codelist of the indicator dimension from `dim_dict`, where `get_dimensions` keeps it, and only
+        downloads it if it is not there.
+
+        Returns:
+          A Pandas dataframe with the cleaned column names, or `None` if it cannot be downloaded.
+        """
+        dim_name = self.dimension_list[self._indicator_dim_position]['@codelist']
+        code_df = self.dim_dict.get(dim_name)
+        if code_df is None:
+            code_df = self.get_codelist(dim_name)
+            if code_df is None:
+                return None
+            code_df = self.clean_column_names(code_df)
+            self.dim_dict[dim_name] = code_df
+        return code_df
+
     def read_meta_df(self):
         """
-        The function reads a csv file into a Pandas dataframe, renames the columns, and then cleans the column names.
+        The function reads a meta data file in the output format into a Pandas dataframe, renames the columns, and then
+        cleans the column names.
 
         """
-        infile = f"{self.outdir}meta_{self.series.lower()}.csv"
-        self.meta_df = pd.read_csv(infile)
+        infile = f"{self.outdir}meta_{self.series.lower()}{self.file_ext}"
+        self.meta_df = self.read_df(infile)
         self.meta_df = self.meta_df.rename(
             columns={
                 '@value': 'ID',
@@ -521,30 +732,99 @@ class IMF(Series):
             }
         )
         self.meta_df = self.clean_column_names(self.meta_df)
-        self.logger.info(f"Read meta information from historical data {infile}")
+        self.logger.info("Read meta information from historical data %s", infile)
 
     def read_dim_df(self, dim_name="CL_FREQ"):
         """
-        The function reads a csv file with dimension data into a Pandas dataframe.
+        The function reads a file in the output format with dimension data into a Pandas dataframe.
 
         Args:
             dim_name: name of dimension
         """
-        infile = f"{self.outdir}dim_{dim_name.lower()}.csv"
+        infile = f"{self.outdir}dim_{dim_name.lower()}{self.file_ext}"
         if path.exists(infile):
-            self.dim_dict[dim_name] = pd.read_csv(infile)
-            self.logger.info(f"Read dimension information from historical data {infile}")
+            self.dim_dict[dim_name] = self.read_df(infile)
+            self.logger.info("Read dimension information from historical data %s", infile)
         else:
             self.dim_dict[dim_name] = None
 
     # overriding abstract method
     def download_data(self):
         """
-        It downloads data and its meta data from the IMF web server, and saves it to a csv file.
+        It downloads data and its meta data from the IMF web server, and saves it to a file. The `metrics` of the
+        object are reset first, so that they count this download only; the process-wide metrics keep counting.
 
         Returns:
           The data is being returned as a pandas dataframe.
         """
+        self.metrics.reset()
+        self.metrics.inc("downloads")
+        with self.metrics.time("download_sec"):
+            try:
+                indicators = self.prepare_download()
+                if indicators is None:
+                    return None
+
+                self.data_df = pd.DataFrame()
+                if self.store is not None and self.countries[0] != '':
+                    if self.jobdir is not None:
+                        # the store already keeps each downloaded chunk, so that an interrupted download resumes
+                        self.logger.warning("The download of %s is not journaled in %s since it uses the store %s, "
+                                            "which resumes interrupted downloads itself.", self.series, self.jobdir,
+                                            self.store.root)
+                    return self.merge_data(self.download_from_store(indicators))
+
+                stored_df, last_periods = self.read_stored_data()
+                groups = [(self.countries, indicators)]
+                self.journal = self.open_journal(indicators)
+                if self.journal is not None:
+                    # resume the job of the same query, downloading only the chunks that are not completed
+                    groups = self.journal.pending_groups(self.countries, indicators)
+                temp = self.download_planned(groups, last_periods, journal=self.journal)
+
+                self.data_df = self.merge_data(temp, stored_df=stored_df)
+                if self.journal is not None:
+                    failed = self.journal.failed()
+                    if len(failed) == 0:
+                        self.journal.finish()
+                    else:
+                        self.logger.warning("Failed to download %d chunks of %s. Run the same query again to retry "
+                                            "them, see the journal %s", len(failed), self.series, self.journal.path)
+                return self.data_df
+            finally:
+                self.stop_deadline()
+
+    def open_journal(self, indicators):
+        """
+        It opens the journal of the download job of the current query in `jobdir`, see `JobJournal`.
+
+        Args:
+          indicators: list of indicator codes to download
+
+        Returns:
+          The `JobJournal` object, or `None` if `jobdir` is not set.
+        """
+        if self.jobdir is None:
+            return None
+        query = {"url": self.url, "series": self.get_store_series(), "period": self.period,
+                 "countries": list(self.countries), "indicators": list(indicators), "start_time": self.start_time,
+                 "end_time": self.end_time, "is_incremental": self.is_incremental}
+        journal = JobJournal(self.jobdir, query, file_format=self.output_format, compression=self.compression)
+        n_done = len(journal.done_cells())
+        if n_done > 0:
+            self.logger.info("Resume the job %s of %s with %d of %d indicators and countries completed.",
+                             journal.job_id, self.series, n_done, len(self.countries) * len(indicators))
+        return journal
+
+    def prepare_download(self):
+        """
+        It starts the deadline of the download, downloads the series names, the dimensions and the meta data needed
+        to download data, and validates the inputs.
+
+        Returns:
+          The list of indicator codes to download, or `None` if the series or the search terms are not found.
+        """
+        self.start_deadline()
         if self.get_series_names() is None:
             return None
 
@@ -554,133 +834,654 @@ class IMF(Series):
         self.meta_df = self.download_meta()
         if self.meta_df is None:
             return None
+        return list(self.meta_df["ID"].values)
+
+    def gen_data_url(self, cont, indicators, start_time):
+        """
+        It generates the url of a CompactData request.
+
+        Args:
+          cont: ISO-2 codes of the countries joined by '+', or '' for all countries
+          indicators: list of indicator codes
+          start_time: first year to download, or `None` for the earliest period
 
+        Returns:
+          The url.
+        """
         base = f'{self.url}CompactData/{self.series}/'
-        time = ''
-        if self.start_time is not None and self.end_time is not None:
-            time = f'.?startPeriod={self.start_time}&endPeriod={self.end_time}'
-        if self.start_time is None and self.end_time is not None:
-            time = f'.?endPeriod={self.end_time}'
-        if self.start_time is not None and self.end_time is None:
-            time = f'.?startPeriod={self.start_time}'
+        time = self.gen_time_query(start_time, self.end_time)
+        return f"{base}{self.period}.{cont}{'.' * (self._indicator_dim_position - 1)}{'+'.join(indicators)}{time}"
 
-        self.data_df = pd.DataFrame()
-        # sometimes a big list of country codes results in an error, try splitting it into 2 lists and running this and next cell twice.
-        dcn_sa = list(self.meta_df["ID"].values)
-        temp = pd.DataFrame()
+    def iter_data(self):
+        """
+        It downloads data like `download_data`, but yields the observations of each chunk as soon as it arrives,
+        merged with the meta data and with cleaned column names, see `normalize_data`. Only a few chunks are held in
+        memory at a time, so that bulk downloads do not need memory for the whole data. The chunks are neither saved
+        nor deduplicated or sorted across chunks. In an incremental refresh, chunks start from the last stored periods.
+        With `is_compact_dtypes`, the categorical codes of all chunks have the same categories, see `gen_categories`,
+        so that the chunks can be concatenated or written to part files with the same types.
 
-        if self.countries[0] == '':
-            dcn_sa_list = [dcn_sa[x:x + 1] for x in range(0, len(dcn_sa), 1)]
-        else:
-            dcn_sa_list = [dcn_sa[x:x + self._max_indicators] for x in range(0, len(dcn_sa), self._max_indicators)]
+        Returns:
+          A generator of Pandas dataframes.
+        """
+        self.metrics.reset()
+        self.metrics.inc("downloads")
+        start = tm.perf_counter()
+        try:
+            indicators = self.prepare_download()
+            if indicators is None:
+                return
+            if self.is_compact_dtypes:
+                self._categories = self.gen_categories(indicators)
+            _, last_periods = self.read_stored_data()
+            for _, _, _, df in self.iter_planned([(self.countries, indicators)], last_periods):
+                if df.shape[0] > 0:
+                    df = self.normalize_data(df)
+                    # the time the consumer spends on a chunk is not counted in download_sec
+                    self.metrics.inc("download_sec", tm.perf_counter() - start)
+                    start = None
+                    yield df
+                    start = tm.perf_counter()
+        finally:
+            if start is not None:
+                self.metrics.inc("download_sec", tm.perf_counter() - start)
+            self._categories = None
+            self.stop_deadline()
+
+    def gen_categories(self, indicators):
+        """
+        It generates the categories of the codes of a download chunk by chunk with compact types, which are the same
+        for all chunks: the indicators, the countries of the codelist of the series, or the requested countries if it
+        is not loaded, and the frequency. Codes missing in them, if any, are added to the categories of their chunk.
 
-        for cont, indicators in itertools.product(self.countries, dcn_sa_list):
-            self.logger.debug("Current country", cont)
-            url = f"{base}{self.period}.{cont}{'.' * (self._indicator_dim_position - 1)}{'+'.join(indicators)}{time}"
-            # logger.info(f"URL is {url}")
+        Args:
+          indicators: list of indicator codes to download
 
-            # url = f"{base}{period}..{'+'.join(indicators)}.{time}"
-            self.logger.debug(f"{url = }")
-            json = self.repeat_request(url)
-            if json is not None:
+        Returns:
+          A dictionary from column name, before `clean_column_names`, to a sorted list of categories.
+        """
+        countries = set(c for c in self.countries if c != '')
+        area_df = self.dim_dict.get_loaded(f"CL_AREA_{self.series.upper()}")
+        if area_df is not None:
+            countries |= set(area_df["VALUE"].dropna())
+        return {"ID": sorted(set(indicators) | set(self.meta_df["ID"].dropna())), "Country": sorted(countries),
+                "@FREQ": [self.period]}
+
+    def sink_data(self, sinkdir=None):
+        """
+        It downloads data chunk by chunk with `iter_data` and appends each chunk to the disk as a part file in the
+        output format, so that the memory needed is bounded by the size of a chunk. Parts of an earlier run in the
+        same directory are removed first. Use `read_parts` to read the parts back.
+
+        Args:
+          sinkdir: the directory of the part files. Defaults to None for a directory in `outdir` named after the
+                   data file of `gen_data_filename`.
+
+        Returns:
+          The directory of the part files.
+        """
+        if sinkdir is None:
+            filename, _ = self.gen_data_filename()
+            sinkdir = f"{self.outdir}{path.splitext(filename)[0]}"
+        os.makedirs(sinkdir, exist_ok=True)
+        # remove the parts of an earlier run
+        for f in os.listdir(sinkdir):
+            if f.startswith("part-") and f.endswith(self.file_ext):
+                os.remove(path.join(sinkdir, f))
+        n_parts, n_rows = 0, 0
+        for df in self.iter_data():
+            self.write_df(df, path.join(sinkdir, f"part-{n_parts:05d}{self.file_ext}"))
+            n_parts += 1
+            n_rows += df.shape[0]
+        self.logger.info("Output data of %s in %d parts of %d rows in total to %s", self.series, n_parts, n_rows,
+                         sinkdir)
+        return sinkdir
+
+    def read_parts(self, sinkdir):
+        """
+        It reads the part files written by `sink_data` into a single dataframe.
+
+        Args:
+          sinkdir: the directory of the part files
+
+        Returns:
+          A Pandas dataframe, empty if there are no parts.
+        """
+        files = sorted(f for f in os.listdir(sinkdir) if f.startswith("part-") and f.endswith(self.file_ext))
+        frames = [self.read_df(path.join(sinkdir, f)) for f in files]
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=0, ignore_index=True)
+
+    def download_all(self, periods=None, storedir=None):
+        """
+        It mirrors all indicators of the series for all countries into the data store with as few CompactData requests
+        as possible. Each request asks for all indicators of a group of countries with a wildcard in the indicator
+        dimension, and the groups are packed and split by `planner`. The store records each country as soon as its
+        request is done, so that an interrupted mirror resumes where it stopped: countries already in the store for
+        the requested years are skipped. The years are restricted by `start_date` and `end_date`.
+
+        Args:
+          periods: list of frequency codes to download, e.g. ['A', 'Q']. Defaults to None for all frequencies of the
+                   series.
+          storedir: the directory of the store if the object has none. Defaults to None for a 'store' directory in
+                    `outdir`.
+
+        Returns:
+          A Pandas dataframe with the number of observations of each frequency and country downloaded in this run and
+          their status, 'downloaded', 'skipped' or 'failed', or `None` if the series is not found.
+        """
+        self.metrics.reset()
+        self.metrics.inc("downloads")
+        with self.metrics.time("download_sec"):
+            self.start_deadline()
+            try:
+                if self.get_series_names() is None:
+                    return None
+                self.get_dimensions()
+                self.validate_inputs()
+                if self.store is None:
+                    storedir = storedir if storedir is not None else f"{self.outdir}store"
+                    self.store = DataStore(storedir, file_format=self.output_format, compression=self.compression)
+
+                area_key, freq_key = f"CL_AREA_{self.series.upper()}", f"CL_FREQ_{self.series.upper()}"
+                if area_key not in self.dim_dict.keys() or self.dim_dict[area_key] is None:
+                    self.logger.error("Failed to download the countries of %s in %s.", self.series, area_key)
+                    return None
+                countries = list(self.dim_dict[area_key]["VALUE"].values)
+                if periods is None:
+                    if freq_key in self.dim_dict.keys() and self.dim_dict[freq_key] is not None:
+                        periods = list(self.dim_dict[freq_key]["VALUE"].values)
+                    else:
+                        periods = [self.period]
+
+                series, period = self.get_store_series(), self.period
+                rows = []
                 try:
-                    response = json
-                    series = response['CompactData']['DataSet']['Series']
-                    temp_df = pd.DataFrame()
-                    if isinstance(series, dict):
-                        if isinstance(series.get("Obs"), list):
-                            temp_df = pd.concat([temp_df, pd.json_normalize(series.get("Obs"))])
-                        for k in series.keys():
-                            if k != "Obs":
-                                temp_df[k] = series.get(k)
-
-                        if temp_df.shape[0] > 0:
-                            temp_df = temp_df.rename(
-                                columns={
-                                    '@OBS_VALUE': 'Value',
-                                    '@INDICATOR': 'ID',
-                                    '@INDICATOR_CODE': 'ID',
-                                    '@REF_AREA': 'Country'
-                                }
-                            )
-                            temp_df['Period'] = pd.to_datetime(
-                                [row.replace('-', '') for row in temp_df['@TIME_PERIOD']]
-                            )
-                            temp_df.drop('@TIME_PERIOD', axis=1, inplace=True)
-
-                            temp = pd.concat([temp, temp_df], axis=0)
-                    elif isinstance(series, list):
-                        series_len = len(series)
-                        for n in range(0, series_len):
-                            temp_dic = series[n].get('Obs')
-
-                            temp_df = pd.DataFrame.from_dict(
-                                temp_dic
-                            ).rename(
-                                columns={
-                                    '@OBS_VALUE': 'Value',
-                                    '@OBS_STATUS': 'Status'
-                                }
-                            )
-
-                            for k in series[n].keys():
-                                if k != "Obs":
-                                    temp_df[k] = series[n].get(k)
-
-                            if temp_df.shape[0] > 0:
-                                temp_df = temp_df.rename(
-                                    columns={
-                                        '@OBS_VALUE': 'Value',
-                                        '@INDICATOR': 'ID',
-                                        '@REF_SECTOR': 'ID',  # for GFSR
-                                        '@REF_AREA': 'Country'
-                                    }
-                                )
-                                temp_df['Period'] = pd.to_datetime(
-                                    [row.replace('-', '') for row in temp_df['@TIME_PERIOD']]
-                                )
-                                temp_df.drop('@TIME_PERIOD', axis=1, inplace=True)
-
-                                temp = pd.concat([temp, temp_df], axis=0)
-                except:
-                    self.logger.warning(f"Request for IMF data failed for area code, {cont}: {url = }.")
-                    pass
-
-        is_output = True
+                    for freq in periods:
+                        self.period = freq
+                        todo = [cont for cont in countries if len(self.store.missing(
+                            series, freq, cont, ['*'], self.start_time, self.end_time)) > 0]
+                        rows.extend((freq, cont, 0, "skipped") for cont in countries if cont not in todo)
+                        self.logger.info("Mirror %d of %d countries of %s with frequency %s to the store %s.",
+                                         len(todo), len(countries), series, freq, self.store.root)
+                        done = set()
+                        for chunk_countries, _, start_time, df in self.iter_planned([(todo, [''])], {}):
+                            for cont in chunk_countries:
+                                cont_df = df[df["Country"] == cont] if df.shape[0] > 0 else df
+                                self.store.put(cont_df, series, freq, cont, ['*'], start_time, self.end_time)
+                                rows.append((freq, cont, cont_df.shape[0], "downloaded"))
+                                done.add(cont)
+                        rows.extend((freq, cont, 0, "failed") for cont in todo if cont not in done)
+                finally:
+                    self.period = period
+
+                summary_df = pd.DataFrame(rows, columns=["PERIOD", "COUNTRY", "OBSERVATIONS", "STATUS"])
+                if self.logger.isEnabledFor(logging.INFO):
+                    self.logger.info("Mirrored %d observations of %s: %s", summary_df['OBSERVATIONS'].sum(), series,
+                                     summary_df['STATUS'].value_counts().to_dict())
+                return summary_df
+            finally:
+                self.stop_deadline()
+
+    def download_planned(self, groups, last_periods, journal=None):
+        """
+        It downloads groups of countries and indicators in chunks planned by `planner`, see `iter_planned`, and
+        concatenates the observations of all chunks once, so that the run time grows linearly with the number of
+        chunks. The chunks completed by an earlier run of the job in `journal` come first.
+
+        Args:
+          groups: list of tuples of a list of countries and a list of indicators to download
+          last_periods: dictionary from (indicator, country) to the last stored period, see `get_start_time`
+          journal: a `JobJournal` object that records the chunks. Defaults to None.
+
+        Returns:
+          A Pandas dataframe with the observations of all chunks.
+        """
+        frames = [] if journal is None else [journal.read_results()]
+        frames.extend(df for _, _, _, df in self.iter_planned(groups, last_periods, journal=journal))
+        frames = [df for df in frames if df.shape[0] > 0]
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=0)
+
+    def iter_planned(self, groups, last_periods, journal=None):
+        """
+        It downloads groups of countries and indicators in chunks planned by `planner`, see `ChunkPlanner.plan`, and
+        yields the chunks as they arrive. Chunks whose requests fail are split and downloaded again, and the chunk
+        sizes that work are recorded for the series. Chunks of a single country and indicator that still fail are
+        logged, and recorded in `journal` if given.
+
+        Args:
+          groups: list of tuples of a list of countries and a list of indicators to download
+          last_periods: dictionary from (indicator, country) to the last stored period, see `get_start_time`
+          journal: a `JobJournal` object that records the completed and failed chunks. Defaults to None.
+
+        Returns:
+          A generator of tuples of the countries, the indicators, the first year and the Pandas dataframe of the
+          observations of each downloaded chunk.
+        """
+        series = self.get_store_series()
+        base_len = len(self.gen_data_url('', [], '0000'))
+        self._chunk_errors.clear()
+        pending = []
+        for countries, indicators in groups:
+            pending.extend(self.planner.plan(series, countries, indicators, base_len=base_len))
+
+        while len(pending) > 0:
+            start_times = [self.get_start_time(countries, indicators, last_periods) for countries, indicators in pending]
+            chunks = [('+'.join(countries), self.gen_data_url('+'.join(countries), indicators, start_time))
+                      for (countries, indicators), start_time in zip(pending, start_times)]
+            self.logger.info("Download %d chunks of %s.", len(chunks), series)
+            split = []
+            for (countries, indicators), start_time, (_, url), df in zip(pending, start_times, chunks,
+                                                                        self.iter_chunks(chunks)):
+                if df is not None:
+                    self.planner.record_success(series, countries, indicators)
+                    if journal is not None:
+                        journal.record_done(countries, indicators, start_time, self.end_time, df, url=url)
+                    yield countries, indicators, start_time, df
+                    continue
+                error, kind = self._chunk_errors.pop(url, ("No valid response", None))
+                if self.is_deadline_exceeded():
+                    # chunks that failed at the deadline are not split, their requests would not be sent either
+                    error, halves = "Deadline of the download exceeded", []
+                else:
+                    halves = self.planner.record_failure(series, countries, indicators, kind=kind)
+                if len(halves) > 0:
+                    self.logger.info("Split the failed chunk of %d countries and %d indicators of %s in two.",
+                                     len(countries), len(indicators), series)
+                else:
+                    self.logger.warning("Failed to download %s of %s in %s: %s", indicators[0], countries[0], series,
+                                        error)
+                    if journal is not None:
+                        journal.record_failed(countries, indicators, start_time, self.end_time, error, url=url)
+                split.extend(halves)
+            pending = split
+
+    @staticmethod
+    def gen_time_query(start_time=None, end_time=None):
+        """
+        It generates the part of a CompactData url that restricts the time periods.
+
+        Args:
+          start_time: first year to download, or `None` for the earliest period
+          end_time: last year to download, or `None` for the latest period
+
+        Returns:
+          The query string, empty if both years are `None`.
+        """
+        time = ''
+        if start_time is not None and end_time is not None:
+            time = f'.?startPeriod={start_time}&endPeriod={end_time}'
+        if start_time is None and end_time is not None:
+            time = f'.?endPeriod={end_time}'
+        if start_time is not None and end_time is None:
+            time = f'.?startPeriod={start_time}'
+        return time
+
+    def read_stored_data(self):
+        """
+        It reads the data saved by an earlier run with the same inputs for an incremental refresh, and finds the last
+        stored period of each indicator and country.
+
+        Returns:
+          The stored data as a Pandas dataframe and a dictionary from (indicator, country) to the last stored period
+          as a timestamp, or `None` and an empty dictionary if the refresh is not incremental or nothing is stored.
+        """
+        if not self.is_incremental:
+            return None, {}
+        filename, _ = self.gen_data_filename()
+        infile = f"{self.outdir}{filename}"
+        if not path.exists(infile):
+            self.logger.info("No stored data in %s. Download the full history.", infile)
+            return None, {}
+        stored_df = self.read_df(infile)
+        if not {"ID", "COUNTRY", "PERIOD"} <= set(stored_df.columns):
+            self.logger.warning("Stored data in %s has no columns ID, COUNTRY and PERIOD. Download the full history.",
+                                infile)
+            return None, {}
+
+        period = stored_df["PERIOD"]
+        period = period.dt.to_timestamp() if isinstance(period.dtype, pd.PeriodDtype) else pd.to_datetime(period)
+        last_periods = period.groupby([stored_df["ID"].astype(str), stored_df["COUNTRY"].astype(str)]).max()
+        self.logger.info("Read %d stored observations of %d indicators and countries from %s", stored_df.shape[0],
+                         len(last_periods), infile)
+        return stored_df, last_periods.to_dict()
+
+    def get_start_time(self, countries, indicators, last_periods):
+        """
+        It finds the first year to download for a chunk of indicators and countries. In an incremental refresh, it is
+        the year of the earliest last stored period of the indicators, minus `lookback_periods` periods.
+
+        Args:
+          countries: list of ISO-2 codes of the countries
+          indicators: list of indicator codes
+          last_periods: dictionary from (indicator, country) to the last stored period, see `read_stored_data`
+
+        Returns:
+          The first year to download, or `start_time` if any of the indicators has not been stored.
+        """
+        lasts = [last_periods.get((ind, cont)) for cont in countries for ind in indicators]
+        if len(lasts) == 0 or any(last is None for last in lasts):
+            return self.start_time
+        first = min(lasts).to_period(PERIOD_FREQ.get(self.period, 'Y')) - self.lookback_periods
+        if self.start_time is not None and first.year < int(self.start_time):
+            return self.start_time
+        return str(first.year)
+
+    def get_store_series(self):
+        """
+        It returns the name of the series in the data store.
+
+        Returns:
+          The series code.
+        """
+        return self.series
+
+    def download_from_store(self, indicators):
+        """
+        It downloads the indicators of all countries that are missing in the data store for the requested years,
+        saves them in the store, and reads all requested observations from the store. In an incremental refresh, all
+        indicators are downloaded from their last stored period, see `get_start_time`.
+
+        Args:
+          indicators: list of indicator codes
+
+        Returns:
+          A Pandas dataframe with the requested observations.
+        """
+        series = self.get_store_series()
+        last_periods = {}
+        if self.is_incremental:
+            last_periods = self.store.last_periods(series, self.period, self.countries)
+
+        # countries missing the same indicators are downloaded together
+        groups = {}
+        for cont in self.countries:
+            if self.is_incremental:
+                missing = indicators
+            else:
+                missing = self.store.missing(series, self.period, cont, indicators, self.start_time, self.end_time)
+            if len(missing) > 0:
+                groups.setdefault(tuple(missing), []).append(cont)
+        n_missing = sum(len(missing) * len(countries) for missing, countries in groups.items())
+        self.logger.info("Download %d of %d indicators and countries missing in the store %s.", n_missing,
+                         len(indicators) * len(self.countries), self.store.root)
+
+        groups = [(countries, list(missing)) for missing, countries in groups.items()]
+        for countries, batch, start_time, df in self.iter_planned(groups, last_periods):
+            for cont in countries:
+                cont_df = df[df["Country"] == cont] if df.shape[0] > 0 else df
+                self.store.put(cont_df, series, self.period, cont, batch, start_time, self.end_time)
+        return self.store.get(series, self.period, self.countries, indicators, self.start_time, self.end_time)
+
+    def merge_data(self, temp, stored_df=None):
+        """
+        It merges downloaded observations with the meta data, deduplicates and sorts them, and saves them to a file in
+        the output format. If nothing has been downloaded, it falls back to historical data saved by an earlier run.
+
+        Args:
+          temp: Pandas dataframe of the downloaded observations
+          stored_df: Pandas dataframe of the data saved by an earlier run, into which the observations are upserted
+                     in an incremental refresh. Defaults to None.
+
+        Returns:
+          The data as a Pandas dataframe.
+        """
         if temp.shape[0] == 0:
-            csv_filename, _ = self.gen_data_filename()
-            outfile_path = f"{self.outdir}{csv_filename}"
+            filename, _ = self.gen_data_filename()
+            outfile_path = f"{self.outdir}{filename}"
             if path.exists(outfile_path):
-                temp = pd.read_csv(outfile_path)
-                self.logger.warning(f"Read data from historical file {outfile_path}")
-                if "Description" in temp.columns:
-                    temp = temp.drop(['Description'], axis=1)
-                is_output = False
+                # the historical file has already been merged, sorted and cleaned
+                self.data_df = self.read_df(outfile_path)
+                self.logger.warning("Read data from historical file %s", outfile_path)
+                return self.data_df
             else:
-                self.logger.warning(f"No data has been downloaded.")
+                self.logger.warning("No data has been downloaded.")
                 return pd.DataFrame()
 
-        self.data_df = pd.concat([temp, self.data_df], axis=0)
-        self.data_df = pd.merge(self.data_df, self.meta_df, on="ID", how="left")
-
-        # deduplicate
-        self.data_df = self.data_df.drop_duplicates(keep='last')
-
-        # sorting
-        self.data_df.sort_values(by=["ID", "Country", 'Period'], axis=0, inplace=True)
-        self.logger.debug(f"data_df.shape = {self.data_df.shape}")
+        self.data_df = self.normalize_data(pd.concat([temp, self.data_df], axis=0))
 
-        # remove special characters in column names
-        self.data_df = self.clean_column_names(self.data_df)
+        if stored_df is not None:
+            self.data_df = self.upsert_data(stored_df, self.data_df)
 
         # reset index
         self.data_df.reset_index(drop=True,  inplace=True)
 
-        if is_output:
-            self.output_data(is_gen_filename=True)
+        self.output_data(is_gen_filename=True)
 
         return self.data_df
 
+    def normalize_data(self, data_df):
+        """
+        It merges downloaded observations with the meta data, deduplicates and sorts them, and cleans the column
+        names. The observations are converted to compact types first if `is_compact_dtypes` is True.
+
+        Args:
+          data_df: Pandas dataframe of the observations, as returned by `parse_compact_data`
+
+        Returns:
+          The normalized data as a Pandas dataframe.
+        """
+        meta_df = self.meta_df
+        if self.is_compact_dtypes:
+            data_df, meta_df = self.compact_data_types(data_df, meta_df)
+
+        start = tm.perf_counter()
+        with self.metrics.time("merge_sec"):
+            data_df = pd.merge(data_df, meta_df, on="ID", how="left")
+
+            # deduplicate
+            data_df = data_df.drop_duplicates(keep='last')
+
+            # sorting
+            data_df.sort_values(by=["ID", "Country", 'Period'], axis=0, inplace=True)
+        self.logger.debug("data_df.shape = %s", data_df.shape)
+        if self.is_compact_dtypes:
+            self.logger.info("Merged, deduplicated and sorted typed data in %.3f s.", tm.perf_counter() - start)
+
+        # remove special characters in column names
+        return self.clean_column_names(data_df)
+
+    def upsert_data(self, stored_df, new_df):
+        """
+        It inserts new observations into stored data, replacing stored observations of the same indicator, country
+        and period, e.g. revised values. The stored columns are converted to the types of the new data first.
+
+        Args:
+          stored_df: Pandas dataframe of the stored data
+          new_df: Pandas dataframe of the new observations, merged with the meta data and with cleaned column names
+
+        Returns:
+          The updated data as a Pandas dataframe, sorted by indicator, country and period.
+        """
+        stored_df = stored_df.copy()
+        for col in stored_df.columns.intersection(new_df.columns):
+            dtype = new_df[col].dtype
+            if stored_df[col].dtype == dtype or isinstance(dtype, pd.CategoricalDtype):
+                continue
+            if isinstance(dtype, pd.PeriodDtype):
+                stored_df[col] = pd.to_datetime(stored_df[col].astype(str)).dt.to_period(dtype.freq)
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                stored_df[col] = pd.to_datetime(stored_df[col])
+            elif pd.api.types.is_numeric_dtype(dtype):
+                stored_df[col] = pd.to_numeric(stored_df[col], errors="coerce").astype(dtype)
+            else:
+                stored_df[col] = stored_df[col].where(stored_df[col].isna(), stored_df[col].astype(str))
+
+        data_df = pd.concat([stored_df, new_df], axis=0, ignore_index=True)
+        for col in new_df.columns:
+            if isinstance(new_df[col].dtype, pd.CategoricalDtype) and not isinstance(data_df[col].dtype,
+                                                                                     pd.CategoricalDtype):
+                data_df[col] = data_df[col].astype("category")
+        data_df = data_df.drop_duplicates(subset=["ID", "COUNTRY", "PERIOD"], keep='last')
+        data_df = data_df.sort_values(by=["ID", "COUNTRY", "PERIOD"], axis=0)
+        self.logger.info("Upserted %d new or revised observations into %d stored observations.", new_df.shape[0],
+                         stored_df.shape[0])
+        return data_df
+
+    def compact_data_types(self, data_df, meta_df):
+        """
+        It converts downloaded observations to compact types: float64 values, integer unit multipliers, categorical
+        codes and a period dtype of the frequency of the series. It logs the memory saved. If the logger is at the
+        DEBUG level, it also times the merge and sort of the untyped data for comparison. In `iter_data`, the codes
+        get the categories of the whole download, see `gen_categories`, and other strings, whose categories are not
+        known before all chunks are downloaded, are kept as strings.
+
+        Args:
+          data_df: Pandas dataframe of the observations, before the merge with the meta data
+          meta_df: Pandas dataframe of the meta data
+
+        Returns:
+          The typed observations and a copy of the meta data whose 'ID' column has the same categories.
+        """
+        mem_before = data_df.memory_usage(deep=True).sum()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            start = tm.perf_counter()
+            untyped_df = pd.merge(data_df, meta_df, on="ID", how="left").drop_duplicates(keep='last')
+            untyped_df.sort_values(by=["ID", "Country", 'Period'], axis=0, inplace=True)
+            self.logger.debug("Merged, deduplicated and sorted untyped data in %.3f s.", tm.perf_counter() - start)
+
+        data_df = data_df.copy()
+        for col in data_df.columns:
+            if col == "Value":
+                data_df[col] = pd.to_numeric(data_df[col], errors="coerce").astype("float64")
+            elif col.upper().endswith("UNIT_MULT"):
+                data_df[col] = pd.to_numeric(data_df[col], errors="coerce").astype("Int64")
+            elif col == "Period":
+                freq = PERIOD_FREQ.get(str(self.period).upper())
+                periods = pd.to_datetime(data_df[col])
+                data_df[col] = periods.dt.to_period(freq) if freq is not None else periods
+            elif col != "ID" and self._categories is not None:
+                if col in self._categories:
+                    categories = set(self._categories[col]) | set(data_df[col].dropna())
+                    data_df[col] = data_df[col].astype(pd.CategoricalDtype(sorted(categories)))
+            elif col != "ID" and not pd.api.types.is_numeric_dtype(data_df[col]):
+                data_df[col] = data_df[col].astype("category")
+
+        # the same categories on both sides of the merge key
+        meta_df = meta_df.copy()
+        categories = set(data_df["ID"].dropna()) | set(meta_df["ID"].dropna())
+        if self._categories is not None:
+            categories |= set(self._categories["ID"])
+        id_dtype = pd.CategoricalDtype(sorted(categories))
+        data_df["ID"] = data_df["ID"].astype(id_dtype)
+        meta_df["ID"] = meta_df["ID"].astype(id_dtype)
+
+        mem_after = data_df.memory_usage(deep=True).sum()
+        self.logger.info("Compact data types reduced memory of %d observations from %.2f MiB to %.2f MiB (%.1fx).",
+                         data_df.shape[0], mem_before / 2 ** 20, mem_after / 2 ** 20, mem_before / max(mem_after, 1))
+        return data_df, meta_df
+
+    def iter_chunks(self, chunks):
+        """
+        It downloads and parses CompactData chunks from the IMF data server, and yields them one by one in the order of
+        `chunks`. At most `max_workers` chunks are requested at a time, and at most `REQUEST_AHEAD` times as many
+        responses are held in memory, see `request_many`.
+
+        Args:
+          chunks: list of tuples with the area code and the url of each chunk
+
+        Returns:
+          A generator of a Pandas dataframe per chunk, empty if the chunk has no observations, or `None` if the
+          request or the parsing of the chunk failed.
+        """
+        jsons = self.request_many([url for _, url in chunks])
+        try:
+            for (cont, url), json in zip(chunks, jsons):
+                self.logger.debug("url = %r", url)
+                df = None
+                if json is not None:
+                    try:
+                        with self.metrics.time("parse_sec"):
+                            df = self.parse_compact_data(json)
+                        self.metrics.inc("rows", df.shape[0])
+                    except (AttributeError, KeyError, TypeError, ValueError) as e:
+                        # a response that cannot be parsed is taken as truncated, and its chunk is split
+                        self._chunk_errors[url] = (f"Failed to parse the response: {e!r}", "truncated")
+                        self.logger.warning("Failed to parse IMF data for area code, %s: url = %r: %r", cont, url,
+                                            e)
+                yield df
+        finally:
+            # stop the requests that are still pending if the chunks are not consumed to the end
+            close = getattr(jsons, "close", None)
+            if close is not None:
+                close()
+
+    def parse_compact_data(self, json):
+        """
+        It converts a CompactData response from the IMF data server to a dataframe in a single pass. The observations
+        of all series are collected into column arrays, and the attributes of each series are repeated for its
+        observations.
+
+        Args:
+          json: the json object of a CompactData response
+
+        Returns:
+          A Pandas dataframe with one row per observation.
+        """
+        series = json['CompactData']['DataSet'].get('Series')  # no series if there is no data
+        if isinstance(series, dict):
+            series_list = [series]
+            rename_dict = {'@OBS_VALUE': 'Value', '@INDICATOR': 'ID', '@INDICATOR_CODE': 'ID', '@REF_AREA': 'Country'}
+        elif isinstance(series, list):
+            series_list = series
+            rename_dict = {'@OBS_VALUE': 'Value', '@OBS_STATUS': 'Status', '@INDICATOR': 'ID',
+                           '@REF_SECTOR': 'ID',  # for GFSR
+                           '@REF_AREA': 'Country'}
+        else:
+            return pd.DataFrame()
+
+        obs_list, attr_list, obs_counts = [], [], []
+        for s in series_list:
+            obs = s.get('Obs')
+            if isinstance(obs, dict):
+                obs = [obs]
+            if not obs:
+                continue
+            obs_list.extend(obs)
+            attr_list.append({k: v for k, v in s.items() if k != 'Obs'})
+            obs_counts.append(len(obs))
+        if len(obs_list) == 0:
+            return pd.DataFrame()
+
+        columns = {k: v.to_numpy() for k, v in pd.DataFrame.from_records(obs_list).items()}
+        series_pos = np.repeat(np.arange(len(attr_list)), obs_counts)
+        for k, v in pd.DataFrame.from_records(attr_list).items():
+            columns[k] = v.to_numpy()[series_pos]
+        temp = pd.DataFrame(columns)
+
+        temp = temp.rename(columns=rename_dict)
+        temp['Period'] = self.parse_time_period(temp['@TIME_PERIOD'])
+        temp.drop('@TIME_PERIOD', axis=1, inplace=True)
+        return temp
+
+    @staticmethod
+    def parse_time_period(time_period):
+        """
+        It converts SDMX time periods, e.g. '2000', '2000-Q1', '2000-01' or '2000-01-31', to datetimes. Quarters are
+        mapped to their first month so that the whole column is parsed with a single explicit format.
+
+        Args:
+          time_period: Pandas series of time period strings
+
+        Returns:
+          A Pandas series of datetimes.
+        """
+        periods = time_period.astype(str).str.replace('-', '', regex=False)
+        lengths = periods.str.len()
+        try:
+            if lengths.nunique() == 1:
+                if (periods.str[4] == 'Q').all():
+                    month = (periods.str[5].astype(int) - 1) * 3 + 1
+                    periods = periods.str[:4] + month.astype(str).str.zfill(2)
+                fmt = {4: '%Y', 6: '%Y%m', 8: '%Y%m%d'}[periods.str.len().iloc[0]]
+                return pd.to_datetime(periods, format=fmt)
+        except (KeyError, ValueError):
+            pass
+        return pd.Series(pd.to_datetime([row for row in periods]), index=time_period.index)
+
     def validate_inputs(self):
         """
         The function checks if the user inputs are valid. It will change an invalid input to a valid value with a warning.
@@ -692,8 +1493,8 @@ class IMF(Series):
             valid_periods = self.dim_dict[freq_key]["VALUE"].values
             valid_periods_str = ", ".join(valid_periods)
             if not (self.period in valid_periods):
-                self.logger.warning(
-                    f"Input period '{self.period}' is not valid (See CL_AREA_{self.series} output table). Changing it to '{valid_periods[0]}'.")
+                self.logger.warning("Input period '%s' is not valid (See CL_AREA_%s output table). Changing it to "
+                                    "'%s'.", self.period, self.series, valid_periods[0])
                 self.period = valid_periods[0]
 
         # validate start date and end date
@@ -713,8 +1514,8 @@ class IMF(Series):
                 if date is not None:
                     datetime.strptime(date, "%Y")
             except ValueError:
-                self.logger.warning(
-                    f"Incorrect data format in input {date_des}, should be 'YYYY'. Setting it to 'None'.")
+                self.logger.warning("Incorrect data format in input %s, should be 'YYYY'. Setting it to 'None'.",
+                                    date_des)
                 date = None
             return date
 
@@ -731,14 +1532,14 @@ class IMF(Series):
                 rm_countries = []
                 for c in self.countries:
                     if not (c in valid_countries):
-                        self.logger.warning(
-                            f"Input country '{c}' is not valid (see CL_AREA_{self.series}'s output table). Dropping it from input.")
+                        self.logger.warning("Input country '%s' is not valid (see CL_AREA_%s's output table). "
+                                            "Dropping it from input.", c, self.series)
                         rm_countries.extend([c])
                 for c in rm_countries:
                     self.countries.remove(c)
                 if len(self.countries) == 0:
-                    self.logger.warning(
-                        f"Input countries contains no valid entries. Setting it to [{valid_countries[0]}]")
+                    self.logger.warning("Input countries contains no valid entries. Setting it to [%s]",
+                                        valid_countries[0])
                     self.countries = [valid_countries[0]]
 
         # validate serarch terms
@@ -760,37 +1561,278 @@ class IMF(Series):
             str.upper()
         return df
 
+    def request_structure(self, url, parse, series=""):
+        """
+        It gets parsed structure metadata from the shared registry, or downloads and parses it from the IMF data
+        server and saves it in the registry for all `IMF` objects of the process.
+
+        Args:
+          url: the url of the structure request
+          parse: function that converts the json object of the response to the metadata to be kept
+          series: the series the metadata belongs to, `None` for metadata of all series. Defaults to the series of
+                  the object.
+
+        Returns:
+          The parsed metadata, or `None` if it cannot be downloaded.
+        """
+        value = self.registry.get(url)
+        if value is None:
+            json = self.repeat_request(url)
+            if json is None:
+                return None
+            value = parse(json)
+            self.registry.put(url, value, series=self.series if series == "" else series)
+            value = self.registry.get(url)
+        return value
+
+    def get_codelist(self, codelist):
+        """
+        It gets a codelist of the series as a dataframe.
+
+        Args:
+          codelist: name of the codelist, e.g. 'CL_AREA_IFS'
+
+        Returns:
+          A Pandas dataframe with one row per code and the original column names, or `None` if it cannot be
+          downloaded.
+        """
+        return self.request_structure(
+            url=f'{self.url}CodeList/{codelist}',
+            parse=lambda json: pd.json_normalize(json['Structure']['CodeLists']['CodeList']['Code']))
+
+    def refresh_structure(self):
+        """
+        It drops the structure metadata of the series from the shared registry and the response cache, and downloads
+        it again.
+        """
+        urls = self.registry.invalidate(series=self.series)
+        cache = getattr(self.transport, "cache", None)
+        if cache is not None:
+            for url in urls:
+                cache.invalidate(url)
+        self.dim_dict = LazyDimDict()
+        self.des_list = []
+        self.id_list = []
+        if self.get_series_names() is not None:
+            self.get_dimensions()
+
+    def request_many(self, urls):
+        """
+        It requests several urls from the IMF data server, one at a time or concurrently by a pool of `max_workers`
+        threads. The pool is kept busy across all urls: the next url is requested as soon as a thread is free, rather
+        than after the slowest request of a batch, up to `REQUEST_AHEAD * max_workers` urls ahead of the response
+        being consumed.
+
+        Args:
+          urls: list of urls to request
+
+        Returns:
+          An iterator of the json objects of the responses, in the order of `urls`, see `repeat_request`.
+        """
+        if self.request_hook is not None and self.request_hook.is_bridged():
+            return self.request_hook.send_requests(urls)
+        if self.max_workers <= 1 or len(urls) <= 1:
+            return map(self.repeat_request, urls)
+        return self.iter_futures(self._iter_pooled(urls))
+
+    def _iter_pooled(self, urls):
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for url in urls:
+                yield executor.submit(self.repeat_request, url)
+        finally:
+            executor.shutdown(wait=False)
+
+    def iter_futures(self, futures):
+        """
+        It consumes futures in order, keeping up to `REQUEST_AHEAD * max_workers` of them submitted ahead of the one
+        being waited for. The futures that are still pending when the iterator is closed are cancelled.
+
+        Args:
+          futures: an iterator that submits a request and returns its `concurrent.futures.Future` object each time
+                   it is advanced
+
+        Returns:
+          A generator of the results of the futures, in the order of `futures`.
+        """
+        pending = deque()
+        try:
+            for future in futures:
+                pending.append(future)
+                if len(pending) >= REQUEST_AHEAD * self.max_workers:
+                    yield pending.popleft().result()
+            while len(pending) > 0:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            close = getattr(futures, "close", None)
+            if close is not None:
+                close()
+
+    @staticmethod
+    def read_json(rq):
+        """
+        It reads the json object of a response from the IMF data server.
+
+        Args:
+          rq: the `requests.Response` object
+
+        Returns:
+          The json object, or `None` if the request failed or the response is not a non-empty json object.
+        """
+        if rq.status_code != 200:
+            return None
+        try:
+            json = rq.json()
+        except:
+            return None
+        if isinstance(json, dict) and (len(json) >= 1):  # actually valid response
+            return json
+        return None
+
     def repeat_request(self, url):
         """
         It will try to get a response from the IMF data server for a given url, and if it doesn't get a
-        response, it will wait a few seconds and try again
+        response, it will wait and try again according to `retry_policy`, see `next_retry`.
 
         Args:
           url: the url to request
 
         Returns:
-          The json object is being returned. It will returns `None` if it does not get a valid response after making a few requests to the IMF data server.
+          The json object is being returned. It will returns `None` if it does not get a valid response before the
+          retry policy gives up, or if the deadline of the download is exceeded.
         """
+        if self.request_hook is not None and self.request_hook.is_bridged():
+            return self.request_hook.send_request(url)
+        if self.is_deadline_exceeded():
+            self.retry_stats.record_deadline()
+            self.logger.warning("Deadline of the download exceeded. Skip url = %r", url)
+            return None
 
-        json = None
-        for _ in range(self._max_requests):
-            tm.sleep(self._sleep_sec)
-            rq = requests.get(url)
-            if rq.status_code == 200:
-                try:
-                    json = rq.json()
-                except:
-                    # print a warning message to the console if it does not gets a valid response from the IMF data server
-                    if isinstance(json, dict) and (len(json) >= 1):  # actrally valid response
-                        return json
+        attempt = 0
+        while True:
+            attempt += 1
+            rq, error = None, None
+            try:
+                rq = self.transport.get(url)
+            except requests.exceptions.RequestException as e:
+                error = e
+            if rq is not None:
+                self.record_response(rq)
+            else:
+                self.metrics.inc("requests")
+            json = self.read_json(rq) if rq is not None else None
+            if json is not None:
+                self.retry_stats.record("ok")
+                return json
+            self.invalidate_cached(url, rq)
+            wait = self.next_retry(url, attempt, rq=rq, error=error)
+            if wait is None:
+                return None
+            tm.sleep(wait)
+
+    def record_response(self, rq):
+        """
+        It counts a response in `metrics`, as a cache hit or as a request with its bytes and the time spent waiting
+        for the rate limiter.
+
+        Args:
+          rq: the `requests.Response` object returned by the transport
+        """
+        if getattr(rq, "is_from_cache", False):
+            self.metrics.inc("cache_hits")
+            return
+        self.metrics.inc("requests")
+        self.metrics.inc("bytes", len(rq.content or b""))
+        waited = getattr(rq, "rate_limit_sec", 0)
+        if waited:
+            self.metrics.inc("rate_limit_sleep_sec", waited)
+
+    def invalidate_cached(self, url, rq):
+        """
+        It removes a response from the response cache of the transport if it came from the cache but is not a valid
+        json object, e.g. an error page cached by an earlier version, so that the next attempt asks the server.
+
+        Args:
+          url: the requested url
+          rq: the `requests.Response` object of the attempt, or `None`
+        """
+        cache = getattr(self.transport, "cache", None)
+        if cache is not None and rq is not None and rq.headers.get("X-Cache") == "HIT":
+            cache.invalidate(url)
+
+    def next_retry(self, url, attempt, rq=None, error=None):
+        """
+        It classifies a failed attempt to request a url, counts it in `retry_stats`, and decides with `retry_policy`
+        whether to try again.
+
+        Args:
+          url: the requested url
+          attempt: number of attempts made so far, starting at 1
+          rq: the `requests.Response` object of the attempt, or `None` if the request raised an exception
+          error: the exception raised by the request, or `None`
+
+        Returns:
+          The wait in seconds before the next attempt, or `None` to give up.
+        """
+        kind = self.retry_policy.classify(rq, error)
+        if kind == "ok":  # a response without a valid json object
+            kind = "invalid"
+        wait = self.retry_policy.next_wait(attempt, kind, rq=rq, deadline=self._deadline)
+        # a retryable failure is given up before its last attempt only if the retry would pass the deadline
+        is_deadline_exceeded = wait is None and kind in RETRYABLE_FAILURES and attempt < self.retry_policy.max_attempts
+        self.retry_stats.record(kind, wait, is_deadline_exceeded=is_deadline_exceeded)
+        if wait is not None:
+            self.metrics.inc("retries")
+            self.metrics.inc("retry_sleep_sec", wait)
+        reason = repr(error) if error is not None else f"status {rq.status_code}"
+        if wait is not None:
+            self.logger.info("Request failed (%s, %s), retry in %.1fs: url = %r", kind, reason, wait, url)
+        else:
+            self.logger.warning("No response received from IMF data server for url = %r after %d trials (%s, %s).",
+                                url, attempt, kind, reason)
+            # the kind of the failure decides whether the planner lowers the chunk sizes of the series
+            if rq is not None and rq.status_code in TOO_LARGE_STATUS:
+                kind = "too_large"
+            self._chunk_errors[url] = (f"No valid response ({kind}, {reason})", kind)
+        return wait
+
+    def start_deadline(self):
+        """
+        It starts the clock of the deadline of a download, see `RetryPolicy.deadline_sec`.
+        """
+        self._deadline = self.retry_policy.start_deadline()
+
+    def stop_deadline(self):
+        """
+        It stops the clock of the deadline at the end of a download, so that later requests of the object, e.g. by
+        `refresh_structure`, are not skipped.
+        """
+        self._deadline = None
 
-        if not (isinstance(json, dict) and (len(json) >= 1)):
-            # check that the JSON object is a dictionary, and that it has more than one key, otherwise gives a warning
-            self.logger.warning(
-                f"No response received from IMF data server for {url = } after {self._max_requests} trials.")
-            json = None
+    def is_deadline_exceeded(self):
+        """
+        It checks whether the deadline of the current download is exceeded.
 
-        return json
+        Returns:
+          True if the deadline is exceeded.
+        """
+        return self._deadline is not None and tm.monotonic() > self._deadline
+
+    def close(self):
+        """
+        It closes the pooled connections of the transport if the object created it. A transport passed to the
+        object is left open for the other objects that share it.
+        """
+        if self._is_own_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     # overriding abstract method
     def get_meta(self):
@@ -842,10 +1884,10 @@ class AFRREO(IMF):
     """
 
     def __init__(self, series='AFRREO', search_terms=None, countries=None, period='Q',
-                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True):
+                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True, **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
                          start_date=start_date, end_date=end_date, outdir=outdir, logdir=logdir,
-                         is_log_to_screen=is_log_to_screen)
+                         is_log_to_screen=is_log_to_screen, **kwargs)
 
 
 class IFS(IMF):
@@ -854,10 +1896,10 @@ class IFS(IMF):
     """
 
     def __init__(self, series='IFS', search_terms=None, countries=None, period='Q',
-                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True):
+                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True, **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
                          start_date=start_date, end_date=end_date, outdir=outdir, logdir=logdir,
-                         is_log_to_screen=is_log_to_screen)
+                         is_log_to_screen=is_log_to_screen, **kwargs)
 
 
 class DOT(IMF):
@@ -866,10 +1908,10 @@ class DOT(IMF):
     """
 
     def __init__(self, series='DOT', search_terms=None, countries=None, period='Q',
-                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True):
+                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True, **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
                          start_date=start_date, end_date=end_date, outdir=outdir, logdir=logdir,
-                         is_log_to_screen=is_log_to_screen)
+                         is_log_to_screen=is_log_to_screen, **kwargs)
 
 
 class BOP(IMF):
@@ -878,10 +1920,10 @@ class BOP(IMF):
     """
 
     def __init__(self, series='BOP', search_terms=None, countries=None, period='Q',
-                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True):
+                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True, **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
                          start_date=start_date, end_date=end_date, outdir=outdir, logdir=logdir,
-                         is_log_to_screen=is_log_to_screen)
+                         is_log_to_screen=is_log_to_screen, **kwargs)
 
 
 class FSI(IMF):
@@ -891,10 +1933,10 @@ class FSI(IMF):
     """
 
     def __init__(self, series='FSI', search_terms=None, countries=None, period='M',
-                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True):
+                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True, **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
                          start_date=start_date, end_date=end_date, outdir=outdir, logdir=logdir,
-                         is_log_to_screen=is_log_to_screen)
+                         is_log_to_screen=is_log_to_screen, **kwargs)
 
 
 class GFSR(IMF):
@@ -903,10 +1945,11 @@ class GFSR(IMF):
     """
 
     def __init__(self, series='GFSR', search_terms=None, countries=None, period='A',
-                 start_date=None, end_date=None,  sector="", unit="", outdir="out", logdir="log", is_log_to_screen=True):
+                 start_date=None, end_date=None,  sector="", unit="", outdir="out", logdir="log", is_log_to_screen=True,
+                 **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
                          start_date=start_date, end_date=end_date, outdir=outdir, logdir=logdir,
-                         is_log_to_screen=is_log_to_screen)
+                         is_log_to_screen=is_log_to_screen, **kwargs)
         input_str = ""
         if unit is None or unit == "":
             self.unit = ""
@@ -921,178 +1964,74 @@ class GFSR(IMF):
             input_str += f", {sector = }"
 
 
-        self.logger.info(f"{series} specific inputs: {input_str}")
+        self.logger.info("%s specific inputs: %s", series, input_str)
 
-    def download_data(self):
+    def get_store_series(self):
         """
-        It downloads data and its meta data from the IMF web server, and saves it to a csv file.
+        It returns the name of the series in the data store, which includes the sector and unit codes since they are
+        not stored in the observations.
 
         Returns:
-          The data is being returned as a pandas dataframe.
+          The series code followed by the sector and unit codes.
         """
-        if self.get_series_names() is None:
-            return None
-
-        self.get_dimensions()
+        return "_".join([self.series, self.sector, self.unit]).rstrip("_")
 
-        self.validate_inputs()
+    def gen_data_url(self, cont, indicators, start_time):
+        """
+        It generates the url of a CompactData request, with the sector and unit codes.
 
-        self.meta_df = self.download_meta()
-        if self.meta_df is None:
-            return None
+        Args:
+          cont: ISO-2 codes of the countries joined by '+', or '' for all countries
+          indicators: list of indicator codes
+          start_time: first year to download, or `None` for the earliest period
 
+        Returns:
+          The url.
+        """
         base = f'{self.url}CompactData/{self.series}/'
-        time = ''
-        if self.start_time is not None and self.end_time is not None:
-            time = f'.?startPeriod={self.start_time}&endPeriod={self.end_time}'
-        if self.start_time is None and self.end_time is not None:
-            time = f'.?endPeriod={self.end_time}'
-        if self.start_time is not None and self.end_time is None:
-            time = f'.?startPeriod={self.start_time}'
+        time = self.gen_time_query(start_time, self.end_time)
+        return f"{base}{self.period}.{cont}.{self.sector}.{self.unit}.{'+'.join(indicators)}{time}"
 
-        self.data_df = pd.DataFrame()
-        # sometimes a big list of country codes results in an error, try splitting it into 2 lists and running this and next cell twice.
-        dcn_sa = list(self.meta_df["ID"].values)
+    def prepare_download(self):
+        """
+        It downloads the series names, the dimensions and the meta data needed to download data, validates the
+        inputs, and looks up the codes of the sector and the unit from their descriptions.
+
+        Returns:
+          The list of indicator codes to download, or `None` if the series or the search terms are not found.
+        """
+        dcn_sa = super().prepare_download()
+        if dcn_sa is None:
+            return None
 
         ## TODO: change to lowercase
         if self.sector != "":
             df_temp = self.dim_dict["CL_SECTOR_GFSR"]
             try:
-                self.sector = df_temp.loc[df_temp['DESCRIPTION.TEXT'] == self.sector, 'VALUE'].iloc[0]
+                # a code, e.g. looked up by an earlier download, is kept
+                if self.sector not in df_temp['VALUE'].values:
+                    self.sector = df_temp.loc[df_temp['DESCRIPTION.TEXT'] == self.sector, 'VALUE'].iloc[0]
             except:
-                self.logger.warning(f"The given sector attribute does not match the metadata: {self.sector}. Defaulting to None.")
+                self.logger.warning("The given sector attribute does not match the metadata: %s. Defaulting to None.",
+                                    self.sector)
                 self.sector = ""
 
         if self.unit != "":
             df_temp = self.dim_dict["CL_UNIT_GFSR"]
             try:
-                self.unit = df_temp.loc[df_temp['DESCRIPTION.TEXT'] == self.unit, 'VALUE'].iloc[0]
+                # a code, e.g. looked up by an earlier download, is kept
+                if self.unit not in df_temp['VALUE'].values:
+                    self.unit = df_temp.loc[df_temp['DESCRIPTION.TEXT'] == self.unit, 'VALUE'].iloc[0]
             except:
-                self.logger.warning(f"The given unit attribute does not match the metadata: {self.unit}. Defaulting to None.")
+                self.logger.warning("The given unit attribute does not match the metadata: %s. Defaulting to None.",
+                                    self.unit)
                 self.unit = ""
 
-        self.logger.debug(f"sector id lookup (now self.sector) {self.sector}")
-        self.logger.debug(f"unit id lookup (now self.unit) {self.unit}")
-
-        self.logger.info(f"dcn_sa is {dcn_sa}")
-
-        temp = pd.DataFrame()
-
-        if self.countries[0] == '':
-            dcn_sa_list = [dcn_sa[x:x + 1] for x in range(0, len(dcn_sa), 1)]
-        else:
-            dcn_sa_list = [dcn_sa[x:x + self._max_indicators] for x in range(0, len(dcn_sa), self._max_indicators)]
-
-        self.logger.info(f"dcn_sa_list is {dcn_sa_list}")
-
-        for cont, indicators in itertools.product(self.countries,  dcn_sa_list):
-            self.logger.debug("Current country", cont)
-
-            # url = f"{base}{self.period}.{cont}{'.'*(self._indicator_dim_position-1)}{'+'.join(indicators)}{time}"
-            # logger.info(f"URL is {url}")
-            url = f"{base}{self.period}.{cont}.{self.sector}.{self.unit}.{'+'.join(indicators)}{time}"
-            self.logger.debug(f"URL is {url}")
-            # url = f"{base}{period}..{'+'.join(indicators)}.{time}"
-
-            # logger.debug(f"{url_v2 = }")
-            json = self.repeat_request(url)
-            if json is not None:
-                try:
-                    response = json
-                    series = response['CompactData']['DataSet']['Series']
-                    temp_df = pd.DataFrame()
-
-                    if isinstance(series, dict):
-                        if isinstance(series.get("Obs"), list):
-                            temp_df = pd.concat([temp_df, pd.json_normalize(series.get("Obs"))])
-                        for k in series.keys():
-                            if k != "Obs":
-                                temp_df[k] = series.get(k)
-
-                        if temp_df.shape[0] > 0:
-                            temp_df = temp_df.rename(
-                                columns={
-                                    '@OBS_VALUE': 'Value',
-                                    '@INDICATOR': 'ID',
-                                    '@INDICATOR_CODE': 'ID',
-                                    '@REF_AREA': 'Country'
-                                }
-                            )
-                            temp_df['Period'] = pd.to_datetime(
-                                [row.replace('-', '') for row in temp_df['@TIME_PERIOD']]
-                            )
-                            temp_df.drop('@TIME_PERIOD', axis=1, inplace=True)
-
-                            temp = pd.concat([temp, temp_df], axis=0)
-                    elif isinstance(series, list):
-                        series_len = len(series)
-                        for n in range(0, series_len):
-                            temp_dic = series[n].get('Obs')
-
-                            temp_df = pd.DataFrame.from_dict(
-                                temp_dic
-                            ).rename(
-                                columns={
-                                    '@OBS_VALUE': 'Value',
-                                    '@OBS_STATUS': 'Status'
-                                }
-                            )
-
-                            for k in series[n].keys():
-                                if k != "Obs":
-                                    temp_df[k] = series[n].get(k)
-
-                            if temp_df.shape[0] > 0:
-                                temp_df = temp_df.rename(
-                                    columns={
-                                        '@OBS_VALUE': 'Value',
-                                        '@INDICATOR': 'ID',
-                                        '@REF_SECTOR': 'ID',  # for GFSR
-                                        '@REF_AREA': 'Country'
-                                    }
-                                )
-                                temp_df['Period'] = pd.to_datetime(
-                                    [row.replace('-', '') for row in temp_df['@TIME_PERIOD']]
-                                )
-                                temp_df.drop('@TIME_PERIOD', axis=1, inplace=True)
-
-                                temp = pd.concat([temp, temp_df], axis=0)
-                except:
-                    self.logger.warning(f"Request for IMF data failed for area code, {cont}: {url = }.")
-                    pass
-
-        is_output = True
-        if temp.shape[0] == 0:
-            csv_filename, _ = self.gen_data_filename()
-            outfile_path = f"{self.outdir}{csv_filename}"
-            if path.exists(outfile_path):
-                temp = pd.read_csv(outfile_path)
-                self.logger.warning(f"Read data from historical file {outfile_path}")
-                if "Description" in temp.columns:
-                    temp = temp.drop(['Description'], axis=1)
-                is_output = False
-            else:
-                self.logger.warning(f"No data has been downloaded.")
-                return pd.DataFrame()
-
-        self.data_df = pd.concat([temp, self.data_df], axis=0)
-        self.data_df = pd.merge(self.data_df, self.meta_df, on="ID", how="left")
-
-        # deduplicate
-        self.data_df = self.data_df.drop_duplicates(keep='last')
-
-        # sorting
-        self.data_df.sort_values(by=["ID", "Country", 'Period'], axis=0, inplace=True)
-        self.logger.debug(f"data_df.shape = {self.data_df.shape}")
-
-        # remove special characters in column names
-        self.data_df = self.clean_column_names(self.data_df)
-
-        if is_output:
-            self.output_data(is_gen_filename=True)
-
-        return self.data_df
+        self.logger.debug("sector id lookup (now self.sector) %s", self.sector)
+        self.logger.debug("unit id lookup (now self.unit) %s", self.unit)
 
+        self.logger.info("dcn_sa is %s", dcn_sa)
+        return dcn_sa
 
 
 class COFOG(IMF):
@@ -1101,9 +2040,9 @@ class COFOG(IMF):
     """
 
     def __init__(self, series='COFOG', search_terms=None, countries=None, period='A',
-                 start_date=None, end_date=None, outdir=None):
+                 start_date=None, end_date=None, outdir=None, **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
-                         start_date=start_date, end_date=end_date, outdir=outdir)
+                         start_date=start_date, end_date=end_date, outdir=outdir, **kwargs)
 
 
 # > The `HPDD` class is a subclass of the `IMF` class. It inherits all of the methods and attributes of the `IMF` class,
@@ -1114,7 +2053,7 @@ class HPDD(IMF):
     """
 
     def __init__(self, series='HPDD', search_terms=None, countries=None, period='A',
-                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True):
+                 start_date=None, end_date=None, outdir="out", logdir="log", is_log_to_screen=True, **kwargs):
         super().__init__(series=series, search_terms=search_terms, countries=countries, period=period,
                          start_date=start_date, end_date=end_date, outdir=outdir, logdir=logdir,
-                         is_log_to_screen=is_log_to_screen)
\ No newline at end of file
+                         is_log_to_screen=is_log_to_screen, **kwargs)
\ No newline at end of file
@@ -0,0 +1,403 @@
+"""
+Asynchronous API of imfdatapy for asyncio applications.
+
+"""
+
+import asyncio
+import functools
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from .imf import IMF, AFRREO, IFS, DOT, BOP, FSI, GFSR, COFOG, HPDD
+    from .imf_transport import Transport
+except ImportError:
+    from imf import IMF, AFRREO, IFS, DOT, BOP, FSI, GFSR, COFOG, HPDD
+    from imf_transport import Transport
+
+
+class AsyncTransport:
+    """
+    A non-blocking counterpart of `Transport` based on `httpx.AsyncClient`. It waits for the rate limiter with
+    `asyncio.sleep` and shares the rate limiter and the cache of the `Transport` it wraps. Without the optional package
+    `httpx`, requests are sent by the wrapped `Transport` in a worker thread, which does not block the event loop either.
+    """
+
+    def __init__(self, transport=None, client=None):
+        """
+        This function initializes the transport.
+
+        Args:
+          transport: the `Transport` object whose rate limiter, cache, timeouts and headers are used. Defaults to None
+                     to create a new one.
+          client: an `httpx.AsyncClient` object to send the requests. Defaults to None to create one if `httpx` is
+                  installed.
+        """
+        self.transport = transport if transport is not None else Transport()
+        self.rate_limiter = self.transport.rate_limiter
+        if client is None and httpx is not None and isinstance(self.transport, Transport):
+            connect_timeout, read_timeout = self.transport.timeout
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=self.transport.pool_size,
+                                    max_keepalive_connections=self.transport.pool_size),
+                headers={"Accept-Encoding": "gzip, deflate"} if self.transport.is_gzip else None)
+        self.client = client
+
+    @staticmethod
+    def to_response(response):
+        """
+        It converts an `httpx.Response` object to a `requests.Response` object.
+
+        Args:
+          response: the `httpx.Response` object
+
+        Returns:
+          The `requests.Response` object.
+        """
+        rq = requests.Response()
+        rq.status_code = response.status_code
+        rq._content = response.content
+        rq.headers = CaseInsensitiveDict(response.headers)
+        rq.url = str(response.url)
+        rq.encoding = response.encoding
+        return rq
+
+    async def acquire(self):
+        """
+        It waits without blocking until a request is allowed by the rate limiter and takes a slot.
+
+        Returns:
+          The number of seconds spent waiting.
+        """
+        waited = 0
+        wait = self.rate_limiter.reserve()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.rate_limiter.reserve()
+        return waited
+
+    async def get(self, url, headers=None):
+        """
+        It sends a GET request for a given url, see `Transport.get`.
+
+        Args:
+          url: the url to request
+          headers: optional dictionary of extra request headers
+
+        Returns:
+          The `requests.Response` object from the server or the cache.
+        """
+        if self.client is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(self.transport.get, url, headers=headers))
+
+        lookup_cache = getattr(self.transport, "lookup_cache", None)
+        body = None
+        if lookup_cache is not None:
+            cached_rq, body, headers = lookup_cache(url, headers)
+            if cached_rq is not None:
+                return cached_rq
+
+        waited = await self.acquire()
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.TimeoutException as e:  # raised as by `requests`, for `RetryPolicy.classify`
+            raise requests.exceptions.Timeout(repr(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(repr(e)) from e
+        rq = self.to_response(response)
+        if lookup_cache is not None:
+            rq = self.transport.store_cache(url, rq, body)
+        rq.rate_limit_sec = waited
+        return rq
+
+    async def aclose(self):
+        """
+        It closes the connections of the `httpx.AsyncClient` object.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+
+
+class AsyncIMF:
+    """
+    An asyncio counterpart of `IMF` with awaitable `get_series_names`, `get_dimensions`, `validate_inputs`,
+    `download_meta`, `download_data`, `download_all`, `sink_data` and `refresh_structure`, and an asynchronous generator
+    `iter_data`. Requests are sent by an `AsyncTransport` on the event loop, and the chunks of a download are requested
+    concurrently, up to `max_workers` at a time. The processing of the responses is the same as in `IMF`, and runs in a
+    worker thread so that Pandas does not block the event loop either; the dataframes are the same as those of the
+    synchronous API. Other attributes and methods, e.g. `get_data` or `dim_dict`, are those of the wrapped `IMF`
+    object, `imf`.
+
+    The methods of one object must not be run concurrently, as with `IMF`. Use one object per download instead.
+    """
+
+    sync_class = IMF
+
+    def __init__(self, *args, client=None, **kwargs):
+        """
+        This function initializes the object with the arguments of `sync_class`, e.g. `IMF`.
+
+        Args:
+          client: an `httpx.AsyncClient` object to send the requests. Defaults to None to create one.
+          max_workers: number of chunks requested concurrently. Defaults to 4.
+        """
+        kwargs.setdefault("max_workers", 4)
+        self.imf = self.sync_class(*args, **kwargs)
+        self.async_transport = AsyncTransport(self.imf.transport, client=client)
+        self._loop = None
+        self._loop_thread = None
+        self._semaphore = None
+        # the requests of the wrapped object are sent on the event loop
+        self.imf.request_hook = self
+
+    def __getattr__(self, name):
+        if name == "imf":
+            raise AttributeError(name)
+        return getattr(self.imf, name)
+
+    async def arepeat_request(self, url):
+        """
+        It requests a url without blocking the event loop, and tries again according to the retry policy if it does
+        not get a valid response, see `IMF.repeat_request`.
+
+        Args:
+          url: the url to request
+
+        Returns:
+          The json object, or `None` if there is no valid response before the retry policy gives up.
+        """
+        if self.imf.is_deadline_exceeded():
+            self.imf.retry_stats.record_deadline()
+            self.imf.logger.warning("Deadline of the download exceeded. Skip url = %r", url)
+            return None
+
+        attempt = 0
+        while True:
+            attempt += 1
+            rq, error = None, None
+            try:
+                rq = await self.async_transport.get(url)
+            except requests.exceptions.RequestException as e:
+                error = e
+            json = IMF.read_json(rq) if rq is not None else None
+            if rq is not None:
+                self.imf.record_response(rq)
+            else:
+                self.imf.metrics.inc("requests")
+            if json is not None:
+                self.imf.retry_stats.record("ok")
+                return json
+            self.imf.invalidate_cached(url, rq)
+            wait = self.imf.next_retry(url, attempt, rq=rq, error=error)
+            if wait is None:
+                return None
+            await asyncio.sleep(wait)
+
+    def is_bridged(self):
+        """
+        It checks if the requests of `imf` are sent on the event loop, see `IMF.request_hook`. Requests can only wait
+        for the event loop from a worker thread, not from the thread of the loop itself.
+
+        Returns:
+          True if a method of the object runs in a worker thread of the event loop.
+        """
+        if self._loop is None or not self._loop.is_running():
+            return False
+        return self._loop_thread != threading.get_ident()
+
+    def send_request(self, url):
+        """
+        It requests a url on the event loop for `imf`, see `arepeat_request`.
+
+        Args:
+          url: the url to request
+
+        Returns:
+          The json object, or `None` if there is no valid response.
+        """
+        return asyncio.run_coroutine_threadsafe(self.arepeat_request(url), self._loop).result()
+
+    def send_requests(self, urls):
+        """
+        It requests several urls on the event loop for `imf`, at most `max_workers` at a time, in a sliding window
+        like `IMF.request_many`.
+
+        Args:
+          urls: list of urls to request
+
+        Returns:
+          An iterator of the json objects of the responses, in the order of `urls`.
+        """
+        return self.imf.iter_futures(asyncio.run_coroutine_threadsafe(self._arequest_bounded(url), self._loop)
+                                     for url in urls)
+
+    async def _arequest_bounded(self, url):
+        async with self._semaphore:
+            return await self.arepeat_request(url)
+
+    async def _run(self, method, *args):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._semaphore = asyncio.Semaphore(self.imf.max_workers)
+        return await self._loop.run_in_executor(None, functools.partial(method, *args))
+
+    async def get_series_names(self):
+        """
+        It downloads the names of the series, see `IMF.get_series_names`.
+
+        Returns:
+          A dataframe with the series names and their corresponding IDs.
+        """
+        return await self._run(self.imf.get_series_names)
+
+    async def get_dimensions(self):
+        """
+        It downloads the dimensions of the series, see `IMF.get_dimensions`.
+
+        Returns:
+          The list of dimensions.
+        """
+        return await self._run(self.imf.get_dimensions)
+
+    async def validate_inputs(self):
+        """
+        It validates the countries and the period, see `IMF.validate_inputs`.
+        """
+        return await self._run(self.imf.validate_inputs)
+
+    async def download_meta(self):
+        """
+        It downloads the meta data of the indicators, see `IMF.download_meta`.
+
+        Returns:
+          The meta data as a Pandas dataframe.
+        """
+        return await self._run(self.imf.download_meta)
+
+    async def download_data(self):
+        """
+        It downloads data and its meta data, see `IMF.download_data`.
+
+        Returns:
+          The data as a Pandas dataframe.
+        """
+        return await self._run(self.imf.download_data)
+
+    async def download_all(self, periods=None, storedir=None):
+        """
+        It mirrors all indicators of the series for all countries into the data store, see `IMF.download_all`.
+
+        Returns:
+          A Pandas dataframe with the number of observations and the status of each frequency and country.
+        """
+        return await self._run(self.imf.download_all, periods, storedir)
+
+    async def iter_data(self):
+        """
+        It downloads data chunk by chunk, see `IMF.iter_data`.
+
+        Returns:
+          An asynchronous generator of Pandas dataframes.
+        """
+        chunks = self.imf.iter_data()
+        end = object()
+        while True:
+            df = await self._run(next, chunks, end)
+            if df is end:
+                return
+            yield df
+
+    async def sink_data(self, sinkdir=None):
+        """
+        It downloads data chunk by chunk and appends each chunk to the disk, see `IMF.sink_data`.
+
+        Returns:
+          The directory of the part files.
+        """
+        return await self._run(self.imf.sink_data, sinkdir)
+
+    async def refresh_structure(self):
+        """
+        It downloads the structure metadata of the series again, see `IMF.refresh_structure`.
+        """
+        return await self._run(self.imf.refresh_structure)
+
+    async def aclose(self):
+        """
+        It closes the connections of the object, and those of the transport of `imf` if it created it, see
+        `IMF.close`.
+        """
+        await self.async_transport.aclose()
+        self.imf.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+
+class AsyncAFRREO(AsyncIMF):
+    """
+    Asynchronous `AFRREO`.
+    """
+    sync_class = AFRREO
+
+
+class AsyncIFS(AsyncIMF):
+    """
+    Asynchronous `IFS`.
+    """
+    sync_class = IFS
+
+
+class AsyncDOT(AsyncIMF):
+    """
+    Asynchronous `DOT`.
+    """
+    sync_class = DOT
+
+
+class AsyncBOP(AsyncIMF):
+    """
+    Asynchronous `BOP`.
+    """
+    sync_class = BOP
+
+
+class AsyncFSI(AsyncIMF):
+    """
+    Asynchronous `FSI`.
+    """
+    sync_class = FSI
+
+
+class AsyncGFSR(AsyncIMF):
+    """
+    Asynchronous `GFSR`.
+    """
+    sync_class = GFSR
+
+
+class AsyncCOFOG(AsyncIMF):
+    """
+    Asynchronous `COFOG`.
+    """
+    sync_class = COFOG
+
+
+class AsyncHPDD(AsyncIMF):
+    """
+    Asynchronous `HPDD`.
+    """
+    sync_class = HPDD
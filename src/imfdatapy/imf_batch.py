@@ -0,0 +1,278 @@
+"""
+Batch downloads of several queries of IMF series with shared connections, rate limit and structure metadata.
+
+"""
+
+import inspect
+import os
+import time as tm
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    from .imf import IMF, AFRREO, IFS, DOT, BOP, FSI, GFSR, COFOG, HPDD
+    from .imf_transport import Transport
+    from .imf_cache import ResponseCache
+    from .imf_structure import StructureRegistry
+    from .imf_planner import ChunkPlanner
+    from .imf_log import LogFile
+except ImportError:
+    from imf import IMF, AFRREO, IFS, DOT, BOP, FSI, GFSR, COFOG, HPDD
+    from imf_transport import Transport
+    from imf_cache import ResponseCache
+    from imf_structure import StructureRegistry
+    from imf_planner import ChunkPlanner
+    from imf_log import LogFile
+
+# fields of a job given as a tuple, after the series class
+JOB_FIELDS = ["search_terms", "countries", "period", "start_date", "end_date"]
+
+# estimated number of countries and indicators of a job without countries or search terms
+ALL_COUNTRIES, ALL_INDICATORS = 200, 50
+
+
+class BatchDownloader:
+    """
+    A batch of `download_data` jobs of several series, e.g. a nightly download of IFS, DOT and BOP indicators. All
+    jobs share one `Transport`, and with it its pooled connections, rate limiter and response cache, one
+    `StructureRegistry` and one `ChunkPlanner`, so that the `Dataflow` and other structure requests are sent once per
+    batch rather than once per job. Up to `max_jobs` jobs run at a time, the largest first, so that one job uses the
+    request budget while another one parses, merges or writes its data. Each job writes its output file to its own
+    directory, `{outdir}/job-{n}-{series}`, and a summary of the jobs is written to `{outdir}/batch_summary.csv`.
+    """
+
+    def __init__(self, jobs=None, max_jobs=4, transport=None, registry=None, planner=None, outdir="out",
+                 logdir="log", is_log_to_screen=False, is_log_to_file=True, is_cache=True, cachedir=None,
+                 is_keep_data=True, **kwargs):
+        """
+        This function initializes the batch.
+
+        Args:
+          jobs: list of jobs, see `add_job`. A job is a dictionary of the arguments of `add_job`, or a tuple of the
+                series class followed by any of the search terms, countries, period, start date and end date, and
+                optionally a dictionary of other arguments of the class. Defaults to None for no jobs.
+          max_jobs: number of jobs that run at a time. Defaults to 4.
+          transport: the `Transport` object shared by all jobs. Defaults to None to create one with the process-wide
+                     rate limiter, which is closed by `close`.
+          registry: the `StructureRegistry` object shared by all jobs. Defaults to None for the process-wide registry.
+          planner: the `ChunkPlanner` object shared by all jobs. Defaults to None for the process-wide planner.
+          outdir: the directory of the output directories of the jobs and of the summary. Defaults to 'out'.
+          logdir: the directory where the log files will be saved. Defaults to 'log'.
+          is_log_to_screen: True to have log statements printed to console. Defaults to False.
+          is_log_to_file: True to write log statements to a log file in `logdir`. Defaults to True.
+          is_cache: True to cache structure responses on disk. Ignored if `transport` is given.
+          cachedir: the directory of the response cache. Defaults to None for a 'cache' directory in `outdir`.
+          is_keep_data: True to keep the data of each job in `results`, False to only keep the output files, e.g.
+                        for batches larger than memory. Defaults to True.
+          kwargs: other arguments of all jobs, e.g. `max_workers`, `output_format` or `retry_policy`
+        """
+        self.max_jobs = max(1, max_jobs)
+        self.outdir = outdir
+        self.logdir = logdir
+        self.is_log_to_screen = is_log_to_screen
+        self.is_log_to_file = is_log_to_file
+        self.is_keep_data = is_keep_data
+        self.kwargs = kwargs
+        self._is_own_transport = transport is None
+        if transport is None:
+            cache = None
+            if is_cache:
+                if cachedir is None:
+                    cachedir = os.path.join(outdir, "cache")
+                cache = ResponseCache(cachedir=cachedir)
+            pool_size = max(10, self.max_jobs * kwargs.get("max_workers", 1))
+            transport = Transport(pool_size=pool_size, cache=cache)
+        self.transport = transport
+        self.registry = registry if registry is not None else StructureRegistry.shared()
+        self.planner = planner if planner is not None else ChunkPlanner.shared()
+        self.logger = LogFile(logdir=logdir, is_log_to_screen=is_log_to_screen,
+                              is_log_to_file=is_log_to_file).start_log()
+        self.jobs = []
+        self.results = []
+        for job in jobs or []:
+            if isinstance(job, dict):
+                self.add_job(**job)
+            else:
+                job = list(job)
+                options = job.pop() if len(job) > 1 and isinstance(job[-1], dict) else {}
+                if len(job) > len(JOB_FIELDS) + 1:
+                    raise ValueError(f"A job has at most {len(JOB_FIELDS) + 1} fields, the series class and "
+                                     f"{JOB_FIELDS}, followed by a dictionary of other arguments: {job}")
+                self.add_job(job[0], **dict(zip(JOB_FIELDS, job[1:])), **options)
+
+    def add_job(self, series_class, search_terms=None, countries=None, period=None, start_date=None, end_date=None,
+                **kwargs):
+        """
+        It adds a job to the batch.
+
+        Args:
+          series_class: the class of the series, e.g. `IFS`
+          search_terms: list of strings to find in indicator names in the series
+          countries: list of ISO-2 codes of countries
+          period: frequency of the time series. Defaults to None for the default of the class.
+          start_date: the start date of the time series. Defaults to None to get the earliest date of data.
+          end_date: the end date of the time series. Defaults to None to get the latest date of data.
+          kwargs: other arguments of the class, e.g. `sector` of `GFSR`, which override those of the batch
+
+        Returns:
+          The number of the job.
+        """
+        if not (isinstance(series_class, type) and issubclass(series_class, IMF)):
+            raise ValueError(f"Unknown series class {series_class}, expected a subclass of IMF, e.g. IFS")
+        args = {"search_terms": search_terms, "countries": countries, "period": period, "start_date": start_date,
+                "end_date": end_date}
+        self.jobs.append((series_class, {**{k: v for k, v in args.items() if v is not None}, **kwargs}))
+        return len(self.jobs) - 1
+
+    @staticmethod
+    def estimate_cost(job):
+        """
+        It estimates the size of a job by its number of countries and search terms.
+
+        Args:
+          job: tuple of the series class and the arguments of the job
+
+        Returns:
+          The estimated number of countries and indicators.
+        """
+        _, args = job
+        countries = args.get("countries")
+        n_countries = ALL_COUNTRIES if countries is None or countries == [''] else len(countries)
+        search_terms = args.get("search_terms")
+        return n_countries * (ALL_INDICATORS if search_terms is None else len(search_terms))
+
+    def gen_job_outdir(self, n):
+        """
+        It generates the output directory of a job.
+
+        Args:
+          n: the number of the job
+
+        Returns:
+          The directory.
+        """
+        series_class, args = self.jobs[n]
+        series = args.get("series", inspect.signature(series_class).parameters["series"].default)
+        return os.path.join(self.outdir, f"job-{n:03d}-{str(series).lower()}")
+
+    def make_imf(self, n):
+        """
+        It creates the `IMF` object of a job with the shared transport, registry and planner.
+
+        Args:
+          n: the number of the job
+
+        Returns:
+          The `IMF` object.
+        """
+        series_class, args = self.jobs[n]
+        outdir = self.gen_job_outdir(n)
+        os.makedirs(outdir, exist_ok=True)
+        kwargs = {"logdir": self.logdir, "is_log_to_screen": self.is_log_to_screen,
+                  "is_log_to_file": self.is_log_to_file, **self.kwargs, **args,
+                  "outdir": outdir, "transport": self.transport, "registry": self.registry, "planner": self.planner}
+        return series_class(**kwargs)
+
+    def run_job(self, n, imf=None):
+        """
+        It runs a job and reports its outcome. Errors are logged and reported rather than raised, so that one failed
+        job does not stop the batch.
+
+        Args:
+          n: the number of the job
+          imf: the `IMF` object of the job. Defaults to None to create it.
+
+        Returns:
+          A dictionary with the number of the job, its 'series', its 'status', 'ok', 'empty' or 'failed', the number
+          of 'rows', the 'outfile', the 'error' of a failed job, the 'elapsed_sec', the 'metrics' of its download
+          and its 'data' if `is_keep_data` is True.
+        """
+        start = tm.perf_counter()
+        result = {"job": n, "series": self.jobs[n][0].__name__, "status": "failed", "rows": 0, "outfile": None,
+                  "error": None, "elapsed_sec": None, "metrics": None, "data": None}
+        try:
+            imf = imf if imf is not None else self.make_imf(n)
+            result["series"] = imf.series
+            df = imf.download_data()
+            result["metrics"] = imf.metrics.to_dict()
+            if df is None:
+                result["error"] = f"Series or search terms not found: {imf.search_terms}"
+            else:
+                result["status"] = "ok" if df.shape[0] > 0 else "empty"
+                result["rows"] = int(df.shape[0])
+                filename, _ = imf.gen_data_filename()
+                outfile = os.path.join(imf.outdir, filename)
+                result["outfile"] = outfile if os.path.exists(outfile) else None
+                result["data"] = df if self.is_keep_data else None
+        except Exception as e:
+            result["error"] = repr(e)
+            self.logger.exception("Job %d of %s failed", n, result["series"])
+        result["elapsed_sec"] = round(tm.perf_counter() - start, 3)
+        self.logger.info("Job %d of %s: %s with %d rows in %.1f s", n, result["series"], result["status"],
+                         result["rows"], result["elapsed_sec"])
+        return result
+
+    def run(self):
+        """
+        It runs all jobs of the batch, up to `max_jobs` at a time and the largest first, and writes their summary to
+        `{outdir}/batch_summary.csv`. The structure metadata shared by all series is downloaded once before the jobs
+        start.
+
+        Returns:
+          A Pandas dataframe with a row per job, in the order of the jobs, with its number, series, status, rows,
+          output file, error and elapsed seconds. The full results, with the data and metrics of each job, are in
+          `results`.
+        """
+        if len(self.jobs) == 0:
+            self.results = []
+            return pd.DataFrame()
+        order = sorted(range(len(self.jobs)), key=lambda n: -self.estimate_cost(self.jobs[n]))
+        imfs = {}
+        try:
+            imfs[order[0]] = self.make_imf(order[0])
+            imfs[order[0]].get_series_names()  # the `Dataflow` of all series, shared through the registry
+        except Exception:
+            self.logger.exception("Failed to download the series names")
+        start = tm.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+            futures = {n: executor.submit(self.run_job, n, imfs.get(n)) for n in order}
+            self.results = [futures[n].result() for n in range(len(self.jobs))]
+        self.logger.info("Ran %d jobs in %.1f s", len(self.jobs), tm.perf_counter() - start)
+
+        summary_df = pd.DataFrame([{k: v for k, v in result.items() if k not in ["metrics", "data"]}
+                                   for result in self.results])
+        summary_df.columns = [c.upper() for c in summary_df.columns]
+        os.makedirs(self.outdir, exist_ok=True)
+        summary_df.to_csv(os.path.join(self.outdir, "batch_summary.csv"), index=False)
+        return summary_df
+
+    def get_data(self, n):
+        """
+        It returns the data of a job after `run`, from memory or from its output file.
+
+        Args:
+          n: the number of the job
+
+        Returns:
+          A Pandas dataframe, or `None` if the job has no data.
+        """
+        result = self.results[n]
+        if result["data"] is not None:
+            return result["data"]
+        if result["outfile"] is None:
+            return None
+        return self.make_imf(n).read_df(result["outfile"])
+
+    def close(self):
+        """
+        It closes the pooled connections of the transport if the batch created it.
+        """
+        if self._is_own_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
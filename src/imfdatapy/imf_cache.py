@@ -0,0 +1,257 @@
+"""
+Persistent on-disk cache of responses from the IMF data server.
+
+"""
+
+import gzip
+import hashlib
+import json as js
+import os
+import threading
+import time as tm
+from urllib.parse import urlparse
+
+import requests
+
+DAY_SEC = 24 * 60 * 60
+
+# time to live in seconds per SDMX_JSON endpoint; 0 disables caching of the endpoint
+DEFAULT_TTL = {
+    "Dataflow": 7 * DAY_SEC,
+    "DataStructure": 7 * DAY_SEC,
+    "CodeList": 7 * DAY_SEC,
+    "GenericMetadata": 7 * DAY_SEC,
+    "CompactData": 0,
+}
+
+
+class ResponseCache:
+    """
+    A content-addressed cache of responses keyed by url. Each entry is a gzip compressed body with a small json
+    file of meta data. Entries expire after a time to live set per endpoint, after which they are revalidated with the
+    server using `ETag` or `Last-Modified` where available. The least recently used entries are evicted when the cache
+    grows beyond `max_bytes`.
+    """
+
+    def __init__(self, cachedir="cache", ttl=None, max_bytes=1024 ** 3):
+        """
+        This function initializes the cache in a given directory.
+
+        Args:
+          cachedir: the directory where the responses will be saved. Defaults to 'cache'.
+          ttl: dictionary of time to live in seconds per endpoint, e.g. `{"CodeList": 3600}`, that overrides
+               `DEFAULT_TTL`.
+          max_bytes: maximum size of the cache on disk in bytes. Defaults to 1 GiB.
+        """
+        self.cachedir = cachedir
+        self.ttl = dict(DEFAULT_TTL)
+        if ttl is not None:
+            self.ttl.update(ttl)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if not os.path.exists(self.cachedir):
+            os.makedirs(self.cachedir, exist_ok=True)
+        # the size on disk is computed by the first `store`, so that creating a cache does not scan the directory
+        self._size = None
+
+    def get_ttl(self, url):
+        """
+        It finds the time to live of a url from the name of its endpoint.
+
+        Args:
+          url: the url of a request
+
+        Returns:
+          Time to live in seconds, 0 if responses of the url are not cached.
+        """
+        for segment in urlparse(url).path.split("/"):
+            if segment in self.ttl:
+                return self.ttl[segment]
+        return 0
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        subdir = os.path.join(self.cachedir, key[:2])
+        return os.path.join(subdir, f"{key}.json.gz"), os.path.join(subdir, f"{key}.meta")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cachedir):
+            for f in files:
+                if f.endswith(".json.gz"):
+                    body_file = os.path.join(root, f)
+                    yield body_file, os.path.getmtime(body_file)
+
+    def lookup(self, url):
+        """
+        It looks up the cached response of a url.
+
+        Args:
+          url: the url of a request
+
+        Returns:
+          A tuple of the body as bytes, its meta data dictionary, and True if the entry is still fresh.
+          `(None, None, False)` if the url is not in the cache.
+        """
+        ttl = self.get_ttl(url)
+        if ttl <= 0:
+            return None, None, False
+        body_file, meta_file = self._paths(url)
+        try:
+            with open(meta_file, "r") as f:
+                meta = js.load(f)
+            with gzip.open(body_file, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None, False
+        try:
+            os.utime(body_file)  # last access time for LRU eviction
+        except OSError:
+            pass
+        return body, meta, (tm.time() - meta["stored"]) < ttl
+
+    def store(self, url, rq):
+        """
+        It saves a successful response in the cache, and evicts least recently used entries if the cache is full.
+        Only bodies that are a non-empty json object are saved, so that e.g. an error page with status 200 is not
+        served from the cache.
+
+        Args:
+          url: the url of the request
+          rq: the `requests.Response` object
+        """
+        if self.get_ttl(url) <= 0 or rq.status_code != 200 or len(rq.content) == 0:
+            return
+        if not self.is_valid_body(rq.content):
+            return
+        meta = {
+            "url": url,
+            "stored": tm.time(),
+            "etag": rq.headers.get("ETag"),
+            "last_modified": rq.headers.get("Last-Modified"),
+        }
+        body_file, meta_file = self._paths(url)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(os.path.getsize(f) for f, _ in self._entries())
+            os.makedirs(os.path.dirname(body_file), exist_ok=True)
+            old_size = os.path.getsize(body_file) if os.path.exists(body_file) else 0
+            tmp_file = f"{body_file}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_file, "wb", compresslevel=1) as f:
+                f.write(rq.content)
+            os.replace(tmp_file, body_file)
+            with open(meta_file, "w") as f:
+                js.dump(meta, f)
+            self._size += os.path.getsize(body_file) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def refresh(self, url):
+        """
+        It marks a cached entry as fresh again after the server confirmed that it has not changed.
+
+        Args:
+          url: the url of the request
+        """
+        _, meta_file = self._paths(url)
+        with self._lock:
+            try:
+                with open(meta_file, "r") as f:
+                    meta = js.load(f)
+                meta["stored"] = tm.time()
+                with open(meta_file, "w") as f:
+                    js.dump(meta, f)
+            except (OSError, ValueError):
+                pass
+
+    def invalidate(self, url):
+        """
+        It removes the cached response of a url.
+
+        Args:
+          url: the url of the request
+        """
+        body_file, _ = self._paths(url)
+        with self._lock:
+            if os.path.exists(body_file):
+                if self._size is not None:
+                    self._size -= os.path.getsize(body_file)
+                self._remove(body_file)
+
+    def _evict(self):
+        for body_file, _ in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self._size <= self.max_bytes:
+                break
+            self._size -= os.path.getsize(body_file)
+            self._remove(body_file)
+
+    @staticmethod
+    def _remove(body_file):
+        meta_file = body_file[:-len(".json.gz")] + ".meta"
+        for f in [body_file, meta_file]:
+            if os.path.exists(f):
+                os.remove(f)
+
+    def clear(self):
+        """
+        It removes all entries from the cache.
+        """
+        with self._lock:
+            for body_file, _ in list(self._entries()):
+                self._remove(body_file)
+            self._size = 0
+
+    @staticmethod
+    def is_valid_body(body):
+        """
+        It checks whether a response body is a non-empty json object, as the responses of the IMF data server are.
+
+        Args:
+          body: the body as bytes
+
+        Returns:
+          True if the body is a non-empty json object.
+        """
+        try:
+            json = js.loads(body)
+        except ValueError:
+            return False
+        return isinstance(json, dict) and len(json) >= 1
+
+    @staticmethod
+    def revalidation_headers(meta):
+        """
+        It creates the conditional request headers for a cached entry.
+
+        Args:
+          meta: meta data dictionary of a cached entry
+
+        Returns:
+          A dictionary of request headers, empty if the server gave no validators.
+        """
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    @staticmethod
+    def to_response(url, body):
+        """
+        It wraps a cached body in a `requests.Response` object.
+
+        Args:
+          url: the url of the request
+          body: the cached body as bytes
+
+        Returns:
+          A `requests.Response` object with status code 200.
+        """
+        rq = requests.Response()
+        rq.status_code = 200
+        rq.url = url
+        rq._content = body
+        rq.encoding = "utf-8"
+        rq.headers["X-Cache"] = "HIT"
+        return rq
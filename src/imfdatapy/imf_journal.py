@@ -0,0 +1,241 @@
+"""
+Journal of the chunks of a download job, so that an interrupted download resumes where it stopped.
+
+"""
+
+import hashlib
+import json as js
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    from .imf_store import STORE_FORMATS, read_frame, write_frame
+except ImportError:
+    from imf_store import STORE_FORMATS, read_frame, write_frame
+
+
+class JobJournal:
+    """
+    A persistent journal of the chunks of a download job in a directory `{root}/{job_id}`, where the job id is a hash
+    of the query, so that running the same query again opens the same journal. Each completed chunk of countries,
+    indicators and years is appended to the file 'journal.jsonl' as soon as its observations are saved to a result
+    file of the job, and each chunk that could not be downloaded is appended with its error. A rerun of the query
+    reads the results of the completed chunks and downloads only the countries and indicators that are missing.
+    When the job is finished, the result files are removed, and the next run of the query starts a new job.
+    """
+
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+    def __init__(self, root, query, file_format="csv", compression=None):
+        """
+        This function opens the journal of a query, and starts a new job if the last one is finished.
+
+        Args:
+          root: the directory of the journals
+          query: dictionary of json values that identifies the job, e.g. the series, countries and indicators
+          file_format: format of the result files, one of 'csv', 'parquet' or 'feather'. Defaults to 'csv'.
+          compression: compression of Parquet or Feather files. Defaults to None for the default of the format.
+        """
+        if file_format not in STORE_FORMATS:
+            raise ValueError(f"Unknown journal format '{file_format}', expected one of {list(STORE_FORMATS)}")
+        self.query = query
+        self.job_id = self.gen_job_id(query)
+        self.jobdir = os.path.join(root, self.job_id)
+        self.path = os.path.join(self.jobdir, "journal.jsonl")
+        self.file_format = file_format
+        self.compression = compression
+        with JobJournal._locks_lock:
+            self._lock = JobJournal._locks.setdefault(os.path.abspath(self.jobdir), threading.RLock())
+        os.makedirs(self.jobdir, exist_ok=True)
+        with self._lock:
+            self.entries, self.status = self._replay()
+            if self.status != "running":
+                self._start()
+
+    @staticmethod
+    def gen_job_id(query):
+        """
+        It generates the id of the job of a query.
+
+        Args:
+          query: dictionary of json values
+
+        Returns:
+          A hexadecimal hash of the query.
+        """
+        return hashlib.sha1(js.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec="seconds")
+
+    def _replay(self):
+        entries, status = [], None
+        if not os.path.exists(self.path):
+            return entries, status
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = js.loads(line)
+                except ValueError:  # the last line of an interrupted write
+                    continue
+                if "job" in event:
+                    status = event["job"]
+                else:
+                    entries.append(event)
+        return entries, status
+
+    def _append(self, event):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(js.dumps(event) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _start(self):
+        for f in os.listdir(self.jobdir):
+            if f.startswith("chunk-"):
+                os.remove(os.path.join(self.jobdir, f))
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(js.dumps({"job": "running", "query": self.query, "time": self._now()}) + "\n")
+        self.entries, self.status = [], "running"
+
+    @staticmethod
+    def _cells(entry):
+        return {(cont, ind) for cont in entry["countries"] for ind in entry["indicators"]}
+
+    def done_cells(self):
+        """
+        It finds the (country, indicator) cells of the completed chunks.
+
+        Returns:
+          A set of tuples of a country and an indicator.
+        """
+        with self._lock:
+            done = set()
+            for entry in self.entries:
+                if entry["status"] == "done":
+                    done |= self._cells(entry)
+            return done
+
+    def pending_groups(self, countries, indicators):
+        """
+        It finds the countries and indicators of a query that have not been downloaded yet, including those of
+        failed chunks.
+
+        Args:
+          countries: list of ISO-2 codes of the countries
+          indicators: list of indicator codes
+
+        Returns:
+          A list of tuples of a list of countries and a list of their missing indicators. Countries missing the same
+          indicators are grouped together.
+        """
+        done = self.done_cells()
+        groups = {}
+        for cont in countries:
+            missing = tuple(ind for ind in indicators if (cont, ind) not in done)
+            if len(missing) > 0:
+                groups.setdefault(missing, []).append(cont)
+        return [(conts, list(missing)) for missing, conts in groups.items()]
+
+    def record_done(self, countries, indicators, start_time, end_time, df, url=None):
+        """
+        It saves the observations of a completed chunk to a result file and appends the chunk to the journal.
+
+        Args:
+          countries: list of countries of the chunk
+          indicators: list of indicators of the chunk
+          start_time: first requested year, or `None` for the earliest period
+          end_time: last requested year, or `None` for the latest period
+          df: Pandas dataframe of the observations, as returned by `IMF.parse_compact_data`
+          url: the url of the chunk. Defaults to None.
+        """
+        with self._lock:
+            result = None
+            if df.shape[0] > 0:
+                result = os.path.join(self.jobdir, f"chunk-{len(self.entries):05d}{STORE_FORMATS[self.file_format]}")
+                write_frame(df, result, self.file_format, self.compression)
+            entry = {"countries": list(countries), "indicators": list(indicators), "start_time": start_time,
+                     "end_time": end_time, "status": "done", "observations": int(df.shape[0]), "result": result,
+                     "url": url, "error": None, "time": self._now()}
+            self._append(entry)
+            self.entries.append(entry)
+
+    def record_failed(self, countries, indicators, start_time, end_time, error, url=None):
+        """
+        It appends a chunk that could not be downloaded to the journal.
+
+        Args:
+          countries: list of countries of the chunk
+          indicators: list of indicators of the chunk
+          start_time: first requested year, or `None` for the earliest period
+          end_time: last requested year, or `None` for the latest period
+          error: description of the failure
+          url: the url of the chunk. Defaults to None.
+        """
+        with self._lock:
+            entry = {"countries": list(countries), "indicators": list(indicators), "start_time": start_time,
+                     "end_time": end_time, "status": "failed", "observations": 0, "result": None, "url": url,
+                     "error": error, "time": self._now()}
+            self._append(entry)
+            self.entries.append(entry)
+
+    def failed(self):
+        """
+        It finds the failed chunks whose countries and indicators have not been downloaded by a later chunk.
+
+        Returns:
+          A list of journal entries.
+        """
+        done = self.done_cells()
+        with self._lock:
+            return [entry for entry in self.entries
+                    if entry["status"] == "failed" and not self._cells(entry) <= done]
+
+    def read_results(self):
+        """
+        It reads the observations of the completed chunks.
+
+        Returns:
+          A Pandas dataframe, empty if no chunk with observations has been completed.
+        """
+        with self._lock:
+            frames = [read_frame(entry["result"], self.file_format) for entry in self.entries
+                      if entry["status"] == "done" and entry["result"] is not None]
+        frames = [df for df in frames if df.shape[0] > 0]
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=0, ignore_index=True)
+
+    def finish(self):
+        """
+        It marks the job as finished and removes its result files, once the observations are saved elsewhere. The
+        entries remain in the journal until the next run of the query.
+        """
+        with self._lock:
+            for entry in self.entries:
+                if entry["result"] is not None and os.path.exists(entry["result"]):
+                    os.remove(entry["result"])
+            self._append({"job": "finished", "time": self._now()})
+            self.status = "finished"
+
+    def to_df(self):
+        """
+        It lists the chunks of the journal.
+
+        Returns:
+          A Pandas dataframe with a row per chunk and its countries, indicators, years, status, number of
+          observations, result file, url, error and time.
+        """
+        with self._lock:
+            rows = [{**entry, "countries": "+".join(entry["countries"]), "indicators": "+".join(entry["indicators"])}
+                    for entry in self.entries]
+        columns = ["countries", "indicators", "start_time", "end_time", "status", "observations", "result", "url",
+                   "error", "time"]
+        df = pd.DataFrame(rows, columns=columns)
+        df.columns = [c.upper() for c in df.columns]
+        return df
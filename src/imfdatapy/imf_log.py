@@ -1,47 +1,96 @@
 import logging.config
 from datetime import datetime
 import os
+import threading
+
+LOGGER_NAME = "imfdatapy_log"
 
 
 class LogFile:
-    def __init__(self, logdir="log", is_log_to_screen=True):
+    """
+    The logging setup of the `imfdatapy_log` logger. It is idempotent: the logger has at most one log file and one
+    console handler, so that creating many `IMF` objects in a long-running process neither repeats log lines nor leaks
+    file descriptors. All objects with the same log directory write to the log file opened by the first of them; an
+    object with another log directory closes it and starts a new log file there. As with the console handler, the
+    logger follows the last object: an object with `is_log_to_file=False` closes the log file of earlier objects.
+    """
+
+    # the file handler, its log directory and the console handler, shared by all objects of the process
+    _file_handler = None
+    _file_logdir = None
+    _console_handler = None
+    _lock = threading.Lock()
+
+    def __init__(self, logdir="log", is_log_to_screen=True, is_log_to_file=True):
 
         self.is_log_to_screen = is_log_to_screen
+        self.is_log_to_file = is_log_to_file
 
         time_stamp = str(datetime.now())[:19].replace(" ", "-").replace(":", "-")
 
         logdir = f"{logdir}{os.sep}" if logdir[-1] != os.sep else logdir
         self.logdir = logdir
 
-        if not os.path.exists(self.logdir):
-            os.mkdir(self.logdir)
-
         self.log_file = f"{self.logdir}imfdatapy_{time_stamp}.log"
 
         self.log_format = "%(asctime)s %(filename)s:%(lineno)d - %(levelname)s - %(message)s"
 
     def start_log(self):
-        rootLogger = logging.getLogger()
-
-        file_handler = logging.FileHandler(self.log_file)
-        file_handler.setFormatter(logging.Formatter(self.log_format))
+        logger = logging.getLogger(LOGGER_NAME)
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
 
-        if self.is_log_to_screen:
-            consoleHandler = logging.StreamHandler()
-            consoleHandler.setFormatter(logging.Formatter(self.log_format))
-            rootLogger.addHandler(consoleHandler)
-        else:
-            # Remove consoleHandler if it exists
-            for handler in rootLogger.handlers:
-                if isinstance(handler, logging.StreamHandler):
-                    rootLogger.removeHandler(handler)
+        is_new_file = False
+        with LogFile._lock:
+            if self.is_log_to_screen:
+                if LogFile._console_handler is None:
+                    LogFile._console_handler = logging.StreamHandler()
+                    LogFile._console_handler.setFormatter(logging.Formatter(self.log_format))
+                if LogFile._console_handler not in logger.handlers:
+                    logger.addHandler(LogFile._console_handler)
+            elif LogFile._console_handler is not None:
+                logger.removeHandler(LogFile._console_handler)
 
-        logger = logging.getLogger("imfdatapy_log")
-        logger.setLevel(logging.INFO)
+            if self.is_log_to_file:
+                logdir = os.path.abspath(self.logdir)
+                if LogFile._file_handler is not None and LogFile._file_logdir != logdir:
+                    logger.removeHandler(LogFile._file_handler)
+                    LogFile._file_handler.close()
+                    LogFile._file_handler = None
+                if LogFile._file_handler is None:
+                    os.makedirs(self.logdir, exist_ok=True)
+                    LogFile._file_handler = logging.FileHandler(self.log_file)
+                    LogFile._file_handler.setFormatter(logging.Formatter(self.log_format))
+                    LogFile._file_logdir = logdir
+                    is_new_file = True
+                else:
+                    self.log_file = LogFile._file_handler.baseFilename
+                if LogFile._file_handler not in logger.handlers:
+                    logger.addHandler(LogFile._file_handler)
+            elif LogFile._file_handler is not None:
+                logger.removeHandler(LogFile._file_handler)
+                LogFile._file_handler.close()
+                LogFile._file_handler = None
+                LogFile._file_logdir = None
 
-        logger.addHandler(file_handler)
+        if is_new_file:
+            logger.info("Current directory %s", os.getcwd())
+            logger.info("Started log file in .%s%s", os.sep, self.log_file)
 
-        logger.info(f"Current directory {os.getcwd()}")
-        logger.info(f"Started log file in .{os.sep}{self.log_file}")
+        return logger
 
-        return logger
\ No newline at end of file
+    @classmethod
+    def stop_log(cls):
+        """
+        It removes the handlers added by `start_log` from the logger and closes the log file. The next `start_log`
+        opens a new log file.
+        """
+        logger = logging.getLogger(LOGGER_NAME)
+        with cls._lock:
+            for handler in [cls._file_handler, cls._console_handler]:
+                if handler is not None:
+                    logger.removeHandler(handler)
+                    handler.close()
+            cls._file_handler = None
+            cls._file_logdir = None
+            cls._console_handler = None
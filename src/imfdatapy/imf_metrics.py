@@ -0,0 +1,158 @@
+"""
+Metrics of the requests and of the processing stages of downloads from the IMF data server.
+
+"""
+
+import threading
+import time as tm
+from contextlib import contextmanager
+
+# name, type and description of each metric; the names ending in '_sec' are seconds
+METRICS = {
+    "requests": ("counter", "Requests sent to the data server."),
+    "cache_hits": ("counter", "Responses served from the response cache without a request."),
+    "retries": ("counter", "Requests sent again after a failure."),
+    "bytes": ("counter", "Bytes of the response bodies received from the data server."),
+    "rows": ("counter", "Observations parsed from CompactData responses."),
+    "downloads": ("counter", "Downloads of data, e.g. calls of download_data."),
+    "rate_limit_sleep_sec": ("counter", "Seconds spent waiting for the rate limiter."),
+    "retry_sleep_sec": ("counter", "Seconds spent waiting before retries."),
+    "parse_sec": ("counter", "Seconds spent parsing CompactData responses."),
+    "merge_sec": ("counter", "Seconds spent merging the observations with the meta data, deduplicating and sorting."),
+    "output_sec": ("counter", "Seconds spent writing output files."),
+    "download_sec": ("counter", "Seconds spent in downloads."),
+}
+
+
+class Metrics:
+    """
+    Thread-safe counters of the requests and the processing time of `IMF` objects, by series. Each `IMF` object has
+    its own `metrics`, whose counts are also added to the process-wide aggregate returned by `shared`, so that a
+    scheduler can track all downloads of a process. The metrics of an `IMF` object are reset at the start of each
+    `download_data`, `iter_data` and `download_all`, so that they cover its last download, while the aggregate keeps
+    counting. The counters are exported as a dictionary or in the Prometheus text format.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, series=None, parent=None):
+        """
+        This function initializes the counters.
+
+        Args:
+          series: the series counted by default, e.g. 'IFS'. Defaults to None for no series.
+          parent: a `Metrics` object to which all counts are also added, e.g. `Metrics.shared()`. Defaults to None.
+        """
+        self.series = series
+        self.parent = parent
+        self._lock = threading.Lock()
+        self._values = {}
+
+    @classmethod
+    def shared(cls):
+        """
+        It returns the process-wide metrics aggregated over all `IMF` objects, creating them on first use.
+
+        Returns:
+          The shared `Metrics` object.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def inc(self, name, value=1, series=None):
+        """
+        It adds a value to a metric.
+
+        Args:
+          name: the name of the metric, one of `METRICS`
+          value: the value to add. Defaults to 1.
+          series: the series of the value. Defaults to None for the series of the object.
+        """
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric '{name}', expected one of {list(METRICS)}")
+        series = series if series is not None else self.series
+        with self._lock:
+            values = self._values.setdefault(series, {})
+            values[name] = values.get(name, 0) + value
+        if self.parent is not None:
+            self.parent.inc(name, value, series=series)
+
+    @contextmanager
+    def time(self, name, series=None):
+        """
+        It adds the seconds spent in a `with` block to a metric.
+
+        Args:
+          name: the name of the metric, e.g. 'parse_sec'
+          series: the series of the value. Defaults to None for the series of the object.
+        """
+        start = tm.perf_counter()
+        try:
+            yield
+        finally:
+            self.inc(name, tm.perf_counter() - start, series=series)
+
+    def get(self, name, series=None):
+        """
+        It reads a metric.
+
+        Args:
+          name: the name of the metric
+          series: the series to read. Defaults to None for the sum over all series.
+
+        Returns:
+          The value of the metric.
+        """
+        return self.to_dict(series=series)[name]
+
+    def reset(self):
+        """
+        It sets all metrics to zero. The parent metrics are not changed.
+        """
+        with self._lock:
+            self._values = {}
+
+    def to_dict(self, series=None):
+        """
+        It returns the values of all metrics.
+
+        Args:
+          series: the series to report. Defaults to None for the sum over all series.
+
+        Returns:
+          A dictionary from the name of each metric in `METRICS` to its value.
+        """
+        with self._lock:
+            rows = list(self._values.values()) if series is None else [self._values.get(series, {})]
+        result = {}
+        for name in METRICS:
+            value = sum(values.get(name, 0) for values in rows)
+            result[name] = round(value, 6) if name.endswith("_sec") else int(value)
+        return result
+
+    def to_prometheus(self, prefix="imfdatapy"):
+        """
+        It exports the metrics in the Prometheus text format, with a sample per series labelled by the series code,
+        e.g. 'imfdatapy_requests_total{series="IFS"} 12'.
+
+        Args:
+          prefix: the prefix of the metric names. Defaults to 'imfdatapy'.
+
+        Returns:
+          The metrics as a string.
+        """
+        with self._lock:
+            series_list = sorted(self._values, key=lambda s: "" if s is None else s)
+        values = {series: self.to_dict(series=series) for series in series_list}
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            metric = f"{prefix}_{name[:-4] + '_seconds' if name.endswith('_sec') else name}_total"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for series in series_list:
+                label = "" if series is None else '{series="' + series.replace('\\', '\\\\').replace('"', '\\"') + '"}'
+                lines.append(f"{metric}{label} {values[series][name]}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,471 @@
+"""
+A local stand-in for the SDMX_JSON service of the IMF data server, backed by recorded or generated fixtures, for
+offline tests and benchmarks.
+
+"""
+
+import gzip
+import json as js
+import math
+import os
+import random
+import threading
+import time as tm
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import product
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# path of the SDMX_JSON service on the server
+SERVICE_PATH = "/REST/SDMX_JSON.svc/"
+
+FREQ_NAMES = {'A': 'Annual', 'Q': 'Quarterly', 'M': 'Monthly'}
+
+
+def gen_time_periods(freq, start_year, n_years):
+    """
+    It generates the SDMX time periods of a frequency.
+
+    Args:
+      freq: the frequency code, 'A', 'Q' or 'M'
+      start_year: the first year
+      n_years: the number of years
+
+    Returns:
+      A list of time periods, e.g. ['2000-Q1', '2000-Q2', ...].
+    """
+    years = range(start_year, start_year + n_years)
+    if freq == 'Q':
+        return [f"{year}-Q{q}" for year in years for q in range(1, 5)]
+    if freq == 'M':
+        return [f"{year}-{m:02d}" for year in years for m in range(1, 13)]
+    return [str(year) for year in years]
+
+
+def code_list(codes):
+    """
+    It generates the response of a CodeList request.
+
+    Args:
+      codes: list of tuples of a code and its description
+
+    Returns:
+      The json object of the response.
+    """
+    return {"Structure": {"CodeLists": {"CodeList": {"Code": [
+        {"@value": value, "Description": {"@xml:lang": "en", "#text": text}} for value, text in codes]}}}}
+
+
+def gen_fixtures(series, dimensions, freqs=('A', 'Q'), start_year=2000, n_years=10, name=None, seed=0):
+    """
+    It generates the fixtures of a synthetic series, in the format of the responses of the IMF data server: the
+    dataflow, the data structure, the codelists, the generic metadata of the frequencies and the observations of
+    all combinations of codes.
+
+    Args:
+      series: the series code, e.g. 'IFS'
+      dimensions: list of tuples of the concept, e.g. 'REF_AREA', the codelist, e.g. 'CL_AREA_IFS', and a list of
+                  tuples of the codes and descriptions of each dimension after the frequency
+      freqs: the frequency codes. Defaults to ('A', 'Q').
+      start_year: the first year of the observations. Defaults to 2000.
+      n_years: the number of years of observations. Defaults to 10.
+      name: the name of the series. Defaults to None for the series code.
+      seed: seed of the random observations. Defaults to 0.
+
+    Returns:
+      A dictionary from endpoint, e.g. 'CodeList/CL_AREA_IFS', to the json object of its response.
+    """
+    rng = random.Random(seed)
+    fixtures = {
+        "Dataflow": {"Structure": {"Dataflows": {"Dataflow": [
+            {"@id": f"DS-{series}", "KeyFamilyRef": {"KeyFamilyID": series, "KeyFamilyAgencyID": "IMF"},
+             "Name": {"@xml:lang": "en", "#text": name if name is not None else f"{series} series"}}]}}},
+        f"DataStructure/{series}": {"Structure": {"KeyFamilies": {"KeyFamily": {"Components": {"Dimension": [
+            {"@conceptRef": "FREQ", "@codelist": "CL_FREQ"},
+            *[{"@conceptRef": concept, "@codelist": codelist} for concept, codelist, _ in dimensions]]}}}}},
+        f"GenericMetadata/{series}": {"GenericMetadata": {"MetadataSet": {"AttributeValueSet": [
+            {"ReportedAttribute": [{}, {"@conceptID": "FREQ", "ReportedAttribute": [
+                {"Value": {"#text": FREQ_NAMES.get(freq, freq)}}, {}, {"Value": {"#text": freq}}]}]}
+            for freq in freqs]}}},
+    }
+    fixtures["CodeList/CL_FREQ"] = code_list([(freq, FREQ_NAMES.get(freq, freq)) for freq in freqs])
+    for _, codelist, codes in dimensions:
+        fixtures[f"CodeList/{codelist}"] = code_list(codes)
+
+    data = []
+    for freq in freqs:
+        periods = gen_time_periods(freq, start_year, n_years)
+        for codes in product(*[[value for value, _ in codes] for _, _, codes in dimensions]):
+            level = rng.uniform(10, 1000)
+            obs = [{"@TIME_PERIOD": period, "@OBS_VALUE": str(round(level * (1 + 0.01 * n), 4))}
+                   for n, period in enumerate(periods)]
+            data.append({"@FREQ": freq, **{f"@{concept}": code for (concept, _, _), code in zip(dimensions, codes)},
+                         "@UNIT_MULT": "6", "@TIME_FORMAT": "P1Y" if freq == 'A' else "P3M", "Obs": obs})
+    fixtures[f"CompactData/{series}"] = {"CompactData": {"DataSet": {"Series": data}}}
+    return fixtures
+
+
+def merge_fixtures(*fixtures):
+    """
+    It merges the fixtures of several series, joining their dataflows.
+
+    Args:
+      fixtures: dictionaries of fixtures, see `gen_fixtures`
+
+    Returns:
+      A dictionary of fixtures.
+    """
+    merged = {}
+    for fixture in fixtures:
+        for endpoint, json in fixture.items():
+            if endpoint == "Dataflow" and endpoint in merged:
+                dataflows = merged[endpoint]["Structure"]["Dataflows"]["Dataflow"]
+                ids = {dataflow["@id"] for dataflow in dataflows}
+                dataflows.extend(dataflow for dataflow in json["Structure"]["Dataflows"]["Dataflow"]
+                                 if dataflow["@id"] not in ids)
+            else:
+                merged[endpoint] = js.loads(js.dumps(json))
+    return merged
+
+
+def save_fixtures(fixtures, fixturedir):
+    """
+    It saves fixtures as json files, one per endpoint, e.g. '{fixturedir}/CodeList/CL_AREA_IFS.json'.
+
+    Args:
+      fixtures: dictionary of fixtures, see `gen_fixtures`
+      fixturedir: the directory of the fixtures
+    """
+    for endpoint, json in fixtures.items():
+        outfile = os.path.join(fixturedir, *endpoint.split("/")) + ".json"
+        os.makedirs(os.path.dirname(outfile), exist_ok=True)
+        with open(outfile, "w", encoding="utf-8") as f:
+            js.dump(json, f)
+
+
+def load_fixtures(fixturedir):
+    """
+    It loads the fixtures saved by `save_fixtures` or recorded by `RecordingTransport`.
+
+    Args:
+      fixturedir: the directory of the fixtures
+
+    Returns:
+      A dictionary from endpoint to the json object of its response.
+    """
+    fixtures = {}
+    for root, _, files in os.walk(fixturedir):
+        for f in files:
+            if f.endswith(".json"):
+                endpoint = os.path.relpath(os.path.join(root, f[:-5]), fixturedir).replace(os.sep, "/")
+                with open(os.path.join(root, f), "r", encoding="utf-8") as infile:
+                    fixtures[endpoint] = js.load(infile)
+    return fixtures
+
+
+class RecordingTransport:
+    """
+    A transport that sends requests with another transport, e.g. a `Transport` to the IMF data server, and records
+    the valid responses as fixtures in a directory. The observations of all CompactData responses of a series are
+    recorded together, so that a `MockSDMXServer` answers any query of the recorded countries and indicators.
+    """
+
+    def __init__(self, transport, fixturedir):
+        """
+        This function initializes the transport.
+
+        Args:
+          transport: the transport that sends the requests
+          fixturedir: the directory of the fixtures
+        """
+        self.transport = transport
+        self.rate_limiter = transport.rate_limiter
+        self.fixturedir = fixturedir
+        self.fixtures = load_fixtures(fixturedir) if os.path.exists(fixturedir) else {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        """
+        It sends a GET request with the wrapped transport and records the response if it is valid.
+
+        Args:
+          url: the url to request
+          headers: optional dictionary of extra request headers
+
+        Returns:
+          The `requests.Response` object.
+        """
+        rq = self.transport.get(url, headers=headers)
+        if rq.status_code != 200 or "SDMX_JSON.svc/" not in url:
+            return rq
+        try:
+            json = rq.json()
+        except ValueError:
+            return rq
+        endpoint = url.split("SDMX_JSON.svc/")[1].split("?")[0]
+        with self._lock:
+            if endpoint.startswith("CompactData/"):
+                endpoint = "/".join(endpoint.split("/")[:2])
+                series = json["CompactData"]["DataSet"].get("Series", [])
+                series = [series] if isinstance(series, dict) else series
+                recorded = self.fixtures.setdefault(endpoint, {"CompactData": {"DataSet": {"Series": []}}})
+                recorded_series = recorded["CompactData"]["DataSet"]["Series"]
+                keys = {self.series_key(s): n for n, s in enumerate(recorded_series)}
+                for s in series:
+                    if self.series_key(s) in keys:
+                        recorded_series[keys[self.series_key(s)]] = s
+                    else:
+                        recorded_series.append(s)
+            else:
+                self.fixtures[endpoint] = json
+            save_fixtures({endpoint: self.fixtures[endpoint]}, self.fixturedir)
+        return rq
+
+    @staticmethod
+    def series_key(series):
+        return tuple(sorted((k, v) for k, v in series.items() if k != "Obs" and isinstance(v, str)))
+
+
+class MockSDMXServer:
+    """
+    A local HTTP server that answers the `Dataflow`, `DataStructure`, `CodeList`, `GenericMetadata` and `CompactData`
+    requests of the SDMX_JSON service from fixtures. CompactData requests are answered by filtering the recorded
+    observations of the series by the codes of the key and the `startPeriod` and `endPeriod` years. The server can
+    add latency, fail requests at random with an error status or by resetting the connection, fail requests for too
+    many series, and reject requests above a rate limit with status 429 and a `Retry-After` header. Point `IMF.url`
+    to `url` to use it.
+    """
+
+    def __init__(self, fixtures=None, latency_sec=0, jitter_sec=0, error_rate=0, error_status=503, reset_rate=0,
+                 rate_limit=None, max_series=None, seed=None, host="127.0.0.1", port=0):
+        """
+        This function initializes the server, which is started by `start`.
+
+        Args:
+          fixtures: dictionary from endpoint to the json object of its response, see `gen_fixtures`, or the
+                    directory of fixtures, see `load_fixtures`. Defaults to None for no fixtures.
+          latency_sec: seconds added to each response. Defaults to 0.
+          jitter_sec: maximum of random seconds added to the latency. Defaults to 0.
+          error_rate: probability that a request fails with `error_status`. Defaults to 0.
+          error_status: the status of failed requests. Defaults to 503.
+          reset_rate: probability that the connection of a request is closed without a response. Defaults to 0.
+          rate_limit: tuple of the maximum number of requests in a window and the window in seconds, e.g. (10, 5)
+                      as on the IMF data server. Defaults to None for no rate limit.
+          max_series: maximum number of series of a CompactData response, above which requests fail with status
+                      500. Defaults to None for no maximum.
+          seed: seed of the random latency and failures. Defaults to None for a random seed.
+          host: the host name of the server. Defaults to '127.0.0.1'.
+          port: the port of the server. Defaults to 0 for a free port.
+        """
+        self.fixtures = load_fixtures(fixtures) if isinstance(fixtures, str) else dict(fixtures or {})
+        self.latency_sec = latency_sec
+        self.jitter_sec = jitter_sec
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reset_rate = reset_rate
+        self.rate_limit = rate_limit
+        self.max_series = max_series
+        self.host = host
+        self.port = port
+        self.url = None
+        self._random = random.Random(seed)
+        self._stamps = deque()
+        self._stats = {"requests": 0, "errors": 0, "resets": 0, "rate_limited": 0, "bytes": 0, "endpoints": {}}
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        """
+        It starts the server in a background thread.
+
+        Returns:
+          The url of the SDMX_JSON service, e.g. 'http://127.0.0.1:8080/REST/SDMX_JSON.svc/'.
+        """
+        self._httpd = ThreadingHTTPServer((self.host, self.port), MockRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        self.url = f"http://{self.host}:{self.port}{SERVICE_PATH}"
+        return self.url
+
+    def stop(self):
+        """
+        It stops the server.
+        """
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def stats(self):
+        """
+        It reports the requests answered by the server.
+
+        Returns:
+          A dictionary with the number of 'requests', failed requests, 'errors', reset connections, 'resets', rate
+          limited requests, 'rate_limited', the bytes of the response bodies, 'bytes', and a dictionary of the number
+          of requests per endpoint, 'endpoints'.
+        """
+        with self._lock:
+            return {**self._stats, "endpoints": dict(self._stats["endpoints"])}
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _retry_after(self):
+        # seconds until a request is allowed by the rate limit, or 0 after taking a slot
+        max_requests, window_sec = self.rate_limit
+        with self._lock:
+            now = tm.monotonic()
+            while self._stamps and now - self._stamps[0] >= window_sec:
+                self._stamps.popleft()
+            if len(self._stamps) >= max_requests:
+                return window_sec - (now - self._stamps[0])
+            self._stamps.append(now)
+            return 0
+
+    def respond(self, path, accept_encoding=""):
+        """
+        It answers a request.
+
+        Args:
+          path: the path of the request, with the query
+          accept_encoding: the `Accept-Encoding` header of the request. Defaults to ''.
+
+        Returns:
+          A tuple of the status, the body and a dictionary of headers of the response, or `None` to close the
+          connection without a response.
+        """
+        parts = urlsplit(path)
+        endpoint = unquote(parts.path)
+        endpoint = endpoint[len(SERVICE_PATH):] if endpoint.startswith(SERVICE_PATH) else None
+        with self._lock:
+            self._stats["requests"] += 1
+            name = endpoint.split("/")[0] if endpoint is not None else ""
+            self._stats["endpoints"][name] = self._stats["endpoints"].get(name, 0) + 1
+            latency = self.latency_sec + (self._random.uniform(0, self.jitter_sec) if self.jitter_sec > 0 else 0)
+            draw = self._random.random()
+        if latency > 0:
+            tm.sleep(latency)
+
+        if self.rate_limit is not None:
+            retry_after = self._retry_after()
+            if retry_after > 0:
+                self._count("rate_limited")
+                return self.encode(429, {"Error": "Too many requests"}, accept_encoding,
+                                   {"Retry-After": str(max(1, math.ceil(retry_after)))})
+        if draw < self.reset_rate:
+            self._count("resets")
+            return None
+        if draw < self.reset_rate + self.error_rate:
+            self._count("errors")
+            return self.encode(self.error_status, {"Error": "Injected error"}, accept_encoding)
+
+        if endpoint is not None and endpoint.startswith("CompactData/"):
+            status, json = self.compact_data(endpoint, parse_qs(parts.query))
+        elif endpoint in self.fixtures:
+            status, json = 200, self.fixtures[endpoint]
+        else:
+            status, json = 404, {"Error": f"No fixture for {endpoint}"}
+        if status != 200:
+            self._count("errors")
+        return self.encode(status, json, accept_encoding)
+
+    def encode(self, status, json, accept_encoding="", headers=None):
+        """
+        It encodes the body of a response, compressed with gzip if the request accepts it.
+
+        Args:
+          status: the status of the response
+          json: the json object of the body
+          accept_encoding: the `Accept-Encoding` header of the request. Defaults to ''.
+          headers: dictionary of extra headers. Defaults to None.
+
+        Returns:
+          A tuple of the status, the body and a dictionary of headers.
+        """
+        body = js.dumps(json).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8", **(headers or {})}
+        if "gzip" in accept_encoding:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self._count("bytes", len(body))
+        return status, body, headers
+
+    def compact_data(self, endpoint, query):
+        """
+        It answers a CompactData request by filtering the observations of the series.
+
+        Args:
+          endpoint: the endpoint of the request, e.g. 'CompactData/IFS/Q.US+CA.NGDP_R_XDC.'
+          query: dictionary of the query parameters, e.g. {'startPeriod': ['2000']}
+
+        Returns:
+          A tuple of the status and the json object of the response.
+        """
+        _, series, key = (endpoint.split("/", 2) + [""])[:3]
+        data = self.fixtures.get(f"CompactData/{series}")
+        structure = self.fixtures.get(f"DataStructure/{series}")
+        if data is None or structure is None:
+            return 404, {"Error": f"No fixture for series {series}"}
+
+        concepts = [dim["@conceptRef"] for dim in
+                    structure["Structure"]["KeyFamilies"]["KeyFamily"]["Components"]["Dimension"]]
+        codes = key.split(".")
+        filters = [(f"@{concept}", set(code.split("+"))) for concept, code in zip(concepts, codes) if code != ""]
+        start = int(query["startPeriod"][0][:4]) if "startPeriod" in query else None
+        end = int(query["endPeriod"][0][:4]) if "endPeriod" in query else None
+
+        series_list = data["CompactData"]["DataSet"].get("Series", [])
+        series_list = [series_list] if isinstance(series_list, dict) else series_list
+        found = []
+        for s in series_list:
+            if not all(s.get(attr) in allowed for attr, allowed in filters):
+                continue
+            obs = s.get("Obs", [])
+            obs = [obs] if isinstance(obs, dict) else obs
+            obs = [o for o in obs if (start is None or int(o["@TIME_PERIOD"][:4]) >= start) and
+                   (end is None or int(o["@TIME_PERIOD"][:4]) <= end)]
+            if len(obs) > 0:
+                # as the IMF data server, a single observation or series is not wrapped in a list
+                found.append({**s, "Obs": obs[0] if len(obs) == 1 else obs})
+        if self.max_series is not None and len(found) > self.max_series:
+            return 500, {"Error": f"Too many series: {len(found)}"}
+        dataset = {} if len(found) == 0 else {"Series": found[0] if len(found) == 1 else found}
+        return 200, {"CompactData": {"DataSet": dataset}}
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """
+    The request handler of a `MockSDMXServer`.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        response = self.server.mock.respond(self.path, self.headers.get("Accept-Encoding", ""))
+        if response is None:
+            self.close_connection = True
+            return
+        status, body, headers = response
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
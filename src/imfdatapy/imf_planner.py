@@ -0,0 +1,232 @@
+"""
+Planning of the CompactData requests of a download: which countries and indicators are batched into one url.
+
+"""
+
+import threading
+
+# longest url accepted by the IMF data server
+MAX_URL_LEN = 2000
+
+# number of cells counted for a wildcard country or indicator key, which returns the data of all countries or indicators
+WILDCARD_CELLS = 50
+
+# kinds of failed requests caused by the size of a chunk: a url or a response too large for the server, or a
+# truncated response, i.e. a body that is not a valid json object or cannot be parsed
+SIZE_FAILURES = {"too_large", "truncated", "invalid"}
+
+# status codes of a url or a request body too large for the server, which are failures of kind 'too_large'
+TOO_LARGE_STATUS = {413, 414}
+
+
+class ChunkPlanner:
+    """
+    It packs the countries and indicators of a download into as few CompactData requests as possible. A request
+    joins countries and indicators with '+' in its key, e.g. 'Q.US+CA.NGDP_R_XDC+PCPI_IX', within a maximum url length
+    and a maximum number of (country, indicator) cells per request, which bounds the size of the response. When a
+    request fails, its chunk is split in two. If the failure is caused by the size of the chunk, see `SIZE_FAILURES`,
+    the maximum number of cells of the series is also lowered, so that later downloads of the series start with chunk
+    sizes that work. After `grow_after` chunks in a row are downloaded, the maximum is doubled again, up to
+    `max_cells`, so that a burst of failures does not shrink the chunks of the series for the life of the process.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_cells=100, max_url_len=MAX_URL_LEN, grow_after=10):
+        """
+        This function initializes the planner.
+
+        Args:
+          max_cells: initial maximum number of (country, indicator) cells per request. Defaults to 100.
+          max_url_len: maximum length of a url. Defaults to `MAX_URL_LEN`.
+          grow_after: number of chunks in a row downloaded with a lowered maximum, after which the maximum is doubled.
+                      Defaults to 10.
+        """
+        self.max_cells = max(1, max_cells)
+        self.max_url_len = max_url_len
+        self.grow_after = max(1, grow_after)
+        self._limits = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        It returns the process-wide planner shared by all `IMF` objects, creating it on first use.
+
+        Returns:
+          The shared `ChunkPlanner` object.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def count_cells(countries, indicators):
+        """
+        It counts the (country, indicator) cells of a chunk.
+
+        Args:
+          countries: list of ISO-2 codes of countries, `['']` for all countries
+          indicators: list of indicator codes, `['']` for all indicators
+
+        Returns:
+          The number of cells.
+        """
+        n_countries = sum(WILDCARD_CELLS if cont == '' else 1 for cont in countries)
+        n_indicators = sum(WILDCARD_CELLS if ind == '' else 1 for ind in indicators)
+        return max(1, n_countries) * max(1, n_indicators)
+
+    @staticmethod
+    def _pack(codes, max_items, max_chars):
+        groups, group, n_chars = [], [], 0
+        for code in codes:
+            if group and (len(group) >= max_items or n_chars + 1 + len(code) > max_chars):
+                groups.append(group)
+                group, n_chars = [], 0
+            n_chars += len(code) + (1 if group else 0)
+            group.append(code)
+        if group:
+            groups.append(group)
+        return groups
+
+    def get_max_cells(self, series):
+        """
+        It returns the maximum number of cells per request of a series.
+
+        Args:
+          series: the series code
+
+        Returns:
+          The maximum number of cells, lowered by failed requests of the series.
+        """
+        with self._lock:
+            return self._limits.get(series, self.max_cells)
+
+    def plan(self, series, countries, indicators, base_len=0):
+        """
+        It packs countries and indicators into chunks.
+
+        Args:
+          series: the series code
+          countries: list of ISO-2 codes of countries, `['']` for all countries
+          indicators: list of indicator codes, `['']` for all indicators
+          base_len: length of the url of a request without countries and indicators. Defaults to 0.
+
+        Returns:
+          A list of chunks, each a tuple of a list of countries and a list of indicators.
+        """
+        if len(countries) == 0 or len(indicators) == 0:
+            return []
+        max_cells = self.get_max_cells(series)
+        max_chars = self.max_url_len - base_len
+        n_per_indicator = WILDCARD_CELLS if countries == [''] else 1
+        ind_groups = self._pack(indicators, max(1, max_cells // n_per_indicator),
+                                max_chars - max(len(cont) for cont in countries))
+        chunks = []
+        for group in ind_groups:
+            if countries == ['']:
+                cont_groups = [countries]
+            else:
+                cont_groups = self._pack(countries, max(1, max_cells // self.count_cells(countries[:1], group)),
+                                         max_chars - len('+'.join(group)))
+            chunks.extend((cont_group, group) for cont_group in cont_groups)
+        return chunks
+
+    def _get_stats(self, series):
+        return self._stats.setdefault(series, {"max_ok_cells": 0, "n_ok": 0, "n_split": 0, "n_streak": 0})
+
+    def record_success(self, series, countries, indicators):
+        """
+        It records a chunk that has been downloaded, and raises the maximum number of cells of the series to its size if
+        it was lowered below by failed requests. After `grow_after` chunks in a row, a lowered maximum is doubled, up
+        to `max_cells`.
+
+        Args:
+          series: the series code
+          countries: list of countries of the chunk
+          indicators: list of indicators of the chunk
+        """
+        n_cells = self.count_cells(countries, indicators)
+        with self._lock:
+            stats = self._get_stats(series)
+            stats["max_ok_cells"] = max(stats["max_ok_cells"], n_cells)
+            stats["n_ok"] += 1
+            if series not in self._limits:
+                return
+            limit = max(self._limits[series], n_cells)
+            stats["n_streak"] += 1
+            if stats["n_streak"] >= self.grow_after:
+                limit, stats["n_streak"] = limit * 2, 0
+            if limit >= self.max_cells:
+                del self._limits[series]
+            else:
+                self._limits[series] = limit
+
+    def is_size_failure(self, series, n_cells, kind):
+        """
+        It decides whether a failed request is caused by the size of its chunk: a failure of `SIZE_FAILURES`, or a
+        server error of a chunk larger than any chunk of the series downloaded so far. Timeouts, refused connections,
+        rate limits and server errors of chunks of a size that has worked are taken as transient.
+
+        Args:
+          series: the series code
+          n_cells: number of cells of the chunk
+          kind: the kind of failure, see `RetryPolicy.classify`, 'too_large' for a url or a response too large for
+                the server, or 'truncated' for a response that cannot be parsed. `None` if it is not known.
+
+        Returns:
+          True if the failure is caused by the size of the chunk, or if its kind is not known.
+        """
+        if kind is None or kind in SIZE_FAILURES:
+            return True
+        return kind == "server_error" and n_cells > self._stats.get(series, {}).get("max_ok_cells", 0)
+
+    def record_failure(self, series, countries, indicators, kind=None):
+        """
+        It records a chunk whose request failed, and splits it in two, by indicators if it has several, otherwise by
+        countries. If the failure is caused by the size of the chunk, see `is_size_failure`, the maximum number of
+        cells of the series is also lowered below its size.
+
+        Args:
+          series: the series code
+          countries: list of countries of the chunk
+          indicators: list of indicators of the chunk
+          kind: the kind of failure, see `is_size_failure`. Defaults to None for a failure of an unknown kind, which
+                lowers the maximum.
+
+        Returns:
+          A list of two chunks, or an empty list if the chunk has a single cell and cannot be split.
+        """
+        n_cells = self.count_cells(countries, indicators)
+        if len(indicators) > 1:
+            half = (len(indicators) + 1) // 2
+            chunks = [(countries, indicators[:half]), (countries, indicators[half:])]
+        elif len(countries) > 1:
+            half = (len(countries) + 1) // 2
+            chunks = [(countries[:half], indicators), (countries[half:], indicators)]
+        else:
+            return []
+        with self._lock:
+            stats = self._get_stats(series)
+            stats["n_split"] += 1
+            if self.is_size_failure(series, n_cells, kind):
+                stats["n_streak"] = 0
+                self._limits[series] = max(1, min(self._limits.get(series, self.max_cells), n_cells // 2))
+        return chunks
+
+    def chunk_sizes(self):
+        """
+        It reports the chunk sizes of each series.
+
+        Returns:
+          A dictionary from series code to a dictionary with the current maximum number of cells per request,
+          'max_cells', the largest number of cells downloaded in one request, 'max_ok_cells', the number of downloaded
+          chunks, 'n_ok', the number of split chunks, 'n_split', and the number of chunks downloaded in a row since the
+          maximum was lowered or raised, 'n_streak'.
+        """
+        with self._lock:
+            return {series: {"max_cells": self._limits.get(series, self.max_cells), **stats}
+                    for series, stats in self._stats.items()}
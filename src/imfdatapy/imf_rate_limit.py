@@ -0,0 +1,105 @@
+"""
+Sliding-window rate limiter for requests to the IMF data server.
+
+"""
+
+import threading
+import time as tm
+from collections import deque
+
+
+class RateLimiter:
+    """
+    A thread-safe sliding-window rate limiter that allows at most `max_requests` requests in any `window_sec` seconds.
+    It only blocks when the budget of the current window is used up.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_requests=10, window_sec=5):
+        """
+        This function initializes the rate limiter.
+
+        Args:
+          max_requests: maximum number of requests allowed in a window. Defaults to 10.
+          window_sec: length of the sliding window in seconds. Defaults to 5.
+        """
+        self.max_requests = max_requests
+        self.window_sec = window_sec
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        It returns the process-wide rate limiter shared by all `IMF` objects, creating it on first use.
+
+        Returns:
+          The shared `RateLimiter` object.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def configure(self, max_requests=None, window_sec=None):
+        """
+        It changes the budget of the rate limiter.
+
+        Args:
+          max_requests: maximum number of requests allowed in a window. Unchanged if None.
+          window_sec: length of the sliding window in seconds. Unchanged if None.
+        """
+        with self._lock:
+            if max_requests is not None:
+                self.max_requests = max_requests
+            if window_sec is not None:
+                self.window_sec = window_sec
+
+    def reserve(self):
+        """
+        It takes a slot from the budget if one is free, without blocking.
+
+        Returns:
+          0 if a slot was taken, otherwise the number of seconds to wait before trying again.
+        """
+        with self._lock:
+            now = tm.monotonic()
+            while self._stamps and now - self._stamps[0] >= self.window_sec:
+                self._stamps.popleft()
+            if len(self._stamps) < self.max_requests:
+                self._stamps.append(now)
+                return 0
+            return self.window_sec - (now - self._stamps[0])
+
+    def acquire(self):
+        """
+        It blocks until a request is allowed by the budget and takes a slot.
+
+        Returns:
+          The number of seconds spent waiting.
+        """
+        waited = 0
+        wait = self.reserve()
+        while wait > 0:
+            tm.sleep(wait)
+            waited += wait
+            wait = self.reserve()
+        return waited
+
+
+def set_rate_limit(max_requests=None, window_sec=None):
+    """
+    It configures the process-wide rate limiter shared by all `IMF` objects.
+
+    Args:
+      max_requests: maximum number of requests allowed in a window. Unchanged if None.
+      window_sec: length of the sliding window in seconds. Unchanged if None.
+
+    Returns:
+      The shared `RateLimiter` object.
+    """
+    limiter = RateLimiter.shared()
+    limiter.configure(max_requests=max_requests, window_sec=window_sec)
+    return limiter
@@ -0,0 +1,201 @@
+"""
+Retry policy for failed requests to the IMF data server.
+
+"""
+
+import random
+import threading
+import time as tm
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# kinds of failed requests that are worth trying again
+RETRYABLE_FAILURES = {"rate_limited", "server_error", "timeout", "connection", "invalid"}
+
+
+class RetryPolicy:
+    """
+    A policy that decides whether and when a failed request is sent again. Failures are classified as 'rate_limited'
+    (429), 'server_error' (5xx), 'timeout', 'connection' (refused or reset connections), 'client_error' (other 4xx)
+    or 'invalid' (a response without a valid json object). Client errors are not retried. The others are retried
+    with exponential backoff and full jitter, `uniform(0, min(max_sec, base_sec * 2 ** (attempt - 1)))`, or after the
+    delay asked by the `Retry-After` header of the response if it is longer, as long as the deadline of the download
+    is not passed.
+    """
+
+    def __init__(self, max_attempts=5, base_sec=1, max_sec=30, deadline_sec=None, seed=None):
+        """
+        This function initializes the policy.
+
+        Args:
+          max_attempts: maximum number of attempts per request, including the first one. Defaults to 5.
+          base_sec: backoff before the first retry in seconds, doubled for each later retry. Defaults to 1.
+          max_sec: maximum backoff in seconds. Defaults to 30.
+          deadline_sec: maximum number of seconds of a download, after which failed requests are no longer
+                        retried and chunks are no longer requested. Defaults to None for no deadline.
+          seed: seed of the random jitter. Defaults to None for a random seed.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_sec = base_sec
+        self.max_sec = max_sec
+        self.deadline_sec = deadline_sec
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def classify(rq=None, error=None):
+        """
+        It classifies the outcome of a request.
+
+        Args:
+          rq: the `requests.Response` object, or `None` if the request raised an exception
+          error: the exception raised by the request, or `None`
+
+        Returns:
+          'ok' for a response with status 200, otherwise the kind of failure.
+        """
+        if error is not None:
+            if isinstance(error, requests.exceptions.Timeout):
+                return "timeout"
+            return "connection"
+        if rq is None:
+            return "connection"
+        if rq.status_code == 429:
+            return "rate_limited"
+        if rq.status_code >= 500:
+            return "server_error"
+        if rq.status_code == 408:
+            return "timeout"
+        if rq.status_code >= 400:
+            return "client_error"
+        return "ok" if rq.status_code == 200 else "invalid"
+
+    @staticmethod
+    def parse_retry_after(rq):
+        """
+        It reads the delay asked by the `Retry-After` header of a response, in seconds or as an HTTP date.
+
+        Args:
+          rq: the `requests.Response` object, or `None`
+
+        Returns:
+          The delay in seconds, or `None` if there is no valid header.
+        """
+        value = rq.headers.get("Retry-After") if rq is not None else None
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def backoff(self, attempt, rq=None):
+        """
+        It computes the wait before a retry.
+
+        Args:
+          attempt: number of attempts made so far, starting at 1
+          rq: the `requests.Response` object of the failed attempt, or `None`
+
+        Returns:
+          The wait in seconds.
+        """
+        with self._lock:
+            wait = self._random.uniform(0, min(self.max_sec, self.base_sec * 2 ** (attempt - 1)))
+        retry_after = self.parse_retry_after(rq)
+        return wait if retry_after is None else max(wait, retry_after)
+
+    def start_deadline(self):
+        """
+        It starts the clock of a download.
+
+        Returns:
+          The deadline as a `time.monotonic` value, or `None` if there is no deadline.
+        """
+        return None if self.deadline_sec is None else tm.monotonic() + self.deadline_sec
+
+    def next_wait(self, attempt, kind, rq=None, deadline=None):
+        """
+        It decides whether a failed request is retried.
+
+        Args:
+          attempt: number of attempts made so far, starting at 1
+          kind: the kind of failure, see `classify`
+          rq: the `requests.Response` object of the failed attempt, or `None`
+          deadline: the deadline of the download, see `start_deadline`. Defaults to None.
+
+        Returns:
+          The wait in seconds before the next attempt, or `None` to give up.
+        """
+        if kind not in RETRYABLE_FAILURES or attempt >= self.max_attempts:
+            return None
+        wait = self.backoff(attempt, rq)
+        if deadline is not None and tm.monotonic() + wait > deadline:
+            return None
+        return wait
+
+
+class RetryStats:
+    """
+    Thread-safe counters of the requests of an `IMF` object: the number of requests and retries, the failures by
+    kind, the time spent waiting before retries, and the requests given up after the last attempt or at the deadline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        It sets all counters to zero.
+        """
+        with self._lock:
+            self._stats = {"requests": 0, "retries": 0, "gave_up": 0, "deadline_exceeded": 0, "sleep_sec": 0.0,
+                           "failures": {}}
+
+    def record(self, kind, wait=None, is_deadline_exceeded=False):
+        """
+        It records the outcome of a request.
+
+        Args:
+          kind: 'ok' or the kind of failure, see `RetryPolicy.classify`
+          wait: the wait before the next attempt, or `None` if the request succeeded or is given up
+          is_deadline_exceeded: True if the request is given up because of the deadline of the download
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            if kind == "ok":
+                return
+            self._stats["failures"][kind] = self._stats["failures"].get(kind, 0) + 1
+            if wait is not None:
+                self._stats["retries"] += 1
+                self._stats["sleep_sec"] += wait
+            elif is_deadline_exceeded:
+                self._stats["deadline_exceeded"] += 1
+            else:
+                self._stats["gave_up"] += 1
+
+    def record_deadline(self):
+        """
+        It records a request that is not sent because the deadline of the download is exceeded.
+        """
+        with self._lock:
+            self._stats["deadline_exceeded"] += 1
+
+    def to_dict(self):
+        """
+        It returns a copy of the counters.
+
+        Returns:
+          A dictionary with the number of 'requests', 'retries', requests that 'gave_up' after their last attempt,
+          requests given up or not sent because the deadline was exceeded, 'deadline_exceeded', the seconds waited
+          before retries, 'sleep_sec', and a dictionary of 'failures' by kind.
+        """
+        with self._lock:
+            return {**self._stats, "failures": dict(self._stats["failures"])}
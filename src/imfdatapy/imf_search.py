@@ -0,0 +1,175 @@
+"""
+Search of codelists, e.g. the series names or the indicators of a series, with a prebuilt index.
+
+"""
+
+import re
+
+import numpy as np
+
+# characters that make a search term a regular expression rather than a literal substring
+REGEX_CHARS = set(".^$*+?{}[]\\|()")
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# number of rows compared to check that an index was built from a codelist
+FINGERPRINT_ROWS = 16
+
+# separates the columns of a row in the index, so that literal matches do not span two columns
+COLUMN_SEP = "\x00"
+
+
+class CodelistIndex:
+    """
+    A lowercase word index over the text columns of a codelist. A search term matches a row if it is a substring
+    of one of the text columns of the row, ignoring case, as with `Series.str.lower().str.contains()`. Literal terms
+    are looked up in the index: the words inside a term must be words of a row, and its first and last words must
+    end or start a word of the row, and only those rows are compared with the term. Terms with regular expression
+    characters are matched with one vectorized scan of each column, unless the search is literal. The results of
+    the last searches are kept, so that repeated lookups are immediate.
+    """
+
+    def __init__(self, df):
+        """
+        This function builds the index of a codelist.
+
+        Args:
+          df: Pandas dataframe of the codelist
+        """
+        self.columns = list(df.select_dtypes(include=["object", "string"]).columns)
+        self.n_rows = df.shape[0]
+        self.fingerprint = self.gen_fingerprint(df)
+        self._texts = {col: df[col].str.lower().reset_index(drop=True) for col in self.columns}
+        rows = [COLUMN_SEP.join(values) for values in
+                zip(*[texts.where(texts.notna(), "").astype(str) for texts in self._texts.values()])]
+        if len(self.columns) == 0:
+            rows = [""] * self.n_rows
+        self._rows = np.array(rows, dtype=object)
+
+        postings = {}
+        for n, row in enumerate(rows):
+            for word in set(WORD_PATTERN.findall(row)):
+                postings.setdefault(word, []).append(n)
+        self._postings = {word: np.array(rows, dtype=np.int64) for word, rows in postings.items()}
+        self._results = {}
+
+    @staticmethod
+    def gen_fingerprint(df):
+        """
+        It summarizes a codelist to check that an index was built from it.
+
+        Args:
+          df: Pandas dataframe of the codelist
+
+        Returns:
+          A hashable summary of the shape, the column names and some rows of the first column.
+        """
+        sample = ()
+        if df.shape[1] > 0 and df.shape[0] > 0:
+            positions = np.linspace(0, df.shape[0] - 1, num=min(FINGERPRINT_ROWS, df.shape[0]), dtype=np.int64)
+            sample = tuple(str(value) for value in df.iloc[positions, 0])
+        return df.shape, tuple(df.columns), sample
+
+    def matches(self, df):
+        """
+        It checks whether the index was built from a codelist.
+
+        Args:
+          df: Pandas dataframe of the codelist
+
+        Returns:
+          True if the index was built from the same codelist.
+        """
+        return self.fingerprint == self.gen_fingerprint(df)
+
+    @staticmethod
+    def is_regex(term):
+        """
+        It checks whether a search term uses regular expression characters.
+
+        Args:
+          term: the search term
+
+        Returns:
+          True if the term is a regular expression rather than a literal substring.
+        """
+        return any(c in REGEX_CHARS for c in term)
+
+    def _find_rows(self, word, is_first, is_last):
+        # rows with a word that can contain `word` at the given position of a term
+        if not is_first and not is_last:
+            return self._postings.get(word, np.array([], dtype=np.int64))
+        if is_first and is_last:
+            words = [w for w in self._postings if word in w]
+        elif is_first:
+            words = [w for w in self._postings if w.endswith(word)]
+        else:
+            words = [w for w in self._postings if w.startswith(word)]
+        if len(words) == 0:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate([self._postings[w] for w in words]))
+
+    def _find_literal(self, term):
+        words = WORD_PATTERN.findall(term)
+        if len(words) == 0:
+            candidates = np.arange(self.n_rows)
+        else:
+            # a word of the term may be a fragment of a word of the row only at the ends of the term
+            is_first = [n == 0 and term.startswith(word) for n, word in enumerate(words)]
+            is_last = [n == len(words) - 1 and term.endswith(word) for n, word in enumerate(words)]
+            order = sorted(range(len(words)), key=lambda n: is_first[n] or is_last[n])
+            candidates = None
+            for n in order:
+                rows = self._find_rows(words[n], is_first[n], is_last[n])
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+                if len(candidates) == 0:
+                    break
+        is_found = np.fromiter((term in row for row in self._rows[candidates]), dtype=bool, count=len(candidates))
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[candidates[is_found]] = True
+        return mask
+
+    def find(self, term, is_literal=False):
+        """
+        It finds the rows of the codelist that match a search term.
+
+        Args:
+          term: the search term, a substring or a regular expression
+          is_literal: True to match the term as a literal substring even if it has regular expression characters.
+                      Defaults to False.
+
+        Returns:
+          A numpy boolean array with one element per row.
+        """
+        term = term.lower()
+        is_literal = is_literal or not self.is_regex(term)
+        mask = self._results.get((term, is_literal))
+        if mask is None:
+            if is_literal:
+                mask = self._find_literal(term)
+            else:
+                mask = np.zeros(self.n_rows, dtype=bool)
+                for texts in self._texts.values():
+                    mask |= texts.str.contains(term, regex=True).to_numpy(dtype=bool, na_value=False)
+            if len(self._results) >= 256:
+                self._results.clear()
+            self._results[(term, is_literal)] = mask
+        return mask.copy()
+
+    def search(self, terms, is_literal=False):
+        """
+        It finds the rows of the codelist that match any of several search terms.
+
+        Args:
+          terms: a search term or a list of search terms
+          is_literal: True to match the terms as literal substrings. Defaults to False.
+
+        Returns:
+          A numpy boolean array with one element per row.
+        """
+        if isinstance(terms, str):
+            terms = [terms]
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for term in terms:
+            mask |= self.find(term, is_literal=is_literal)
+        return mask
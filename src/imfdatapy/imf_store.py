@@ -0,0 +1,265 @@
+"""
+Persistent local store of observations downloaded from the IMF data server.
+
+"""
+
+import json as js
+import os
+import threading
+
+import pandas as pd
+
+# file extensions of the supported partition formats
+STORE_FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+
+def read_frame(infile, file_format="csv"):
+    """
+    It reads observations parsed from CompactData responses from a file written by `write_frame`. Csv files are read
+    as strings, as parsed, with the 'Period' column converted back to datetimes.
+
+    Args:
+      infile: path of the file
+      file_format: format of the file, one of 'csv', 'parquet' or 'feather'. Defaults to 'csv'.
+
+    Returns:
+      A Pandas dataframe, empty if the file does not exist.
+    """
+    if not os.path.exists(infile):
+        return pd.DataFrame()
+    if file_format == "parquet":
+        return pd.read_parquet(infile)
+    elif file_format == "feather":
+        return pd.read_feather(infile)
+    df = pd.read_csv(infile, dtype=str)
+    if "Period" in df.columns:
+        df["Period"] = pd.to_datetime(df["Period"])
+    return df
+
+
+def write_frame(df, outfile, file_format="csv", compression=None):
+    """
+    It writes observations to a file atomically, so that an interrupted write does not leave a partial file.
+
+    Args:
+      df: Pandas dataframe of observations
+      outfile: path of the file
+      file_format: format of the file, one of 'csv', 'parquet' or 'feather'. Defaults to 'csv'.
+      compression: compression of Parquet or Feather files. Defaults to None for the default of the format.
+    """
+    os.makedirs(os.path.dirname(outfile), exist_ok=True)
+    tmp_path = f"{outfile}.{threading.get_ident()}.tmp"
+    kwargs = {} if compression is None else {"compression": compression}
+    if file_format == "parquet":
+        df.to_parquet(tmp_path, index=False, **kwargs)
+    elif file_format == "feather":
+        df.reset_index(drop=True).to_feather(tmp_path, **kwargs)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, outfile)
+
+
+class DataStore:
+    """
+    A local store of downloaded observations partitioned by series, frequency and country, in files
+    `{root}/{series}/{freq}/{country}.<format>`. A json manifest in `root` records the years that have been downloaded
+    for each indicator of a partition, so that repeated or overlapping requests only download the indicators, countries
+    and periods that are missing. Observations are kept as parsed from CompactData responses, before the merge with the
+    meta data. The indicator '*' in the manifest stands for all indicators of a partition, as downloaded by
+    `IMF.download_all`.
+    """
+
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+    def __init__(self, root="store", file_format="csv", compression=None):
+        """
+        This function initializes the store in a given directory.
+
+        Args:
+          root: the directory of the store. Defaults to 'store'.
+          file_format: format of the partition files, one of 'csv', 'parquet' or 'feather'. Defaults to 'csv'.
+          compression: compression of Parquet or Feather files. Defaults to None for the default of the format.
+        """
+        if file_format not in STORE_FORMATS:
+            raise ValueError(f"Unknown store format '{file_format}', expected one of {list(STORE_FORMATS)}")
+        self.root = root
+        self.file_format = file_format
+        self.compression = compression
+        self.manifest_path = os.path.join(root, "manifest.json")
+        # objects of the same directory share a lock, so that threads do not lose each other's updates
+        with DataStore._locks_lock:
+            self._lock = DataStore._locks.setdefault(os.path.abspath(root), threading.RLock())
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _year(time):
+        return None if time is None or time == "" else int(str(time)[:4])
+
+    @staticmethod
+    def _merge_windows(windows):
+        """
+        It merges overlapping or adjacent windows of years. `None` stands for an open start or end.
+        """
+        bounds = sorted((float("-inf") if s is None else s, float("inf") if e is None else e) for s, e in windows)
+        merged = []
+        for start, end in bounds:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return [[None if s == float("-inf") else int(s), None if e == float("inf") else int(e)] for s, e in merged]
+
+    @staticmethod
+    def _is_covered(windows, start, end):
+        for s, e in windows:
+            if (s is None or (start is not None and s <= start)) and (e is None or (end is not None and end <= e)):
+                return True
+        return False
+
+    def partition_key(self, series, freq, country):
+        return f"{series}/{freq}/{country}"
+
+    def partition_path(self, series, freq, country):
+        """
+        It finds the file of a partition.
+
+        Args:
+          series: the series code, e.g. 'IFS'
+          freq: the frequency code, e.g. 'Q'
+          country: ISO-2 code of the country
+
+        Returns:
+          The path of the partition file.
+        """
+        return os.path.join(self.root, series, freq, f"{country}{STORE_FORMATS[self.file_format]}")
+
+    def read_manifest(self):
+        """
+        It reads the manifest of the store.
+
+        Returns:
+          A dictionary from partition key, e.g. 'IFS/Q/US', to a dictionary from indicator to a list of downloaded
+          windows of years `[start, end]`, where `None` is an open start or end.
+        """
+        with self._lock:
+            if not os.path.exists(self.manifest_path):
+                return {}
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return js.load(f)
+
+    def _write_manifest(self, manifest):
+        tmp_path = f"{self.manifest_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            js.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _read_partition(self, series, freq, country):
+        return read_frame(self.partition_path(series, freq, country), self.file_format)
+
+    def _write_partition(self, df, series, freq, country):
+        write_frame(df, self.partition_path(series, freq, country), self.file_format, self.compression)
+
+    def missing(self, series, freq, country, indicators, start_time=None, end_time=None):
+        """
+        It finds the indicators of a partition whose requested years have not all been downloaded.
+
+        Args:
+          series: the series code
+          freq: the frequency code
+          country: ISO-2 code of the country
+          indicators: list of indicator codes, or `['*']` for all indicators
+          start_time: first requested year, or `None` for the earliest period
+          end_time: last requested year, or `None` for the latest period
+
+        Returns:
+          The list of missing indicators, in the order of `indicators`.
+        """
+        coverage = self.read_manifest().get(self.partition_key(series, freq, country), {})
+        start, end = self._year(start_time), self._year(end_time)
+        return [ind for ind in indicators
+                if not self._is_covered(coverage.get(ind, []) + coverage.get('*', []), start, end)]
+
+    def put(self, df, series, freq, country, indicators, start_time=None, end_time=None):
+        """
+        It upserts downloaded observations into a partition, replacing stored observations of the same indicator and
+        period, and records the requested years as downloaded for all requested indicators, including those without
+        observations.
+
+        Args:
+          df: Pandas dataframe of observations with columns 'ID' and 'Period', as returned by
+              `IMF.parse_compact_data`
+          series: the series code
+          freq: the frequency code
+          country: ISO-2 code of the country
+          indicators: list of requested indicator codes, or `['*']` for all indicators
+          start_time: first requested year, or `None` for the earliest period
+          end_time: last requested year, or `None` for the latest period
+        """
+        with self._lock:
+            if df is not None and df.shape[0] > 0:
+                stored_df = self._read_partition(series, freq, country)
+                df = pd.concat([stored_df, df], axis=0, ignore_index=True) if stored_df.shape[0] > 0 else df
+                df = df.drop_duplicates(subset=["ID", "Period"], keep='last').sort_values(by=["ID", "Period"])
+                self._write_partition(df.reset_index(drop=True), series, freq, country)
+
+            manifest = self.read_manifest()
+            coverage = manifest.setdefault(self.partition_key(series, freq, country), {})
+            window = [self._year(start_time), self._year(end_time)]
+            for ind in indicators:
+                coverage[ind] = self._merge_windows(coverage.get(ind, []) + [window])
+            self._write_manifest(manifest)
+
+    def get(self, series, freq, countries, indicators, start_time=None, end_time=None):
+        """
+        It reads stored observations of some indicators, countries and years.
+
+        Args:
+          series: the series code
+          freq: the frequency code
+          countries: list of ISO-2 codes of the countries
+          indicators: list of indicator codes
+          start_time: first year, or `None` for the earliest period
+          end_time: last year, or `None` for the latest period
+
+        Returns:
+          A Pandas dataframe of the observations, in the order of `countries`.
+        """
+        start, end = self._year(start_time), self._year(end_time)
+        frames = []
+        with self._lock:
+            for country in countries:
+                df = self._read_partition(series, freq, country)
+                if df.shape[0] == 0:
+                    continue
+                is_kept = df["ID"].isin(indicators)
+                if start is not None:
+                    is_kept &= df["Period"].dt.year >= start
+                if end is not None:
+                    is_kept &= df["Period"].dt.year <= end
+                frames.append(df[is_kept])
+        frames = [df for df in frames if df.shape[0] > 0]
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=0, ignore_index=True)
+
+    def last_periods(self, series, freq, countries):
+        """
+        It finds the last stored period of each indicator and country.
+
+        Args:
+          series: the series code
+          freq: the frequency code
+          countries: list of ISO-2 codes of the countries
+
+        Returns:
+          A dictionary from (indicator, country) to the last stored period as a timestamp.
+        """
+        last_periods = {}
+        with self._lock:
+            for country in countries:
+                df = self._read_partition(series, freq, country)
+                if df.shape[0] > 0:
+                    last = df.groupby(df["ID"].astype(str))["Period"].max()
+                    last_periods.update({(ind, country): period for ind, period in last.items()})
+        return last_periods
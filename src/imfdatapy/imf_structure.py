@@ -0,0 +1,235 @@
+"""
+Structure metadata downloaded from the IMF data server: a process-level registry and lazily loaded dimension tables.
+
+"""
+
+import copy
+import threading
+from collections.abc import MutableMapping
+
+import pandas as pd
+
+
+class StructureRegistry:
+    """
+    A thread-safe, in-process memo of parsed structure metadata, such as the dataflow table, the dimensions of a series
+    and its codelists. Entries are keyed by the url they were downloaded from and tagged with their series, so that
+    all `IMF` objects in a process share them and new objects need no metadata requests.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        """
+        This function initializes an empty registry.
+        """
+        self._entries = {}
+        self._indexes = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def shared(cls):
+        """
+        It returns the process-wide registry shared by all `IMF` objects, creating it on first use.
+
+        Returns:
+          The shared `StructureRegistry` object.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def get(self, url):
+        """
+        It looks up the parsed metadata of a url.
+
+        Args:
+          url: the url the metadata was downloaded from
+
+        Returns:
+          A copy of the parsed metadata, or `None` if the url is not in the registry.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None:
+            return None
+        value = entry[1]
+        return value.copy() if isinstance(value, pd.DataFrame) else copy.deepcopy(value)
+
+    def put(self, url, value, series=None):
+        """
+        It saves the parsed metadata of a url.
+
+        Args:
+          url: the url the metadata was downloaded from
+          value: the parsed metadata, e.g. a Pandas dataframe or a list of dimensions
+          series: the series the metadata belongs to, or `None` for metadata of all series
+        """
+        with self._lock:
+            self._entries[url] = (series, value)
+
+    def get_index(self, url):
+        """
+        It looks up the search index built from the metadata of a url, see `put_index`.
+
+        Args:
+          url: the url the metadata was downloaded from
+
+        Returns:
+          The index, not a copy, or `None` if there is none.
+        """
+        with self._lock:
+            return self._indexes.get(url)
+
+    def put_index(self, url, index):
+        """
+        It saves a search index built from the metadata of a url, e.g. a `CodelistIndex`, so that all `IMF` objects
+        share it. The index is not copied and must not be modified. It is removed with the metadata of the url.
+
+        Args:
+          url: the url the metadata was downloaded from
+          index: the index
+        """
+        with self._lock:
+            if url in self._entries:
+                self._indexes[url] = index
+
+    def urls(self, series=None):
+        """
+        It lists the urls in the registry.
+
+        Args:
+          series: only list urls of the given series if not `None`
+
+        Returns:
+          A list of urls.
+        """
+        with self._lock:
+            return [url for url, (tag, _) in self._entries.items() if series is None or tag == series]
+
+    def invalidate(self, series=None):
+        """
+        It removes entries from the registry so that they are downloaded again on next use.
+
+        Args:
+          series: remove the entries of the given series and those shared by all series. Defaults to None to remove
+                  all entries.
+
+        Returns:
+          The list of removed urls.
+        """
+        with self._lock:
+            if series is None:
+                urls = list(self._entries)
+            else:
+                urls = [url for url, (tag, _) in self._entries.items() if tag in (series, None)]
+            for url in urls:
+                del self._entries[url]
+                self._indexes.pop(url, None)
+        return urls
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class LazyDimDict(MutableMapping):
+    """
+    A dictionary of dimension tables that downloads a table only the first time it is looked up. Listing the keys,
+    e.g. with `in` or `keys()`, does not download anything. A table is downloaded once even if it is looked up by
+    several threads at a time, and its download does not block the lookups of other tables.
+    """
+
+    def __init__(self):
+        """
+        This function initializes an empty dictionary.
+        """
+        self._loaders = {}
+        self._data = {}
+        self._lock = threading.RLock()
+        # a lock per dimension that is held while its table is loaded
+        self._load_locks = {}
+
+    def add_loader(self, key, loader):
+        """
+        It registers a dimension whose table is loaded on demand.
+
+        Args:
+          key: name of the dimension, e.g. 'CL_AREA_IFS'
+          loader: function without arguments that returns the table of the dimension
+        """
+        with self._lock:
+            self._loaders[key] = loader
+
+    def is_loaded(self, key):
+        """
+        It checks whether the table of a dimension has already been loaded.
+
+        Args:
+          key: name of the dimension
+
+        Returns:
+          True if the table is in memory.
+        """
+        with self._lock:
+            return key in self._data
+
+    def get_loaded(self, key, default=None):
+        """
+        It returns the table of a dimension only if it has already been loaded, without loading it.
+
+        Args:
+          key: name of the dimension
+          default: value returned if the table is not loaded
+
+        Returns:
+          The table of the dimension or `default`.
+        """
+        with self._lock:
+            return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+            if key not in self._loaders:
+                raise KeyError(key)
+            loader = self._loaders[key]
+            load_lock = self._load_locks.setdefault(key, threading.RLock())
+        with load_lock:
+            with self._lock:
+                if key in self._data:  # loaded by another thread in the meantime
+                    return self._data[key]
+            value = loader()
+            with self._lock:
+                if key not in self._data:  # the loader may have stored the table itself
+                    self._data[key] = value
+                return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key not in self._data and key not in self._loaders:
+                raise KeyError(key)
+            self._data.pop(key, None)
+            self._loaders.pop(key, None)
+            self._load_locks.pop(key, None)
+
+    def __iter__(self):
+        with self._lock:
+            keys = list(self._loaders) + [key for key in self._data if key not in self._loaders]
+        return iter(keys)
+
+    def __len__(self):
+        with self._lock:
+            return len(set(self._loaders) | set(self._data))
+
+    def __repr__(self):
+        with self._lock:
+            pending = [key for key in self._loaders if key not in self._data]
+            return f"{type(self).__name__}(loaded={list(self._data)}, pending={pending})"
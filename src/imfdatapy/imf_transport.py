@@ -0,0 +1,132 @@
+"""
+HTTP transport for the IMF SDMX_JSON data service.
+
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .imf_rate_limit import RateLimiter
+    from .imf_cache import ResponseCache
+except ImportError:
+    from imf_rate_limit import RateLimiter
+    from imf_cache import ResponseCache
+
+
+class Transport:
+    """
+    A pooled, keep-alive HTTP transport. One instance can be owned by a single `Series` object or shared between
+    several of them so that they reuse the same TCP (and TLS) connections.
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=10, read_timeout=120, is_gzip=True, session=None,
+                 rate_limiter=None, cache=None):
+        """
+        This function initializes the transport with a pooled `requests.Session`.
+
+        Args:
+          pool_size: maximum number of connections kept alive per host. Defaults to 10.
+          connect_timeout: seconds to wait for a TCP connection to the server. Defaults to 10.
+          read_timeout: seconds to wait for the server to send a response. Defaults to 120.
+          is_gzip: True to ask the server for gzip or deflate compressed responses.
+          session: an existing `requests.Session` to use instead of creating a new one.
+          rate_limiter: a `RateLimiter` object applied to every request. Defaults to None to use the process-wide
+                        limiter shared by all `IMF` objects.
+          cache: a `ResponseCache` object for responses of structure requests. Defaults to None for no cache.
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.is_gzip = is_gzip
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.shared()
+        self.cache = cache
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        if is_gzip:
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        session.headers.update({"Connection": "keep-alive"})
+        self.session = session
+
+    def get(self, url, headers=None):
+        """
+        It waits for the rate limiter and sends a GET request for a given url through the pooled session. A fresh
+        cached response is returned without any request, and a stale one is revalidated with the server.
+
+        Args:
+          url: the url to request
+          headers: optional dictionary of extra request headers
+
+        Returns:
+          The `requests.Response` object from the server or the cache. A fresh cached response has the attribute
+          `is_from_cache` set to True, and a response from the server has the attribute `rate_limit_sec`, the
+          seconds spent waiting for the rate limiter.
+        """
+        cached_rq, body, headers = self.lookup_cache(url, headers)
+        if cached_rq is not None:
+            return cached_rq
+
+        waited = self.rate_limiter.acquire()
+        rq = self.session.get(url, headers=headers, timeout=self.timeout)
+        rq = self.store_cache(url, rq, body)
+        rq.rate_limit_sec = waited
+        return rq
+
+    def lookup_cache(self, url, headers=None):
+        """
+        It looks up the cached response of a url before a request.
+
+        Args:
+          url: the url to request
+          headers: optional dictionary of extra request headers
+
+        Returns:
+          A tuple of the fresh cached `requests.Response` object or `None`, the stale cached body or `None`, and the
+          request headers with the revalidation headers of a stale body.
+        """
+        if self.cache is None:
+            return None, None, headers
+        body, meta, is_fresh = self.cache.lookup(url)
+        if is_fresh:
+            rq = ResponseCache.to_response(url, body)
+            rq.is_from_cache = True
+            return rq, body, headers
+        if body is not None:
+            headers = {**(headers or {}), **ResponseCache.revalidation_headers(meta)}
+        return None, body, headers
+
+    def store_cache(self, url, rq, body=None):
+        """
+        It saves the response of a request in the cache, or refreshes the cached body if the server has not modified
+        it.
+
+        Args:
+          url: the requested url
+          rq: the `requests.Response` object from the server
+          body: the stale cached body found by `lookup_cache`, or `None`
+
+        Returns:
+          The `requests.Response` object to use.
+        """
+        if self.cache is None:
+            return rq
+        if rq.status_code == 304 and body is not None:
+            self.cache.refresh(url)
+            return ResponseCache.to_response(url, body)
+        self.cache.store(url, rq)
+        return rq
+
+    def close(self):
+        """
+        It closes all pooled connections of the transport.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,135 @@
+"""
+Helpers shared by the tests: in-memory transports that answer requests like the IMF data server, the recorded
+fixtures of the server and a test case that runs the downloads of a series against a local `MockSDMXServer`.
+"""
+
+import json as js
+import os
+import tempfile
+import unittest
+
+import requests
+
+from imfdatapy.imf import *
+from imfdatapy.imf_mock import MockSDMXServer, code_list, load_fixtures
+
+FIXTUREDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sdmx")
+
+
+class MockServerTestCase(unittest.TestCase):
+    """
+    A test case with a `MockSDMXServer` that serves the fixtures of `gen_fixtures` to all tests of the class, so that
+    the tests do not depend on the IMF data server.
+    """
+
+    @classmethod
+    def gen_fixtures(cls):
+        """
+        It returns the fixtures served to the tests, by default those recorded in `FIXTUREDIR`.
+        """
+        return load_fixtures(FIXTUREDIR)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockSDMXServer(cls.gen_fixtures())
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def make(self, cls, **kwargs):
+        """
+        It creates an object of a series class that downloads from the mock server, with its output, log and cache
+        in a temporary directory.
+        """
+        kwargs.setdefault("url", self.server.url)
+        kwargs.setdefault("transport", Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1)))
+        return cls(outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False, registry=StructureRegistry(),
+                   planner=ChunkPlanner(), retry_policy=RetryPolicy(max_attempts=2, base_sec=0, max_sec=0), **kwargs)
+
+
+def compact_data(country, indicators, n_obs=8, freq="Q"):
+    series = []
+    for country, ind in [(c, i) for c in country.split("+") for i in indicators]:
+        obs = [{"@TIME_PERIOD": f"{2000 + i // 4}-Q{i % 4 + 1}", "@OBS_VALUE": str(i * 1.5)} for i in range(n_obs)]
+        series.append({"@FREQ": freq, "@REF_AREA": country, "@INDICATOR": ind, "@UNIT_MULT": "6",
+                       "@TIME_FORMAT": "P3M", "Obs": obs})
+    return {"CompactData": {"DataSet": {"Series": series[0] if len(series) == 1 else series}}}
+
+
+STRUCTURE = {
+    "Dataflow": {"Structure": {"Dataflows": {"Dataflow": [
+        {"@id": f"DS-{s}", "KeyFamilyRef": {"KeyFamilyID": s, "KeyFamilyAgencyID": "IMF"},
+         "Name": {"@xml:lang": "en", "#text": f"{s} series"}} for s in ["IFS", "DOT"]]}}},
+    "DataStructure/IFS": {"Structure": {"KeyFamilies": {"KeyFamily": {"Components": {"Dimension": [
+        {"@conceptRef": "FREQ", "@codelist": "CL_FREQ"},
+        {"@conceptRef": "REF_AREA", "@codelist": "CL_AREA_IFS"},
+        {"@conceptRef": "INDICATOR", "@codelist": "CL_INDICATOR_IFS"}]}}}}},
+    "GenericMetadata/IFS": {"GenericMetadata": {"MetadataSet": {"AttributeValueSet": [
+        {"ReportedAttribute": [{}, {"@conceptID": "FREQ", "ReportedAttribute": [
+            {"Value": {"#text": text}}, {}, {"Value": {"#text": value}}]}]}
+        for value, text in [("Q", "Quarterly"), ("A", "Annual")]]}}},
+    "CodeList/CL_FREQ": code_list([("Q", "Quarterly"), ("A", "Annual")]),
+    "CodeList/CL_AREA_IFS": code_list([("US", "United States"), ("CA", "Canada"), ("DE", "Germany")]),
+    "CodeList/CL_INDICATOR_IFS": code_list([("NGDP_R_XDC", "Gross Domestic Product, Real"),
+                                            ("NGDP_R_SA_XDC", "Gross Domestic Product, Real, Seasonally Adjusted"),
+                                            ("PCPI_IX", "Prices, Consumer Price Index")]),
+}
+
+
+class FakeTransport:
+    """A transport that answers structure and CompactData requests from memory."""
+
+    def __init__(self):
+        self.rate_limiter = RateLimiter(max_requests=10 ** 6, window_sec=1)
+        self.urls = []
+        self.n_obs = 8
+        self.max_cells = None  # larger CompactData requests fail
+        self.failing = set()  # CompactData requests of these countries fail
+
+    def get(self, url, headers=None):
+        self.urls.append(url)
+        endpoint = url.split("SDMX_JSON.svc/")[1]
+        if endpoint.startswith("CompactData/"):
+            key = endpoint.split("?")[0].split("/")[2]
+            freq, country, indicators = key.split(".")[:3]
+            indicators = indicators.split("+") if indicators != "" else [
+                code["@value"] for code in STRUCTURE["CodeList/CL_INDICATOR_IFS"]["Structure"]["CodeLists"]
+                ["CodeList"]["Code"]]
+            if (self.max_cells is not None and len(country.split("+")) * len(indicators) > self.max_cells) or \
+                    len(self.failing.intersection(country.split("+"))) > 0:
+                rq = requests.Response()
+                rq.status_code = 500
+                return rq
+            json = compact_data(country, indicators, n_obs=self.n_obs, freq=freq)
+        else:
+            json = STRUCTURE[endpoint]
+        rq = requests.Response()
+        rq.status_code = 200
+        rq._content = js.dumps(json).encode()
+        return rq
+
+
+class SequenceTransport:
+    """A transport that answers each request with the next status code, or raises the next exception."""
+
+    def __init__(self, outcomes):
+        self.rate_limiter = RateLimiter(max_requests=10 ** 6, window_sec=1)
+        self.outcomes = list(outcomes)
+        self.n_requests = 0
+
+    def get(self, url, headers=None):
+        self.n_requests += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        status_code, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        rq = requests.Response()
+        rq.status_code = status_code
+        rq.headers.update(headers)
+        rq._content = js.dumps({"CompactData": {}}).encode()
+        return rq
@@ -1,13 +1,23 @@
 import unittest
 from imfdatapy.imf import *
+from imfdatapy.imf_mock import gen_fixtures
+from helpers import MockServerTestCase
 
 
-class TestAFRREO(unittest.TestCase):
+class TestAFRREO(MockServerTestCase):
+
+    @classmethod
+    def gen_fixtures(cls):
+        return gen_fixtures("AFRREO", [
+            ("REF_AREA", "CL_AREA_AFRREO", [("CF", "Central African Republic"), ("CM", "Cameroon")]),
+            ("INDICATOR", "CL_INDICATOR_AFRREO", [("GGX_NGDP", "Total expenditure, Percent of GDP"),
+                                                  ("GGR_NGDP", "Total revenue and grants, Percent of GDP")])],
+            freqs=('A',), start_year=1990, n_years=30)
 
     def test_imf_afrreo_eg1(self):
-        affreo = AFRREO(search_terms=["total expenditure"], countries=["CF"], period='A', start_date=None,
-                        end_date=None)
+        affreo = self.make(AFRREO, search_terms=["total expenditure"], countries=["CF"], period='A', start_date=None,
+                           end_date=None)
         df = affreo.download_data()
-        self.assertGreaterEqual(df.shape[0], 20)
+        self.assertEqual(df.shape[0], 30)
         meta_df = affreo.get_meta()
-        self.assertGreaterEqual(meta_df.shape[0], 1)
\ No newline at end of file
+        self.assertEqual(meta_df.shape[0], 1)
@@ -0,0 +1,127 @@
+import asyncio
+import tempfile
+import time as tm
+import unittest
+
+import httpx
+
+from imfdatapy.imf import *
+from imfdatapy.imf_async import AsyncIFS, AsyncTransport
+from helpers import FakeTransport
+
+
+def make_client(transport, delay=0.0):
+    """An `httpx.AsyncClient` that answers from a `FakeTransport`, after `delay` seconds for CompactData requests."""
+
+    async def handler(request):
+        if "CompactData" in str(request.url):
+            await asyncio.sleep(delay)
+        rq = transport.get(str(request.url))
+        return httpx.Response(rq.status_code, content=rq.content)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestAsyncIMF(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA", "DE"],
+                           start_date="2000", outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False)
+
+    def test_download_data(self):
+        expected = IFS(transport=FakeTransport(), registry=StructureRegistry(), planner=ChunkPlanner(max_cells=1),
+                       **self.kwargs).download_data()
+        transport = FakeTransport()
+
+        async def download():
+            async with AsyncIFS(transport=transport, client=make_client(transport, delay=0.1),
+                                registry=StructureRegistry(), planner=ChunkPlanner(max_cells=1), **self.kwargs) as ifs:
+                ticks = []
+
+                async def tick():
+                    while True:
+                        ticks.append(tm.perf_counter())
+                        await asyncio.sleep(0.01)
+
+                ticker = asyncio.create_task(tick())
+                start = tm.perf_counter()
+                df = await ifs.download_data()
+                elapsed = tm.perf_counter() - start
+                ticker.cancel()
+                return df, elapsed, ticks, ifs
+
+        df, elapsed, ticks, ifs = asyncio.run(download())
+        pd.testing.assert_frame_equal(df, expected)
+        pd.testing.assert_frame_equal(ifs.get_data(), expected)
+        n_chunks = len([url for url in transport.urls if "CompactData" in url])
+        self.assertEqual(n_chunks, 6)
+        # the chunks are requested concurrently and the event loop keeps running during the download
+        self.assertLess(elapsed, n_chunks * 0.1 - 0.1)
+        self.assertGreater(len(ticks), elapsed / 0.01 / 2)
+
+    def test_iter_data(self):
+        transport = FakeTransport()
+
+        async def download():
+            async with AsyncIFS(transport=transport, client=make_client(transport), registry=StructureRegistry(),
+                                planner=ChunkPlanner(max_cells=2), **self.kwargs) as ifs:
+                return [df async for df in ifs.iter_data()]
+
+        frames = asyncio.run(download())
+        self.assertEqual([df.shape[0] for df in frames], [16, 16, 16])
+
+    def test_subclass_override(self):
+        class CountingIFS(IFS):
+            n_requests, n_many = 0, 0
+
+            def repeat_request(self, url):
+                CountingIFS.n_requests += 1
+                return super().repeat_request(url)
+
+            def request_many(self, urls):
+                CountingIFS.n_many += 1
+                return super().request_many(urls)
+
+        class AsyncCountingIFS(AsyncIFS):
+            sync_class = CountingIFS
+
+        transport = FakeTransport()
+        n_client = []
+
+        async def handler(request):
+            n_client.append(str(request.url))
+            rq = transport.get(str(request.url))
+            return httpx.Response(rq.status_code, content=rq.content)
+
+        async def download():
+            async with AsyncCountingIFS(transport=transport, client=httpx.AsyncClient(
+                    transport=httpx.MockTransport(handler)), registry=StructureRegistry(),
+                    planner=ChunkPlanner(max_cells=2), **self.kwargs) as ifs:
+                return await ifs.download_data()
+
+        df = asyncio.run(download())
+        self.assertEqual(df.shape[0], 3 * 2 * 8)
+        # the overrides are called, and the requests are still sent by the asynchronous client
+        self.assertGreater(CountingIFS.n_requests, 0)
+        self.assertGreater(CountingIFS.n_many, 0)
+        self.assertEqual(len(n_client), len(transport.urls))
+
+    def test_async_transport_rate_limit(self):
+        transport = FakeTransport()
+        transport.rate_limiter = RateLimiter(max_requests=2, window_sec=0.2)
+
+        async def request():
+            async_transport = AsyncTransport(transport, client=make_client(transport))
+            rqs = await asyncio.gather(*[async_transport.get("http://dataservices.imf.org/REST/SDMX_JSON.svc/Dataflow") for _ in range(4)])
+            await async_transport.aclose()
+            return rqs
+
+        start = tm.perf_counter()
+        rqs = asyncio.run(request())
+        self.assertGreaterEqual(tm.perf_counter() - start, 0.2)
+        self.assertTrue(all(rq.json()["Structure"] for rq in rqs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from imfdatapy.imf import *
+from imfdatapy.imf_batch import BatchDownloader
+from imfdatapy.imf_mock import MockSDMXServer
+
+FIXTUREDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sdmx")
+
+
+class TestBatchDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def make_batch(self, server, jobs, **kwargs):
+        transport = Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1))
+        return BatchDownloader(jobs, transport=transport, registry=StructureRegistry(), planner=ChunkPlanner(),
+                               outdir=os.path.join(self.tmpdir, "out"), logdir=self.tmpdir, url=server.url,
+                               retry_policy=RetryPolicy(base_sec=0, max_sec=0), **kwargs)
+
+    def test_run(self):
+        with MockSDMXServer(FIXTUREDIR) as server:
+            batch = self.make_batch(server, [
+                (IFS, ["gross domestic product, real"], ["US", "CA"], "Q", "2000", "2004"),
+                (DOT, ["exports"], ["US"], "A", "2005"),
+                {"series_class": IFS, "search_terms": ["no such indicator"], "countries": ["US"]},
+            ], max_jobs=2)
+            summary_df = batch.run()
+            stats = server.stats()
+
+        self.assertEqual(list(summary_df["JOB"]), [0, 1, 2])
+        self.assertEqual(list(summary_df["SERIES"]), ["IFS", "DOT", "IFS"])
+        self.assertEqual(list(summary_df["STATUS"]), ["ok", "ok", "failed"])
+        self.assertEqual(list(summary_df["ROWS"][:2]), [2 * 2 * 5 * 4, 2 * 5])
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir, "out", "batch_summary.csv")))
+        self.assertTrue(os.path.exists(summary_df["OUTFILE"][1]))
+        self.assertEqual(stats["endpoints"]["Dataflow"], 1)
+        self.assertEqual(stats["endpoints"]["DataStructure"], 2)
+        self.assertEqual(sorted(batch.get_data(0)["COUNTRY"].unique()), ["CA", "US"])
+        self.assertGreater(batch.results[0]["metrics"]["requests"], 0)
+
+    def test_jobs(self):
+        with MockSDMXServer(FIXTUREDIR) as server:
+            batch = self.make_batch(server, [(IFS, ["consumer price"], ["US"], {"is_compact_dtypes": True})],
+                                    is_keep_data=False)
+            self.assertRaises(ValueError, batch.add_job, str)
+            summary_df = batch.run()
+        self.assertEqual(list(summary_df["STATUS"]), ["ok"])
+        self.assertIsNone(batch.results[0]["data"])
+        self.assertEqual(batch.get_data(0).shape[0], summary_df["ROWS"][0])
+
+    def test_no_log_file(self):
+        LogFile.stop_log()
+        logdir = os.path.join(self.tmpdir, "log")
+        with MockSDMXServer(FIXTUREDIR) as server:
+            transport = Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1))
+            batch = BatchDownloader([(IFS, ["consumer price"], ["US"])], transport=transport,
+                                    outdir=os.path.join(self.tmpdir, "out"), logdir=logdir, is_log_to_file=False,
+                                    url=server.url, registry=StructureRegistry(), planner=ChunkPlanner())
+            summary_df = batch.run()
+        self.assertEqual(list(summary_df["STATUS"]), ["ok"])
+        self.assertFalse(os.path.exists(logdir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from imfdatapy.imf import *
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    n_requests = 0
+
+    def do_GET(self):
+        _Handler.n_requests += 1
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"Structure": {"path": "%s"}}' % self.path.encode()
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResponseCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/REST/SDMX_JSON.svc/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        _Handler.n_requests = 0
+        self.cachedir = tempfile.mkdtemp()
+
+    def make_transport(self, **kwargs):
+        return Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1),
+                         cache=ResponseCache(cachedir=self.cachedir, **kwargs))
+
+    def test_cache_warm(self):
+        first = self.make_transport().get(f"{self.url}CodeList/CL_AREA_IFS").json()
+        second = self.make_transport().get(f"{self.url}CodeList/CL_AREA_IFS")
+        self.assertEqual(second.json(), first)
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(_Handler.n_requests, 1)
+
+    def test_default_cachedir(self):
+        outdir = tempfile.mkdtemp()
+        imf = IMF(outdir=outdir, logdir=outdir, is_log_to_screen=False, url=self.url, registry=StructureRegistry())
+        imf.transport.get(f"{self.url}CodeList/CL_AREA_IFS")
+        self.assertEqual(imf.transport.cache.cachedir, os.path.join(outdir, "cache"))
+        self.assertTrue(os.listdir(os.path.join(outdir, "cache")))
+
+    def test_cache_compact_data(self):
+        transport = self.make_transport()
+        for _ in range(2):
+            transport.get(f"{self.url}CompactData/IFS/Q.US.NGDP_R_SA_XDC")
+        self.assertEqual(_Handler.n_requests, 2)
+
+    def test_cache_revalidate(self):
+        transport = self.make_transport(ttl={"Dataflow": 10 ** -9})
+        first = transport.get(f"{self.url}Dataflow").json()
+        rq = transport.get(f"{self.url}Dataflow")
+        self.assertEqual(rq.headers["X-Cache"], "HIT")
+        self.assertEqual(rq.json(), first)
+        self.assertEqual(_Handler.n_requests, 2)
+
+    def test_cache_eviction(self):
+        transport = self.make_transport(max_bytes=200)
+        cache = transport.cache
+        for n in range(10):
+            transport.get(f"{self.url}CodeList/CL_{n}")
+        self.assertLessEqual(cache._size, 200)
+        body, _, is_fresh = cache.lookup(f"{self.url}CodeList/CL_9")
+        self.assertTrue(is_fresh)
+        cache.clear()
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.cachedir)), 0)
+
+    def test_cache_invalid_body(self):
+        cache = ResponseCache(cachedir=self.cachedir)
+        url = f"{self.url}Dataflow"
+        rq = requests.Response()
+        rq.status_code = 200
+        rq._content = b"<html>Service busy</html>"
+        cache.store(url, rq)
+        self.assertEqual(cache.lookup(url), (None, None, False))
+
+        # an invalid body cached by an earlier version is dropped, and the next attempt asks the server
+        body_file, meta_file = cache._paths(url)
+        os.makedirs(os.path.dirname(body_file), exist_ok=True)
+        with gzip.open(body_file, "wb") as f:
+            f.write(rq.content)
+        with open(meta_file, "w") as f:
+            json.dump({"url": url, "stored": time.time(), "etag": None, "last_modified": None}, f)
+        imf = IMF(outdir=self.cachedir, logdir=self.cachedir, is_log_to_screen=False, url=self.url,
+                  transport=Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1), cache=cache),
+                  registry=StructureRegistry(), retry_policy=RetryPolicy(base_sec=0, max_sec=0))
+        self.assertEqual(imf.repeat_request(url), {"Structure": {"path": "/REST/SDMX_JSON.svc/Dataflow"}})
+        self.assertEqual(_Handler.n_requests, 1)
+        self.assertTrue(cache.lookup(url)[2])
+
+    def test_cache_size_lazy(self):
+        self.make_transport().get(f"{self.url}CodeList/CL_AREA_IFS")
+        cache = ResponseCache(cachedir=self.cachedir)
+        self.assertIsNone(cache._size)
+        cache.store(f"{self.url}CodeList/CL_FREQ", self.make_transport().get(f"{self.url}CodeList/CL_FREQ"))
+        self.assertEqual(cache._size, sum(os.path.getsize(os.path.join(root, f))
+                                          for root, _, files in os.walk(self.cachedir)
+                                          for f in files if f.endswith(".json.gz")))
+
+
+if __name__ == '__main__':
+    unittest.main()
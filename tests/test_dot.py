@@ -1,11 +1,14 @@
 import unittest
 from imfdatapy.imf import *
+from helpers import MockServerTestCase
 
-class TestDOT(unittest.TestCase):
+class TestDOT(MockServerTestCase):
 
     def test_imf_dot_eg1(self):
-        dot = DOT(search_terms=["trade"], countries=["US"], period='Q', start_date="2000", end_date="2022")
+        dot = self.make(DOT, search_terms=["exports"], countries=["US"], period='Q', start_date="2000",
+                        end_date="2022")
         df = dot.download_data()
-        self.assertGreaterEqual(df.shape[0], 19851)
+        # one series per counterpart area
+        self.assertEqual(df.shape[0], 2 * 40)
         meta_df = dot.get_meta()
-        self.assertGreaterEqual(meta_df.shape[0], 1)
\ No newline at end of file
+        self.assertEqual(meta_df.shape[0], 1)
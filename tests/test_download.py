@@ -0,0 +1,286 @@
+import os
+import tempfile
+import time
+import unittest
+
+from imfdatapy.imf import *
+from helpers import FakeTransport, compact_data
+
+
+class TestDownloadChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def make_ifs(self, transport=None, **kwargs):
+        kwargs.setdefault("planner", ChunkPlanner())
+        kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=1))
+        return IFS(outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False,
+                   transport=transport if transport is not None else FakeTransport(),
+                   registry=StructureRegistry(), **kwargs)
+
+    @staticmethod
+    def download_planned(ifs):
+        groups = [([c], ind) for c in ["US", "CA", "DE"] for ind in [["A", "B"], ["C"], ["D", "E", "F"]]]
+        return pd.concat([df for _, _, _, df in ifs.iter_planned(groups, {})], axis=0)
+
+    def test_iter_planned_sequential(self):
+        ifs = self.make_ifs()
+        df = self.download_planned(ifs)
+        self.assertEqual(df.shape[0], 3 * 6 * 8)
+        self.assertIn("Period", df.columns)
+        self.assertEqual(list(df["Country"].unique()), ["US", "CA", "DE"])
+
+    def test_iter_planned_concurrent(self):
+        expected = self.download_planned(self.make_ifs())
+        df = self.download_planned(self.make_ifs(max_workers=4))
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_slow_chunk(self):
+        class SlowTransport(FakeTransport):
+            def get(self, url, headers=None):
+                if ".US.A+B" in url:
+                    time.sleep(0.5)
+                    self.n_during_slow = len(self.urls)
+                return super().get(url, headers=headers)
+
+        transport = SlowTransport()
+        ifs = self.make_ifs(transport=transport, max_workers=2)
+        df = self.download_planned(ifs)
+        self.assertEqual(df.shape[0], 3 * 6 * 8)
+        # the other worker keeps requesting chunks while the first chunk is slow
+        self.assertGreaterEqual(transport.n_during_slow, 3)
+
+    def test_download_data(self):
+        ifs = self.make_ifs(search_terms=["gross domestic product, real"], countries=["US", "CA"],
+                            start_date="2000", end_date="2001")
+        df = ifs.download_data()
+        self.assertEqual(df.shape[0], 2 * 2 * 8)
+        self.assertEqual(sorted(df["ID"].unique()), ["NGDP_R_SA_XDC", "NGDP_R_XDC"])
+        self.assertIn("DESCRIPTION", df.columns)
+        self.assertEqual(ifs.get_meta().shape[0], 2)
+
+    def test_download_data_compact_dtypes(self):
+        kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA"], start_date="2000")
+        expected = self.make_ifs(**kwargs).download_data()
+        df = self.make_ifs(is_compact_dtypes=True, **kwargs).download_data()
+        self.assertEqual(df.shape, expected.shape)
+        self.assertEqual(df["VALUE"].dtype, "float64")
+        self.assertEqual(df["UNIT_MULT"].dtype, "Int64")
+        self.assertIsInstance(df["COUNTRY"].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(df["PERIOD"].dtype, pd.PeriodDtype)
+        self.assertEqual(list(df["ID"].astype(str)), list(expected["ID"]))
+        self.assertEqual(list(df["PERIOD"].dt.to_timestamp()), list(expected["PERIOD"]))
+        self.assertEqual(list(df["VALUE"]), list(expected["VALUE"].astype(float)))
+        self.assertEqual(list(df["DESCRIPTION"]), list(expected["DESCRIPTION"]))
+
+    def test_output_format(self):
+        kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA"], start_date="2000")
+        for output_format in ["csv", "parquet", "feather"]:
+            for is_compact_dtypes in [False, True]:
+                ifs = self.make_ifs(output_format=output_format, is_compact_dtypes=is_compact_dtypes, **kwargs)
+                df = ifs.download_data()
+                filename, _ = ifs.gen_data_filename()
+                self.assertTrue(filename.endswith(f".{output_format}"))
+                historical_df = ifs.merge_data(pd.DataFrame())
+                if output_format == "csv":
+                    self.assertEqual(historical_df.shape, df.shape)
+                else:
+                    pd.testing.assert_frame_equal(historical_df, df)
+                ifs.read_meta_df()
+                self.assertEqual(ifs.meta_df.shape[0], 3)
+
+    def test_incremental_refresh(self):
+        kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA"], start_date="2000")
+        for output_format, is_compact_dtypes in [("csv", False), ("parquet", True)]:
+            self.make_ifs(output_format=output_format, is_compact_dtypes=is_compact_dtypes, **kwargs).download_data()
+            transport = FakeTransport()
+            transport.n_obs = 12
+            ifs = self.make_ifs(transport=transport, output_format=output_format, is_compact_dtypes=is_compact_dtypes,
+                                is_incremental=True, lookback_periods=2, **kwargs)
+            df = ifs.download_data()
+            data_urls = [url for url in transport.urls if "CompactData" in url]
+            self.assertEqual(len(data_urls), 1)
+            self.assertTrue(data_urls[0].endswith("startPeriod=2001"))
+            self.assertEqual(df.shape[0], 2 * 2 * 12)
+            self.assertFalse(df.duplicated(subset=["ID", "COUNTRY", "PERIOD"]).any())
+            self.assertEqual(ifs.merge_data(pd.DataFrame()).shape, df.shape)
+
+    def test_data_store(self):
+        storedir = os.path.join(self.tmpdir, "store")
+        kwargs = dict(search_terms=["gross domestic product, real"], start_date="2000")
+        for output_format in ["csv", "parquet"]:
+            expected = self.make_ifs(countries=["US", "DE"], **kwargs).download_data()
+            self.make_ifs(countries=["US", "CA"], storedir=storedir, output_format=output_format, **kwargs).download_data()
+            transport = FakeTransport()
+            ifs = self.make_ifs(transport=transport, countries=["US", "DE"], storedir=storedir,
+                                output_format=output_format, **kwargs)
+            df = ifs.download_data()
+            data_urls = [url for url in transport.urls if "CompactData" in url]
+            self.assertEqual(len(data_urls), 1)
+            self.assertIn(".DE.", data_urls[0])
+            pd.testing.assert_frame_equal(df, expected)
+            manifest = ifs.store.read_manifest()
+            self.assertEqual(sorted(manifest), ["IFS/Q/CA", "IFS/Q/DE", "IFS/Q/US"])
+            self.assertEqual(manifest["IFS/Q/US"]["NGDP_R_XDC"], [[2000, None]])
+            self.assertEqual(ifs.store.missing("IFS", "Q", "US", ["NGDP_R_XDC", "PCPI_IX"], 1990), ["NGDP_R_XDC", "PCPI_IX"])
+            storedir = os.path.join(self.tmpdir, "store_parquet")
+
+    def test_data_store_jobdir(self):
+        ifs = self.make_ifs(search_terms=["gross domestic product, real"], countries=["US"],
+                            storedir=os.path.join(self.tmpdir, "store"), jobdir=os.path.join(self.tmpdir, "jobs"))
+        with self.assertLogs(LOGGER_NAME, level="WARNING") as logs:
+            df = ifs.download_data()
+        self.assertEqual(df.shape[0], 2 * 8)
+        self.assertTrue(any("not journaled" in line for line in logs.output))
+        self.assertIsNone(ifs.journal)
+
+    def test_adaptive_chunks(self):
+        kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA", "DE"], start_date="2000")
+        expected = self.make_ifs(**kwargs).download_data()
+        transport, planner = FakeTransport(), ChunkPlanner()
+        transport.max_cells = 2
+        ifs = self.make_ifs(transport=transport, planner=planner, **kwargs)
+        pd.testing.assert_frame_equal(ifs.download_data(), expected)
+        self.assertEqual(planner.get_max_cells("IFS"), 2)
+        self.assertEqual(planner.chunk_sizes()["IFS"]["max_ok_cells"], 2)
+        n_requests = len(transport.urls)
+        ifs = self.make_ifs(transport=transport, planner=planner, **kwargs)
+        ifs.download_data()
+        self.assertLess(len(transport.urls) - n_requests, n_requests)
+
+    def test_iter_data(self):
+        kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA", "DE"], start_date="2000")
+        expected = self.make_ifs(**kwargs).download_data()
+        transport = FakeTransport()
+        ifs = self.make_ifs(transport=transport, planner=ChunkPlanner(max_cells=1), **kwargs)
+        chunks = ifs.iter_data()
+        df = next(chunks)
+        self.assertEqual(df.shape[0], 8)
+        self.assertEqual(len([url for url in transport.urls if "CompactData" in url]), 1)
+        df = pd.concat([df] + list(chunks)).sort_values(by=["ID", "COUNTRY", "PERIOD"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(df, expected)
+
+        for output_format in ["csv", "parquet"]:
+            ifs = self.make_ifs(planner=ChunkPlanner(max_cells=2), output_format=output_format, **kwargs)
+            for _ in range(2):
+                sinkdir = ifs.sink_data()
+            self.assertEqual(len([f for f in os.listdir(sinkdir) if f.endswith(output_format)]), 3)
+            df = ifs.read_parts(sinkdir).sort_values(by=["ID", "COUNTRY", "PERIOD"]).reset_index(drop=True)
+            self.assertEqual(df.shape, expected.shape)
+            if output_format == "parquet":
+                pd.testing.assert_frame_equal(df, expected)
+
+    def test_iter_data_compact_dtypes(self):
+        kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA", "DE"], start_date="2000",
+                      is_compact_dtypes=True)
+        ifs = self.make_ifs(planner=ChunkPlanner(max_cells=1), **kwargs)
+        parts = list(ifs.iter_data())
+        self.assertEqual(len(parts), 6)
+        df = pd.concat(parts)
+        for col in ["ID", "COUNTRY", "FREQ"]:
+            self.assertIsInstance(df[col].dtype, pd.CategoricalDtype, col)
+        self.assertEqual(list(df["COUNTRY"].cat.categories), ["CA", "DE", "US"])
+        self.assertEqual(sorted(df["ID"].unique()), ["NGDP_R_SA_XDC", "NGDP_R_XDC"])
+
+        ifs = self.make_ifs(planner=ChunkPlanner(max_cells=2), output_format="parquet", **kwargs)
+        df = ifs.read_parts(ifs.sink_data())
+        self.assertEqual(df.shape[0], 3 * 2 * 8)
+        self.assertIsInstance(df["COUNTRY"].dtype, pd.CategoricalDtype)
+
+    def test_download_all(self):
+        transport = FakeTransport()
+        transport.failing = {"DE"}
+        ifs = self.make_ifs(transport=transport, planner=ChunkPlanner(max_cells=100), start_date="2000")
+        summary_df = ifs.download_all()
+        urls = [url for url in transport.urls if "CompactData" in url]
+        self.assertTrue(all(url.split("?")[0].endswith(".") for url in urls))
+        self.assertEqual(sorted(summary_df["PERIOD"].unique()), ["A", "Q"])
+        self.assertEqual(list(summary_df.loc[summary_df["COUNTRY"] == "DE", "STATUS"]), ["failed", "failed"])
+        self.assertEqual(summary_df.loc[summary_df["COUNTRY"] == "US", "OBSERVATIONS"].tolist(), [3 * 8, 3 * 8])
+        self.assertEqual(ifs.store.get("IFS", "Q", ["US", "CA"], ["PCPI_IX"]).shape[0], 2 * 8)
+
+        # an interrupted mirror resumes with the countries that are not in the store yet
+        transport.failing, transport.urls = set(), []
+        ifs = self.make_ifs(transport=transport, start_date="2000")
+        summary_df = ifs.download_all(periods=["Q"])
+        urls = [url for url in transport.urls if "CompactData" in url]
+        self.assertEqual(len(urls), 1)
+        self.assertIn("/Q.DE..?", urls[0])
+        self.assertEqual(summary_df.set_index("COUNTRY")["STATUS"].to_dict(),
+                         {"US": "skipped", "CA": "skipped", "DE": "downloaded"})
+
+    def test_resume_job(self):
+        transport = FakeTransport()
+        transport.failing = {"DE"}
+        kwargs = dict(search_terms=["gross domestic product, real"], countries=["US", "CA", "DE"], start_date="2000",
+                      jobdir=os.path.join(self.tmpdir, "jobs"))
+        ifs = self.make_ifs(transport=transport, **kwargs)
+        df = ifs.download_data()
+        self.assertEqual(sorted(df["COUNTRY"].unique()), ["CA", "US"])
+        journal_df = ifs.journal.to_df()
+        failed_df = journal_df[journal_df["STATUS"] == "failed"]
+        self.assertEqual(sorted(failed_df["COUNTRIES"] + "." + failed_df["INDICATORS"]),
+                         ["DE.NGDP_R_SA_XDC", "DE.NGDP_R_XDC"])
+        self.assertEqual(len(ifs.journal.failed()), 2)
+
+        # a rerun of the same query retries only the failed chunks
+        transport.failing, transport.urls = set(), []
+        ifs = self.make_ifs(transport=transport, **kwargs)
+        df = ifs.download_data()
+        urls = [url for url in transport.urls if "CompactData" in url]
+        self.assertEqual(len(urls), 1)
+        self.assertIn("/Q.DE.", urls[0])
+        self.assertEqual(df.shape[0], 3 * 2 * 8)
+        self.assertEqual(ifs.journal.failed(), [])
+        self.assertEqual(ifs.journal.status, "finished")
+
+        # the job is finished, so the next run downloads everything again
+        transport.urls = []
+        self.make_ifs(transport=transport, **kwargs).download_data()
+        self.assertEqual(len([url for url in transport.urls if "CompactData" in url]), 1)
+
+
+class TestParseCompactData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.ifs = IFS(outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False, transport=FakeTransport())
+
+    def test_parse_series_list(self):
+        json = compact_data("US", ["A", "B"], n_obs=5)
+        json["CompactData"]["DataSet"]["Series"][1]["Obs"][0]["@OBS_STATUS"] = "E"
+        df = self.ifs.parse_compact_data(json)
+        self.assertEqual(list(df.columns), ["Value", "Status", "@FREQ", "Country", "ID", "@UNIT_MULT", "@TIME_FORMAT",
+                                            "Period"])
+        self.assertEqual(list(df["ID"]), ["A"] * 5 + ["B"] * 5)
+        self.assertEqual(df["Status"].notna().sum(), 1)
+        self.assertEqual(df["Period"].iloc[4], pd.Timestamp("2001-01-01"))
+
+    def test_parse_series_dict(self):
+        df = self.ifs.parse_compact_data(compact_data("CA", ["A"], n_obs=3))
+        self.assertEqual(df.shape, (3, 7))
+        self.assertEqual(list(df["Country"]), ["CA"] * 3)
+        self.assertEqual(list(df["Period"].dt.month), [1, 4, 7])
+
+    def test_parse_single_obs(self):
+        json = compact_data("US", ["A", "B"], n_obs=1)
+        for series in json["CompactData"]["DataSet"]["Series"]:
+            series["Obs"] = series["Obs"][0]
+        self.assertEqual(self.ifs.parse_compact_data(json).shape[0], 2)
+
+    def test_parse_empty_dataset(self):
+        df = self.ifs.parse_compact_data({"CompactData": {"DataSet": {"@keyFamilyURI": "x"}}})
+        self.assertEqual(df.shape[0], 0)
+
+    def test_parse_time_period(self):
+        for periods, expected in [(["2000", "2001"], ["2000-01-01", "2001-01-01"]),
+                                  (["2000-Q3", "2001-Q4"], ["2000-07-01", "2001-10-01"]),
+                                  (["2000-02", "2001-12"], ["2000-02-01", "2001-12-01"]),
+                                  (["2000-02-03", "2001-12-31"], ["2000-02-03", "2001-12-31"])]:
+            result = IMF.parse_time_period(pd.Series(periods))
+            self.assertEqual(list(result), [pd.Timestamp(t) for t in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,24 @@
 import unittest
 from imfdatapy.imf import *
+from imfdatapy.imf_mock import gen_fixtures
+from helpers import MockServerTestCase
 
-class TestFSI(unittest.TestCase):
+class TestFSI(MockServerTestCase):
+
+    @classmethod
+    def gen_fixtures(cls):
+        return gen_fixtures("FSI", [
+            ("REF_AREA", "CL_AREA_FSI", [("US", "United States"), ("DE", "Germany")]),
+            ("INDICATOR", "CL_INDICATOR_FSI", [
+                ("FSLE_PT", "Value of large exposures to capital, Percent"),
+                ("FSLE_XDC", "Value of large exposures, Domestic Currency"),
+                ("FSANL_PT", "Nonperforming loans to total gross loans, Percent")])],
+            freqs=('M', 'Q'), start_year=2005, n_years=20)
 
     def test_imf_fsi_eg1(self):
-        fsi = FSI(search_terms=["Value of large exposures"], countries=["US"], period='Q', start_date="2000",
-                  end_date="2022")
+        fsi = self.make(FSI, search_terms=["Value of large exposures"], countries=["US"], period='Q', start_date="2000",
+                        end_date="2022")
         df = fsi.download_data()
-        self.assertGreaterEqual(df.shape[0], 146)
+        self.assertEqual(df.shape[0], 2 * 18 * 4)
         meta_df = fsi.get_meta()
-        self.assertGreaterEqual(meta_df.shape[0], 6)
\ No newline at end of file
+        self.assertEqual(meta_df.shape[0], 2)
@@ -1,21 +1,37 @@
 import unittest
 from imfdatapy.imf import *
+from imfdatapy.imf_mock import gen_fixtures
+from helpers import MockServerTestCase
 
-class TestGFSR(unittest.TestCase):
+class TestGFSR(MockServerTestCase):
+
+    @classmethod
+    def gen_fixtures(cls):
+        return gen_fixtures("GFSR", [
+            ("REF_AREA", "CL_AREA_GFSR", [("US", "United States"), ("FR", "France")]),
+            ("REF_SECTOR", "CL_SECTOR_GFSR", [("S13", "General government"), ("S1311", "Central government")]),
+            ("UNIT_MEASURE", "CL_UNIT_GFSR", [("XDC", "Domestic currency"), ("XDC_R_B1GQ", "Percent of GDP")]),
+            ("CLASSIFICATION", "CL_INDICATOR_GFSR", [("W0_S1_G12", "Social contributions [GFS]"),
+                                                     ("W0_S1_G121", "Social security contributions [GFS]"),
+                                                     ("W0_S1_G11", "Taxes [GFS]")])],
+            freqs=('A',), start_year=1990, n_years=30)
 
     def test_imf_gfsr_eg1(self):
-        gfsr = GFSR(search_terms=["social contributions"], countries=["US"], period='A', start_date="2000", end_date="2022")
+        gfsr = self.make(GFSR, search_terms=["social contributions"], countries=["US"], period='A', start_date="2000",
+                         end_date="2022")
         df = gfsr.download_data()
-        self.assertGreaterEqual(df.shape[0], 2464)
+        # one series per sector and unit
+        self.assertEqual(df.shape[0], 2 * 2 * 20)
         meta_df = gfsr.get_meta()
-        self.assertGreaterEqual(meta_df.shape[0], 7)
+        self.assertEqual(meta_df.shape[0], 1)
 
     def test_imf_gfsr_eg2(self):
         # correct for invalid input period
-        gfsr = GFSR(search_terms=["central government"], countries=["US"], period='A', start_date="2000", end_date="2022")
+        gfsr = self.make(GFSR, search_terms=["central government"], countries=["US"], period='A', start_date="2000",
+                         end_date="2022")
         df = gfsr.download_data()
         self.assertIsNone(df)
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -1,12 +1,21 @@
 import unittest
 from imfdatapy.imf import *
+from imfdatapy.imf_mock import gen_fixtures
+from helpers import MockServerTestCase
 
-class TestHPDD(unittest.TestCase):
+class TestHPDD(MockServerTestCase):
+
+    @classmethod
+    def gen_fixtures(cls):
+        return gen_fixtures("HPDD", [
+            ("REF_AREA", "CL_AREA_HPDD", [("US", "United States"), ("GB", "United Kingdom")]),
+            ("INDICATOR", "CL_INDICATOR_HPDD", [("GGXWDG_GDP", "Debt to GDP Ratio")])],
+            freqs=('A',), start_year=1800, n_years=220)
 
     def test_imf_hpdd_eg1(self):
-        hpdd = HPDD(search_terms=["GDP"], countries=["US"], period='A', start_date=None,
-                  end_date=None)
+        hpdd = self.make(HPDD, search_terms=["GDP"], countries=["US"], period='A', start_date=None,
+                         end_date=None)
         df = hpdd.download_data()
-        self.assertGreaterEqual(df.shape[0], 213)
+        self.assertEqual(df.shape[0], 220)
         meta_df = hpdd.get_meta()
-        self.assertGreaterEqual(meta_df.shape[0], 1)
\ No newline at end of file
+        self.assertEqual(meta_df.shape[0], 1)
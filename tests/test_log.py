@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from imfdatapy.imf import *
+from helpers import FakeTransport
+
+
+class TestLogFile(unittest.TestCase):
+
+    def tearDown(self):
+        LogFile.stop_log()
+
+    def test_handlers_not_accumulated(self):
+        logdir = tempfile.mkdtemp()
+        for _ in range(5):
+            IFS(outdir=logdir, logdir=logdir, is_log_to_screen=True, transport=FakeTransport())
+        logger = logging.getLogger(LOGGER_NAME)
+        file_handlers = [h for h in logger.handlers if isinstance(h, logging.FileHandler)]
+        self.assertEqual(len(file_handlers), 1)
+        self.assertEqual(len(logger.handlers), 2)
+        self.assertEqual(len([f for f in os.listdir(logdir) if f.endswith(".log")]), 1)
+
+        IFS(outdir=logdir, logdir=logdir, is_log_to_screen=False, transport=FakeTransport())
+        self.assertEqual(logger.handlers, file_handlers)
+
+    def test_no_log_file(self):
+        logdir = os.path.join(tempfile.mkdtemp(), "log")
+        ifs = IFS(outdir=tempfile.mkdtemp(), logdir=logdir, is_log_to_screen=False, is_log_to_file=False,
+                  transport=FakeTransport())
+        ifs.logger.info("not written to a file")
+        self.assertFalse(os.path.exists(logdir))
+
+    def test_detach_log_file(self):
+        logdir = tempfile.mkdtemp()
+        IFS(outdir=logdir, logdir=logdir, is_log_to_screen=False, transport=FakeTransport())
+        ifs = IFS(outdir=logdir, logdir=logdir, is_log_to_screen=False, is_log_to_file=False,
+                  transport=FakeTransport())
+        self.assertEqual(ifs.logger.handlers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
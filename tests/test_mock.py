@@ -0,0 +1,189 @@
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+
+from imfdatapy.imf import *
+from imfdatapy.imf_metrics import Metrics
+from imfdatapy.imf_mock import MockSDMXServer, RecordingTransport, load_fixtures
+
+FIXTUREDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sdmx")
+
+
+class TestMockSDMXServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fixtures = load_fixtures(FIXTUREDIR)
+
+    def make_ifs(self, url, **kwargs):
+        kwargs.setdefault("retry_policy", RetryPolicy(base_sec=0, max_sec=0))
+        return IFS(search_terms=["gross domestic product, real"], countries=["US", "CA"], start_date="2000",
+                   end_date="2004", outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False, url=url,
+                   transport=Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1)),
+                   registry=StructureRegistry(), planner=ChunkPlanner(), **kwargs)
+
+    def test_compact_data(self):
+        server = MockSDMXServer(self.fixtures)
+        status, json = server.compact_data("CompactData/IFS/Q.US+CA.PCPI_IX", {"startPeriod": ["2001"],
+                                                                               "endPeriod": ["2002"]})
+        self.assertEqual(status, 200)
+        series = json["CompactData"]["DataSet"]["Series"]
+        self.assertEqual(sorted(s["@REF_AREA"] for s in series), ["CA", "US"])
+        self.assertEqual([o["@TIME_PERIOD"] for o in series[0]["Obs"]][::4], ["2001-Q1", "2002-Q1"])
+        _, json = server.compact_data("CompactData/IFS/A.US.PCPI_IX", {"startPeriod": ["2009"]})
+        self.assertIsInstance(json["CompactData"]["DataSet"]["Series"]["Obs"], dict)
+        _, json = server.compact_data("CompactData/IFS/A.US.PCPI_IX", {"startPeriod": ["2030"]})
+        self.assertEqual(json["CompactData"]["DataSet"], {})
+        self.assertEqual(server.compact_data("CompactData/XYZ/A.US.", {})[0], 404)
+
+    def test_download_data(self):
+        with MockSDMXServer(FIXTUREDIR) as server:
+            ifs = self.make_ifs(server.url)
+            self.assertTrue(ifs.url.startswith("http://127.0.0.1:"))
+            df = ifs.download_data()
+            stats = server.stats()
+        self.assertEqual(df.shape[0], 2 * 2 * 5 * 4)
+        self.assertEqual(sorted(df["ID"].unique()), ["NGDP_R_SA_XDC", "NGDP_R_XDC"])
+        self.assertEqual(sorted(df["COUNTRY"].unique()), ["CA", "US"])
+        self.assertGreater(stats["endpoints"]["CompactData"], 0)
+        self.assertEqual(stats["errors"], 0)
+
+    def test_error_injection(self):
+        with MockSDMXServer(self.fixtures) as server:
+            expected = self.make_ifs(server.url).download_data()
+        with MockSDMXServer(self.fixtures, error_rate=0.3, reset_rate=0.1, seed=1) as server:
+            ifs = self.make_ifs(server.url, retry_policy=RetryPolicy(max_attempts=10, base_sec=0, max_sec=0))
+            df = ifs.download_data()
+            stats = server.stats()
+        pd.testing.assert_frame_equal(df, expected)
+        self.assertGreater(stats["errors"] + stats["resets"], 0)
+        self.assertGreater(ifs.retry_stats.to_dict()["retries"], 0)
+
+    def test_rate_limit(self):
+        with MockSDMXServer(self.fixtures, rate_limit=(3, 1)) as server:
+            rqs = [requests.get(f"{server.url}Dataflow") for _ in range(4)]
+            self.assertEqual([rq.status_code for rq in rqs], [200, 200, 200, 429])
+            self.assertEqual(rqs[-1].headers["Retry-After"], "1")
+            self.assertEqual(rqs[0].json(), self.fixtures["Dataflow"])
+            self.assertEqual(server.stats()["rate_limited"], 1)
+
+    def test_deadline_reset(self):
+        with MockSDMXServer(self.fixtures) as server:
+            ifs = self.make_ifs(server.url, retry_policy=RetryPolicy(deadline_sec=0.5, base_sec=0, max_sec=0))
+            ifs.download_data()
+            time.sleep(1)
+            n_requests = server.stats()["requests"]
+            ifs.refresh_structure()
+            self.assertGreater(server.stats()["requests"], n_requests)
+        self.assertEqual(ifs.retry_stats.to_dict()["deadline_exceeded"], 0)
+        self.assertIn("US", ifs.dim_dict["CL_AREA_IFS"]["VALUE"].values)
+
+    def test_max_series(self):
+        with MockSDMXServer(self.fixtures, max_series=1) as server:
+            ifs = self.make_ifs(server.url, retry_policy=RetryPolicy(max_attempts=1))
+            df = ifs.download_data()
+        self.assertEqual(df.shape[0], 2 * 2 * 5 * 4)
+        self.assertEqual(ifs.planner.get_max_cells("IFS"), 1)
+
+    def test_recording_transport(self):
+        recorddir = os.path.join(self.tmpdir, "recorded")
+        with MockSDMXServer(self.fixtures) as server:
+            transport = RecordingTransport(Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1)),
+                                           recorddir)
+            transport.get(f"{server.url}Dataflow")
+            transport.get(f"{server.url}CompactData/IFS/Q.US.PCPI_IX?startPeriod=2000")
+            transport.get(f"{server.url}CompactData/IFS/Q.CA.PCPI_IX?startPeriod=2000")
+        recorded = load_fixtures(recorddir)
+        self.assertEqual(recorded["Dataflow"], self.fixtures["Dataflow"])
+        series = recorded["CompactData/IFS"]["CompactData"]["DataSet"]["Series"]
+        self.assertEqual([s["@REF_AREA"] for s in series], ["US", "CA"])
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def make_ifs(self, url, transport):
+        return IFS(search_terms=["gross domestic product, real"], countries=["US", "CA"], start_date="2000",
+                   outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False, url=url, transport=transport,
+                   registry=StructureRegistry(), planner=ChunkPlanner(),
+                   retry_policy=RetryPolicy(max_attempts=10, base_sec=0, max_sec=0))
+
+    def test_download_metrics(self):
+        transport = Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1),
+                              cache=ResponseCache(cachedir=os.path.join(self.tmpdir, "cache")))
+        shared_before = Metrics.shared().to_dict(series="IFS")
+        with MockSDMXServer(FIXTUREDIR, error_rate=0.2, seed=3) as server:
+            first = self.make_ifs(server.url, transport)
+            df = first.download_data()
+            second = self.make_ifs(server.url, transport)
+            second.download_data()
+            stats = server.stats()
+
+        metrics = first.metrics.to_dict()
+        self.assertEqual(metrics["downloads"], 1)
+        self.assertEqual(metrics["rows"], df.shape[0])
+        self.assertEqual(metrics["retries"], first.retry_stats.to_dict()["retries"])
+        self.assertGreater(metrics["bytes"], 0)
+        for name in ["parse_sec", "merge_sec", "output_sec", "download_sec"]:
+            self.assertGreater(metrics[name], 0)
+        self.assertEqual(metrics["cache_hits"], 0)
+        self.assertGreater(second.metrics.get("cache_hits"), 0)
+        self.assertEqual(first.metrics.get("requests") + second.metrics.get("requests"), stats["requests"])
+
+        shared = Metrics.shared().to_dict(series="IFS")
+        self.assertEqual(shared["requests"] - shared_before["requests"], stats["requests"])
+        self.assertEqual(shared["downloads"] - shared_before["downloads"], 2)
+
+    def test_metrics_per_download(self):
+        transport = Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1))
+        with MockSDMXServer(FIXTUREDIR) as server:
+            ifs = self.make_ifs(server.url, transport)
+            ifs.download_data()
+            first = ifs.metrics.to_dict()
+            df = ifs.download_data()
+        metrics = ifs.metrics.to_dict()
+        self.assertEqual(metrics["downloads"], 1)
+        self.assertEqual(metrics["rows"], df.shape[0])
+        # the structure metadata of the second download is kept by the registry
+        self.assertLess(metrics["requests"], first["requests"])
+
+    def test_metrics_iter_data_download_all(self):
+        transport = Transport(rate_limiter=RateLimiter(max_requests=10 ** 6, window_sec=1))
+        with MockSDMXServer(FIXTUREDIR) as server:
+            ifs = self.make_ifs(server.url, transport)
+            chunks = ifs.iter_data()
+            next(chunks)
+            time.sleep(0.5)
+            list(chunks)
+            metrics = ifs.metrics.to_dict()
+            self.assertEqual(metrics["downloads"], 1)
+            self.assertGreater(metrics["download_sec"], 0)
+            # the time the consumer spends on the chunks is not counted
+            self.assertLess(metrics["download_sec"], 0.5)
+
+            ifs.download_all(periods=["Q"], storedir=os.path.join(self.tmpdir, "store"))
+            metrics = ifs.metrics.to_dict()
+        self.assertEqual(metrics["downloads"], 1)
+        self.assertGreater(metrics["download_sec"], 0)
+
+    def test_prometheus(self):
+        metrics = Metrics(series="IFS")
+        metrics.inc("requests", 3)
+        metrics.inc("requests", 2, series="DOT")
+        metrics.inc("parse_sec", 0.5)
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE imfdatapy_requests_total counter", text)
+        self.assertIn('imfdatapy_requests_total{series="IFS"} 3', text)
+        self.assertIn('imfdatapy_requests_total{series="DOT"} 2', text)
+        self.assertIn('imfdatapy_parse_seconds_total{series="IFS"} 0.5', text)
+        self.assertEqual(metrics.get("requests"), 5)
+        self.assertRaises(ValueError, metrics.inc, "unknown")
+
+
+if __name__ == '__main__':
+    unittest.main()
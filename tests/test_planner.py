@@ -0,0 +1,60 @@
+import unittest
+
+from imfdatapy.imf import *
+
+
+class TestChunkPlanner(unittest.TestCase):
+
+    def test_plan(self):
+        planner = ChunkPlanner(max_cells=6)
+        countries, indicators = ["US", "CA", "DE", "FR", "IT"], ["A", "B", "C", "D"]
+        chunks = planner.plan("IFS", countries, indicators)
+        self.assertEqual(len(chunks), 5)
+        self.assertTrue(all(len(c) * len(i) <= 6 for c, i in chunks))
+        cells = sorted((c, i) for cs, inds in chunks for c in cs for i in inds)
+        self.assertEqual(cells, sorted((c, i) for c in countries for i in indicators))
+        self.assertEqual(len(planner.plan("IFS", [""], indicators)), 4)
+
+    def test_plan_url_length(self):
+        planner = ChunkPlanner(max_cells=1000, max_url_len=100)
+        indicators = [f"INDICATOR_{n:03d}" for n in range(40)]
+        chunks = planner.plan("IFS", ["US", "CA"], indicators, base_len=50)
+        self.assertTrue(all(len("+".join(c)) + len("+".join(i)) <= 50 for c, i in chunks))
+        self.assertEqual(sum(len(i) * len(c) for c, i in chunks), 80)
+
+    def test_record_failure(self):
+        planner = ChunkPlanner(max_cells=100)
+        self.assertEqual(planner.record_failure("IFS", ["US", "CA"], ["A", "B", "C"]),
+                         [(["US", "CA"], ["A", "B"]), (["US", "CA"], ["C"])])
+        self.assertEqual(planner.get_max_cells("IFS"), 3)
+        self.assertEqual(planner.record_failure("IFS", ["US", "CA"], ["A"]), [(["US"], ["A"]), (["CA"], ["A"])])
+        self.assertEqual(planner.record_failure("IFS", ["US"], ["A"]), [])
+        self.assertEqual(planner.get_max_cells("DOT"), 100)
+
+    def test_transient_failure(self):
+        planner = ChunkPlanner(max_cells=100)
+        for kind in ["timeout", "rate_limited", "connection"]:
+            self.assertEqual(len(planner.record_failure("IFS", ["US", "CA"], ["A", "B"], kind=kind)), 2)
+        self.assertEqual(planner.get_max_cells("IFS"), 100)
+        planner.record_success("IFS", ["US", "CA"], ["A", "B"])
+        planner.record_failure("IFS", ["US", "CA"], ["A", "B"], kind="server_error")
+        self.assertEqual(planner.get_max_cells("IFS"), 100)
+        planner.record_failure("IFS", ["US", "CA"], ["A", "B", "C"], kind="server_error")
+        self.assertEqual(planner.get_max_cells("IFS"), 3)
+        planner.record_failure("IFS", ["US"], ["A", "B"], kind="too_large")
+        self.assertEqual(planner.get_max_cells("IFS"), 1)
+
+    def test_grow_back(self):
+        planner = ChunkPlanner(max_cells=8, grow_after=2)
+        planner.record_failure("IFS", ["US", "CA"], ["A", "B"], kind="truncated")
+        self.assertEqual(planner.get_max_cells("IFS"), 2)
+        sizes = []
+        for _ in range(4):
+            planner.record_success("IFS", ["US"], ["A"])
+            sizes.append(planner.get_max_cells("IFS"))
+        self.assertEqual(sizes, [2, 4, 4, 8])
+        self.assertEqual(planner.chunk_sizes()["IFS"]["max_cells"], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+
+import requests
+
+from imfdatapy.imf import *
+from helpers import SequenceTransport
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def make_imf(self, outcomes, **kwargs):
+        return IMF(outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False,
+                   transport=SequenceTransport(outcomes), registry=StructureRegistry(),
+                   retry_policy=RetryPolicy(**kwargs))
+
+    def test_classify(self):
+        self.assertEqual(RetryPolicy.classify(error=requests.exceptions.ReadTimeout()), "timeout")
+        self.assertEqual(RetryPolicy.classify(error=requests.exceptions.ConnectionError()), "connection")
+        for status_code, kind in [(200, "ok"), (429, "rate_limited"), (503, "server_error"), (404, "client_error")]:
+            rq = requests.Response()
+            rq.status_code = status_code
+            self.assertEqual(RetryPolicy.classify(rq), kind)
+
+    def test_backoff(self):
+        policy = RetryPolicy(base_sec=1, max_sec=4, seed=0)
+        waits = [policy.backoff(attempt) for attempt in range(1, 6) for _ in range(20)]
+        self.assertTrue(all(0 <= wait <= 4 for wait in waits))
+        self.assertGreater(max(waits[:20]), 0)
+        self.assertLessEqual(max(waits[:20]), 1)
+        rq = requests.Response()
+        rq.headers["Retry-After"] = "7"
+        self.assertEqual(policy.backoff(1, rq), 7)
+
+    def test_repeat_request(self):
+        imf = self.make_imf([requests.exceptions.ConnectionError(), (429, {"Retry-After": "0"}), 503, 200],
+                            base_sec=0)
+        self.assertEqual(imf.repeat_request("url"), {"CompactData": {}})
+        stats = imf.retry_stats.to_dict()
+        self.assertEqual(stats["requests"], 4)
+        self.assertEqual(stats["retries"], 3)
+        self.assertEqual(stats["failures"], {"connection": 1, "rate_limited": 1, "server_error": 1})
+
+        # client errors are not retried
+        imf = self.make_imf([404, 200], base_sec=0)
+        self.assertIsNone(imf.repeat_request("url"))
+        self.assertEqual(imf.transport.n_requests, 1)
+        self.assertEqual(imf.retry_stats.to_dict()["gave_up"], 1)
+
+    def test_deadline(self):
+        imf = self.make_imf([(503, {"Retry-After": "60"}), 200], deadline_sec=1)
+        imf.start_deadline()
+        self.assertIsNone(imf.repeat_request("url"))
+        self.assertEqual(imf.transport.n_requests, 1)
+        self.assertEqual(imf.retry_stats.to_dict()["deadline_exceeded"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+
+from imfdatapy.imf import *
+from helpers import FakeTransport
+
+
+class TestCodelistIndex(unittest.TestCase):
+
+    def setUp(self):
+        words = ["gross", "domestic", "product", "real", "prices", "consumer", "index", "exports", "u.s.", "rate"]
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            "VALUE": [f"IND_{n}" for n in range(2000)],
+            "DESCRIPTION.TEXT": [" ".join(rng.choice(words, 4)).capitalize() for _ in range(2000)],
+            "DESCRIPTION.@XML:LANG": "en"})
+        self.df.loc[7, "DESCRIPTION.TEXT"] = np.nan
+
+    def scan(self, terms):
+        found = pd.Series(False, index=self.df.index)
+        for col in self.df.select_dtypes(include=["object", "string"]).columns:
+            for term in terms:
+                found = found | self.df[col].str.lower().str.contains(term.lower()).fillna(False).astype(bool)
+        return found.to_numpy()
+
+    def test_search(self):
+        index = CodelistIndex(self.df)
+        for terms in [["gross domestic"], ["Real Prices", "index exports"], ["ind_19"], ["re"], ["u.s. rate"],
+                      ["^gross"], ["rate$", "consumer (index|prices)"], ["missing"]]:
+            np.testing.assert_array_equal(index.search(terms), self.scan(terms), err_msg=str(terms))
+
+    def test_search_literal(self):
+        index = CodelistIndex(self.df)
+        literal = index.search(["u.s."], is_literal=True)
+        self.assertTrue(literal.any())
+        self.assertTrue((index.search(["u.s."]) >= literal).all())
+        self.assertFalse(index.search(["(index"], is_literal=True).any())
+
+    def test_index_shared(self):
+        transport, registry = FakeTransport(), StructureRegistry()
+        kwargs = dict(outdir=tempfile.mkdtemp(), is_log_to_screen=False, transport=transport, registry=registry)
+        kwargs["logdir"] = kwargs["outdir"]
+        ifs = IFS(search_terms=["price"], countries=["US"], **kwargs)
+        self.assertEqual(ifs.prepare_download(), ["PCPI_IX"])
+        url = f"{ifs.url}CodeList/CL_INDICATOR_IFS"
+        index = registry.get_index(url)
+        self.assertIsNotNone(index)
+        ifs = IFS(search_terms=["gross domestic product"], countries=["US"], is_literal_search=True, **kwargs)
+        self.assertEqual(ifs.prepare_download(), ["NGDP_R_XDC", "NGDP_R_SA_XDC"])
+        self.assertIs(registry.get_index(url), index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+from imfdatapy.imf import *
+from helpers import FakeTransport
+
+
+class TestDimensions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def make_ifs(self, transport=None, **kwargs):
+        kwargs.setdefault("planner", ChunkPlanner())
+        kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=1))
+        return IFS(outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False,
+                   transport=transport if transport is not None else FakeTransport(),
+                   registry=StructureRegistry(), **kwargs)
+
+    def test_download_meta_reuse(self):
+        ifs = self.make_ifs(search_terms=["price"], countries=["US"])
+        ifs.get_series_names()
+        ifs.get_dimensions()
+        codelists = []
+        get_codelist = ifs.get_codelist
+        ifs.get_codelist = lambda codelist: codelists.append(codelist) or get_codelist(codelist)
+        meta_df = ifs.download_meta()
+        self.assertEqual(codelists, ["CL_INDICATOR_IFS"])
+        self.assertEqual(list(meta_df["ID"]), ["PCPI_IX"])
+        self.assertEqual(ifs.dim_dict["CL_INDICATOR_IFS"].shape[0], 3)
+
+    def test_lazy_dimensions(self):
+        transport = FakeTransport()
+        ifs = self.make_ifs(transport=transport, countries=["US", "XX"])
+        ifs.get_dimensions()
+        self.assertEqual(list(ifs.dim_dict.keys()), ["CL_FREQ_IFS", "CL_AREA_IFS", "CL_INDICATOR_IFS"])
+        self.assertFalse(any(ifs.dim_dict.is_loaded(key) for key in ifs.dim_dict.keys()))
+        ifs.validate_inputs()
+        self.assertEqual(ifs.countries, ["US"])
+        self.assertTrue(ifs.dim_dict.is_loaded("CL_AREA_IFS"))
+        self.assertFalse(ifs.dim_dict.is_loaded("CL_INDICATOR_IFS"))
+        self.assertFalse(any("CL_INDICATOR_IFS" in url for url in transport.urls))
+        self.assertEqual(ifs.dim_dict["CL_INDICATOR_IFS"].shape[0], 3)
+
+    def test_gfsr_missing_dimensions(self):
+        gfsr = GFSR(sector="Banks", unit="US Dollars", outdir=self.tmpdir, logdir=self.tmpdir, is_log_to_screen=False,
+                    transport=FakeTransport(), registry=StructureRegistry())
+        gfsr.dim_dict["CL_SECTOR_GFSR"] = None
+        gfsr.dim_dict["CL_UNIT_GFSR"] = None
+        with unittest.mock.patch.object(IMF, "prepare_download", return_value=["FSANL_PT"]):
+            self.assertEqual(gfsr.prepare_download(), ["FSANL_PT"])
+        self.assertEqual((gfsr.sector, gfsr.unit), ("", ""))
+
+
+class TestStructureRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def test_registry_shared(self):
+        transport, registry = FakeTransport(), StructureRegistry()
+        for countries in [["US"], ["CA"]]:
+            ifs = IFS(search_terms=["price"], countries=countries, outdir=self.tmpdir, logdir=self.tmpdir,
+                      is_log_to_screen=False, transport=transport, registry=registry)
+            df = ifs.download_data()
+            self.assertEqual(df.shape[0], 8)
+        structure_urls = [url for url in transport.urls if "CompactData" not in url]
+        self.assertEqual(len(structure_urls), len(set(structure_urls)))
+        self.assertEqual(len(transport.urls) - len(structure_urls), 2)
+
+    def test_registry_invalidate(self):
+        transport, registry = FakeTransport(), StructureRegistry()
+        ifs = IFS(search_terms=["price"], countries=["US"], outdir=self.tmpdir, logdir=self.tmpdir,
+                  is_log_to_screen=False, transport=transport, registry=registry)
+        ifs.download_data()
+        self.assertIn(f"{ifs.url}Dataflow", registry.urls())
+        n_requests = len(transport.urls)
+        ifs.refresh_structure()
+        self.assertGreater(len(transport.urls), n_requests)
+        self.assertEqual(registry.invalidate(series="DOT"), [f"{ifs.url}Dataflow"])
+        registry.invalidate()
+        self.assertEqual(len(registry), 0)
+
+    def test_lazy_dim_dict_concurrent(self):
+        dim_dict, n_loads, started = LazyDimDict(), [], threading.Event()
+
+        def load():
+            n_loads.append(1)
+            started.set()
+            time.sleep(0.5)
+            return "slow"
+
+        dim_dict["CL_FREQ_IFS"] = "loaded"
+        dim_dict.add_loader("CL_AREA_IFS", load)
+        threads = [threading.Thread(target=lambda: dim_dict["CL_AREA_IFS"]) for _ in range(3)]
+        for t in threads:
+            t.start()
+        started.wait()
+        # the slow loader does not block the lookups of other tables
+        start = time.perf_counter()
+        self.assertEqual(dim_dict["CL_FREQ_IFS"], "loaded")
+        self.assertIsNone(dim_dict.get_loaded("CL_AREA_IFS"))
+        self.assertLess(time.perf_counter() - start, 0.25)
+        for t in threads:
+            t.join()
+        self.assertEqual(dim_dict["CL_AREA_IFS"], "slow")
+        self.assertEqual(len(n_loads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
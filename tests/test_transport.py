@@ -0,0 +1,87 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from imfdatapy.imf import *
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"accept_encoding": "%s"}' % self.headers.get("Accept-Encoding", "").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTransport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def test_transport_pool(self):
+        transport = Transport(pool_size=4, connect_timeout=1, read_timeout=2)
+        self.assertEqual(transport.timeout, (1, 2))
+        self.assertEqual(transport.session.get_adapter("http://x").poolmanager.connection_pool_kw["maxsize"], 4)
+
+    def test_transport_gzip(self):
+        with Transport() as transport:
+            rq = transport.get(self.url)
+            self.assertEqual(rq.status_code, 200)
+            self.assertIn("gzip", rq.json()["accept_encoding"])
+
+    def test_transport_shared(self):
+        transport = Transport()
+        ifs = IFS(transport=transport, outdir="out", is_log_to_screen=False)
+        dot = DOT(transport=transport, outdir="out", is_log_to_screen=False)
+        self.assertIs(ifs.transport, dot.transport)
+
+    def test_close(self):
+        shared = Transport()
+        shared.get(self.url)
+        with IFS(transport=shared, outdir="out", is_log_to_screen=False):
+            pass
+        with IFS(outdir="out", is_log_to_screen=False, is_cache=False) as ifs:
+            ifs.transport.get(self.url)
+            pools = ifs.transport.session.get_adapter(self.url).poolmanager.pools
+            self.assertEqual(len(pools), 1)
+        self.assertEqual(len(pools), 0)
+        self.assertEqual(len(shared.session.get_adapter(self.url).poolmanager.pools), 1)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_rate_limit_no_wait(self):
+        limiter = RateLimiter(max_requests=3, window_sec=10)
+        waits = [limiter.acquire() for _ in range(3)]
+        self.assertEqual(waits, [0, 0, 0])
+        self.assertGreater(limiter.reserve(), 0)
+
+    def test_rate_limit_window(self):
+        limiter = RateLimiter(max_requests=2, window_sec=0.2)
+        for _ in range(2):
+            limiter.acquire()
+        self.assertGreaterEqual(limiter.acquire(), 0.1)
+
+    def test_rate_limit_shared(self):
+        self.assertIs(RateLimiter.shared(), Transport().rate_limiter)
+        limiter = set_rate_limit(max_requests=20, window_sec=5)
+        self.assertEqual(RateLimiter.shared().max_requests, 20)
+        limiter.configure(max_requests=10)
+
+
+if __name__ == '__main__':
+    unittest.main()